@@ -0,0 +1,185 @@
+"""What Document(..., article_threshold=T) saves, and what it loses.
+
+    python benchmarks/classify.py [--pages N] [-a ARTICLES ...] [-o OTHERS ...]
+
+Scores a labelled corpus with readability.classify: the test samples and
+generated articles on one side, generated index pages, search results,
+login walls and product listings on the other, plus the files,
+directories or globs given with --articles and --others. For a range of
+thresholds it reports how many articles and other pages would be
+rejected, the share of the article text (the words of their summaries)
+lost with the rejected articles, and the time of the whole corpus with
+the check against the time without it.
+"""
+import os
+import random
+import sys
+import time
+from optparse import OptionParser
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from golden import boilerplate  # noqa: E402
+from golden import paragraph  # noqa: E402
+from golden import sentence  # noqa: E402
+from profiles import words  # noqa: E402
+from readability import Document  # noqa: E402
+from readability.batch import iter_paths  # noqa: E402
+from readability.classify import article_features  # noqa: E402
+from readability.htmls import build_doc  # noqa: E402
+from readability.readability import NotAnArticle  # noqa: E402
+
+
+SEED = 49
+THRESHOLDS = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9)
+
+
+def head(rng, title, og_type=None, schema_type=None):
+    meta = ""
+    if og_type and rng.random() < 0.5:
+        meta += "<meta property='og:type' content='%s'>" % og_type
+    if schema_type and rng.random() < 0.4:
+        meta += (
+            "<script type='application/ld+json'>{\"@context\": \"https://schema.org\", "
+            "\"@type\": \"%s\", \"name\": \"%s\"}</script>" % (schema_type, title)
+        )
+    return "<head><title>%s</title>%s</head>" % (title, meta)
+
+
+def page(rng, og_type, schema_type, content):
+    title = sentence(rng, 5)
+    chrome = [boilerplate(rng) for _ in range(rng.randint(1, 3))]
+    chrome.insert(rng.randint(0, len(chrome)), content)
+    return "<html>%s<body>%s</body></html>" % (head(rng, title, og_type, schema_type), "\n".join(chrome))
+
+
+def article(rng):
+    if rng.random() < 0.25:
+        # text in a div, split by <br>
+        text = "<br><br>".join(paragraph(rng) for _ in range(rng.randint(2, 10)))
+        content = "<div class='text'>%s</div>" % text
+    else:
+        content = "".join("<p>%s</p>" % paragraph(rng) for _ in range(rng.randint(2, 15)))
+    tag = "article" if rng.random() < 0.4 else "div"
+    content = "<%s class='story'><h1>%s</h1>%s</%s>" % (tag, sentence(rng, 6), content, tag)
+    return page(rng, "article", rng.choice(["NewsArticle", "BlogPosting", "Article"]), content)
+
+
+def index(rng):
+    teasers = "".join(
+        "<div class='teaser'><h3><a href='/a%d'>%s</a></h3><p>%s</p></div>"
+        % (i, sentence(rng, 8), sentence(rng, rng.randint(5, 15)))
+        for i in range(rng.randint(8, 30))
+    )
+    return page(rng, "website", "CollectionPage", "<div class='front'>%s</div>" % teasers)
+
+
+def search(rng):
+    results = "".join(
+        "<li><a href='/r%d'>%s</a><p>%s %s</p><cite>example.com/r%d</cite></li>"
+        % (i, sentence(rng, 7), sentence(rng), sentence(rng), i)
+        for i in range(10)
+    )
+    form = "<form action='/search'><input name='q' value='%s'></form>" % sentence(rng, 2)
+    return page(rng, "website", "SearchResultsPage", "<div id='results'>%s<ol>%s</ol></div>" % (form, results))
+
+
+def login(rng):
+    lead = "<p>%s</p>" % paragraph(rng) if rng.random() < 0.6 else ""
+    form = (
+        "<form action='/login'><p>Subscribe or sign in to continue reading.</p>"
+        "<input name='user'><input type='password' name='pw'><button>Sign in</button></form>"
+    )
+    return page(rng, "article", None, "<div class='paywall'><h1>%s</h1>%s%s</div>" % (sentence(rng, 6), lead, form))
+
+
+def listing(rng):
+    cards = "".join(
+        "<div class='product'><a href='/p%d'><img src='/p%d.jpg'>%s</a><span class='price'>$%d.99</span>"
+        "<p>%s</p></div>" % (i, i, sentence(rng, 4), rng.randint(5, 500), sentence(rng, rng.randint(3, 12)))
+        for i in range(rng.randint(6, 40))
+    )
+    return page(rng, "product.group", "ItemList", "<div class='grid'>%s</div>" % cards)
+
+
+KINDS = {"article": article, "index": index, "search": search, "login": login, "listing": listing}
+
+
+def corpus(count, articles=(), others=()):
+    """Returns [(kind, is_article, html)]."""
+    pages = []
+    for path in iter_paths(list(articles) or [os.path.join(ROOT, "tests", "samples")]):
+        with open(path, "rb") as f:
+            pages.append(("sample", True, f.read()))
+    for path in iter_paths(others) if others else ():
+        with open(path, "rb") as f:
+            pages.append(("other", False, f.read()))
+    rng = random.Random(SEED)
+    for i in range(count):
+        kind = "article" if i % 2 == 0 else rng.choice(sorted(set(KINDS) - {"article"}))
+        pages.append((kind, kind == "article", KINDS[kind](rng)))
+    return pages
+
+
+def measure(html):
+    """Returns the article score, the word count of the summary and the
+    times of summary(), of the feature pass, and of a rejection."""
+    started = time.perf_counter()
+    summary = Document(html).summary()
+    full = time.perf_counter() - started
+
+    doc, _ = build_doc(html)
+    started = time.perf_counter()
+    article_features(doc)
+    features = time.perf_counter() - started
+
+    started = time.perf_counter()
+    check = Document(html, article_threshold=1.1)
+    try:
+        check.summary()
+    except NotAnArticle:
+        pass
+    rejected = time.perf_counter() - started
+    return check.article_score(), len(words(summary)), full, features, rejected
+
+
+def main():
+    parser = OptionParser(usage="%prog [options]")
+    parser.add_option("-n", "--pages", type="int", default=200, help="number of generated pages")
+    parser.add_option("-a", "--articles", action="append", default=[], help="article pages (repeatable)")
+    parser.add_option("-o", "--others", action="append", default=[], help="other pages (repeatable)")
+    options, args = parser.parse_args()
+
+    pages = corpus(options.pages, options.articles, options.others)
+    rows = [(kind, is_article) + measure(html) for kind, is_article, html in pages]
+
+    print("%-10s %6s %8s %8s %8s" % ("kind", "pages", "min", "mean", "max"))
+    for kind in sorted(set(row[0] for row in rows)):
+        scores = [row[2] for row in rows if row[0] == kind]
+        print("%-10s %6d %8.3f %8.3f %8.3f" % (
+            kind, len(scores), min(scores), sum(scores) / len(scores), max(scores)))
+
+    articles = [row for row in rows if row[1]]
+    others = [row for row in rows if not row[1]]
+    article_words = sum(row[3] for row in articles) or 1
+    baseline = sum(row[4] for row in rows)
+    print("\nwithout the check: %.1f ms for %d pages" % (baseline * 1000, len(rows)))
+    print("%9s %16s %16s %10s %10s %8s" % (
+        "threshold", "articles lost", "others skipped", "words lost", "time ms", "speedup"))
+    for threshold in THRESHOLDS:
+        lost = [row for row in articles if row[2] < threshold]
+        skipped = [row for row in others if row[2] < threshold]
+        elapsed = sum(
+            row[6] if row[2] < threshold else row[4] + row[5] for row in rows
+        )
+        print("%9.1f %9d (%3.0f%%) %9d (%3.0f%%) %9.1f%% %10.1f %7.2fx" % (
+            threshold,
+            len(lost), len(lost) * 100.0 / max(len(articles), 1),
+            len(skipped), len(skipped) * 100.0 / max(len(others), 1),
+            sum(row[3] for row in lost) * 100.0 / article_words,
+            elapsed * 1000, baseline / elapsed))
+
+
+if __name__ == "__main__":
+    main()
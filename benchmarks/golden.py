@@ -0,0 +1,272 @@
+"""Golden outputs of the extraction, to check that a rewrite changes nothing.
+
+    python benchmarks/golden.py [--config NAME | --options JSON] [path ...]
+    python benchmarks/golden.py --regenerate
+
+Extracts every page of the corpus (files, directories or globs, the test
+samples by default, plus --generated pages built from a fixed seed) with
+the reference pipeline (plain Document()) and with the configuration under
+test, and compares, for every page,
+
+    title       Document.title()
+    best        path of the best candidate in the original document
+    candidates  the top scores with their paths, within --tolerance
+    summary     summary() with whitespace collapsed and attributes sorted
+
+of the reference run against the stored goldens (GOLDEN), and of the
+configuration run against the reference run. The best-of-N summary() times
+of both runs are reported next to it, so that an optimization shows both
+its speedup and its equivalence. Exits with status 1 on any difference.
+
+--regenerate runs the reference pipeline and stores its output as the new
+goldens, after a change of the output which is meant to be.
+"""
+import difflib
+import json
+import os
+import random
+import re
+import sys
+import time
+from optparse import OptionParser
+
+from lxml.html import fragment_fromstring
+from lxml.html import tostring
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from readability import Document  # noqa: E402
+from readability.batch import iter_paths  # noqa: E402
+
+
+GOLDEN = os.path.join(ROOT, "tests", "golden", "golden.json")
+SAMPLES = os.path.join(ROOT, "tests", "samples")
+SEED = 47
+GENERATED = 40
+TOP = 10
+TOLERANCE = 1e-6
+# "fast" trades some exactness for speed, the others must not differ
+CONFIGS = {
+    "reference": {},
+    "incremental": {"incremental": True},
+    "numpy": {"scoring": "numpy"},
+    "fast": {"profile": "fast"},
+}
+WORDS = (
+    "the of and to in is was for on that with as by at from this it be are "
+    "council report river market school season players budget museum water "
+    "research station village election energy harbour festival railway"
+).split()
+CLASSES = ["article", "content", "post", "entry", "story", "main", "body", "text", "box", "col", ""]
+JUNK = ["sidebar", "comment", "footer", "nav", "menu", "share", "related", "ad-banner", "widget"]
+
+
+def sentence(rng, words=None):
+    words = words or rng.randint(4, 30)
+    text = " ".join(rng.choice(WORDS) for _ in range(words))
+    if rng.random() < 0.7:
+        text = text.replace(" ", ", ", rng.randint(0, 3))
+    return text.capitalize() + "."
+
+
+def paragraph(rng):
+    parts = [sentence(rng) for _ in range(rng.randint(1, 5))]
+    if rng.random() < 0.3:
+        parts.insert(rng.randint(0, len(parts)), "<a href='/p%d'>%s</a>" % (rng.randint(0, 99), sentence(rng, 3)))
+    if rng.random() < 0.2:
+        parts.append("<img src='/i%d.jpg' width='%d' height='200'>" % (rng.randint(0, 99), rng.choice([40, 400])))
+    return " ".join(parts)
+
+
+def block(rng, depth=0):
+    """Some kind of article content: paragraphs, and divs used as such."""
+    kind = rng.random()
+    if kind < 0.45 or depth > 2:
+        return "<p>%s</p>" % paragraph(rng)
+    if kind < 0.6:
+        # text right in a div, which becomes a paragraph
+        return "<div>%s<br>%s</div>" % (paragraph(rng), sentence(rng))
+    if kind < 0.7:
+        return "<h2>%s</h2>" % sentence(rng, 4)
+    if kind < 0.78:
+        rows = "".join("<tr><td>%s</td><td>%s</td></tr>" % (sentence(rng, 3), paragraph(rng)) for _ in range(3))
+        return "<table>%s</table>" % rows
+    if kind < 0.85:
+        return "<blockquote><p>%s</p></blockquote>" % paragraph(rng)
+    if kind < 0.9:
+        return "<ul>%s</ul>" % "".join("<li>%s</li>" % sentence(rng) for _ in range(4))
+    inner = "".join(block(rng, depth + 1) for _ in range(rng.randint(1, 4)))
+    return "<div class='%s'>%s</div>" % (rng.choice(CLASSES), inner)
+
+
+def boilerplate(rng):
+    links = "".join("<li><a href='/s%d'>%s</a></li>" % (i, sentence(rng, 2)) for i in range(rng.randint(3, 12)))
+    return "<div class='%s'><ul>%s</ul><p>%s</p></div>" % (rng.choice(JUNK), links, sentence(rng, 8))
+
+
+def generate(i, seed=SEED):
+    """Returns the HTML of generated page `i`."""
+    rng = random.Random("%d-%d" % (seed, i))
+    body = [boilerplate(rng)]
+    articles = 0 if rng.random() < 0.05 else 1 + (rng.random() < 0.2)
+    for _ in range(articles):
+        content = "".join(block(rng) for _ in range(rng.randint(1, 12)))
+        body.append("<div class='%s' id='%s'>%s</div>" % (rng.choice(CLASSES), rng.choice(CLASSES), content))
+    for _ in range(rng.randint(0, 3)):
+        body.insert(rng.randint(0, len(body)), boilerplate(rng))
+    return "<html><head><title>%s | Site %d</title></head><body>%s</body></html>" % (
+        sentence(rng, 5),
+        i % 7,
+        "\n".join(body),
+    )
+
+
+def corpus(paths=(), generated=GENERATED):
+    """Returns [(name, html)] for `paths` (the samples by default) and the
+    generated pages."""
+    pages = []
+    for path in iter_paths(paths or [SAMPLES]):
+        with open(path, "rb") as f:
+            pages.append((os.path.relpath(path, ROOT), f.read()))
+    pages.extend(("generated/%03d" % i, generate(i)) for i in range(generated))
+    return pages
+
+
+def normalize(summary):
+    """The summary with runs of whitespace collapsed and attributes sorted."""
+    root = fragment_fromstring(summary, create_parent="div")
+    for elem in root.iter():
+        for name in ("text", "tail"):
+            value = getattr(elem, name)
+            if value:
+                setattr(elem, name, re.sub(r"\s+", " ", value))
+        if isinstance(elem.tag, str) and len(elem.attrib) > 1:
+            attributes = sorted(elem.attrib.items())
+            elem.attrib.clear()
+            elem.attrib.update(attributes)
+    return tostring(root, encoding="unicode")
+
+
+def snapshot(html, options=None):
+    """Returns what is compared of the extraction of one page."""
+    doc = Document(html, features=True, xpath="map", **(options or {}))
+    try:
+        summary = normalize(doc.summary())
+    except Exception as e:
+        return {"error": "%s: %s" % (type(e).__name__, e)}
+    features = doc.features()
+    rows = sorted(
+        zip(features["content_score"], features["path"]), key=lambda row: -row[0]
+    )
+    return {
+        "title": doc.title(),
+        "best": None if doc.degraded or not rows else rows[0][1],
+        "candidates": [[path, score] for score, path in rows[:TOP]],
+        "summary": summary,
+    }
+
+
+def differences(expected, actual, tolerance=TOLERANCE):
+    """Returns descriptions of how two snapshots differ."""
+    found = []
+    for field in ("error", "title", "best"):
+        if expected.get(field) != actual.get(field):
+            found.append("%s: %r != %r" % (field, expected.get(field), actual.get(field)))
+    expected_scores = dict(expected.get("candidates", ()))
+    actual_scores = dict(actual.get("candidates", ()))
+    if set(expected_scores) != set(actual_scores):
+        found.append("candidates: %s" % sorted(set(expected_scores) ^ set(actual_scores))[:3])
+    for path in sorted(set(expected_scores) & set(actual_scores)):
+        a, b = expected_scores[path], actual_scores[path]
+        if abs(a - b) > tolerance * max(1.0, abs(a)):
+            found.append("score of %s: %r != %r" % (path, a, b))
+    if expected.get("summary") != actual.get("summary"):
+        diff = difflib.unified_diff(
+            re.split(r"(?<=>)", expected.get("summary") or ""),
+            re.split(r"(?<=>)", actual.get("summary") or ""),
+            lineterm="",
+            n=1,
+        )
+        found.append("summary:\n" + "\n".join(list(diff)[2:12]))
+    return found
+
+
+def timed(html, options, runs):
+    best = None
+    for _ in range(runs):
+        started = time.perf_counter()
+        Document(html, **options).summary()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def load(path=GOLDEN):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["pages"]
+
+
+def regenerate(pages, path=GOLDEN):
+    golden = {name: snapshot(html) for name, html in pages}
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"seed": SEED, "pages": golden}, f, indent=1, sort_keys=True, ensure_ascii=False)
+        f.write("\n")
+    return golden
+
+
+def main():
+    parser = OptionParser(usage="%prog [options] [path ...]")
+    parser.add_option("-c", "--config", default="incremental", help="one of %s" % ", ".join(sorted(CONFIGS)))
+    parser.add_option("-o", "--options", default=None, help="Document options as JSON, instead of --config")
+    parser.add_option("-g", "--generated", type="int", default=GENERATED, help="number of generated pages")
+    parser.add_option("-n", "--runs", type="int", default=3, help="best of N runs")
+    parser.add_option("-t", "--tolerance", type="float", default=TOLERANCE, help="relative, for scores")
+    parser.add_option("--golden", default=GOLDEN, help="file of the golden outputs")
+    parser.add_option("--regenerate", action="store_true", default=False)
+    options, args = parser.parse_args()
+
+    pages = corpus(args, options.generated)
+    if options.regenerate:
+        regenerate(pages, options.golden)
+        print("wrote %d golden outputs to %s" % (len(pages), options.golden))
+        return
+    if options.options:
+        config = json.loads(options.options)
+    elif options.config in CONFIGS:
+        config = CONFIGS[options.config]
+    else:
+        parser.error("unknown configuration %r" % options.config)
+
+    golden = load(options.golden)
+    failures = []
+    reference_total = config_total = 0.0
+    print("%-50s %8s %8s %8s %7s %7s" % ("page", "ref ms", "new ms", "speedup", "golden", "equal"))
+    for name, html in pages:
+        reference = snapshot(html)
+        actual = snapshot(html, config)
+        golden_diff = differences(golden[name], reference, options.tolerance) if name in golden else None
+        config_diff = differences(reference, actual, options.tolerance)
+        reference_time = timed(html, {}, options.runs)
+        config_time = timed(html, config, options.runs)
+        reference_total += reference_time
+        config_total += config_time
+        print("%-50s %8.1f %8.1f %7.2fx %7s %7s" % (
+            name[-50:], reference_time * 1000, config_time * 1000, reference_time / config_time,
+            "-" if golden_diff is None else "no" if golden_diff else "ok",
+            "no" if config_diff else "ok"))
+        failures.extend(("%s (golden)" % name, diff) for diff in golden_diff or ())
+        failures.extend(("%s (%s)" % (name, options.options or options.config), diff) for diff in config_diff)
+    print("%-50s %8.1f %8.1f %7.2fx" % (
+        "total", reference_total * 1000, config_total * 1000, reference_total / config_total))
+    for name, diff in failures:
+        print("\n%s: %s" % (name, diff))
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
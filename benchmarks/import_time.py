@@ -0,0 +1,81 @@
+"""Import time of the readability package, which is what cold starts pay.
+
+    python benchmarks/import_time.py [--runs N] [--budget MS]
+
+Imports the package in fresh interpreters with ``python -X importtime``,
+reports the median cumulative import time and the slowest modules, and
+exits with status 1 when the median is over budget or when one of the
+lazily loaded dependencies was imported anyway.
+"""
+import os
+import statistics
+import subprocess
+import sys
+from optparse import OptionParser
+
+
+# milliseconds; measured ~100ms on a laptop, most of it logging and lxml
+BUDGET_MS = 150
+# only loaded when they are actually needed
+LAZY_MODULES = [
+    "chardet",
+    "cchardet",
+    "cssselect",
+    "lxml.html.clean",
+    "lxml_html_clean",
+    "numpy",
+    "optparse",
+    "urllib.request",
+]
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_times():
+    """Returns {module: cumulative microseconds} for one fresh import."""
+    code = "import readability, sys; sys.stdout.write(' '.join(sys.modules))"
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, env=env, check=True,
+    )
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times, proc.stdout.split()
+
+
+def main():
+    parser = OptionParser(usage="%prog [options]")
+    parser.add_option("-n", "--runs", type="int", default=10)
+    parser.add_option("-b", "--budget", type="float", default=BUDGET_MS, help="in ms")
+    options, _ = parser.parse_args()
+
+    totals = []
+    for _ in range(options.runs):
+        times, modules = import_times()
+        totals.append(times["readability"] / 1000.0)
+    median = statistics.median(totals)
+
+    print("import readability: median %.1fms, min %.1fms (budget %.0fms)" % (
+        median, min(totals), options.budget))
+    print("slowest imports:")
+    slowest = sorted(times.items(), key=lambda item: -item[1])
+    for name, us in slowest[1:11]:
+        print("  %7.1fms  %s" % (us / 1000.0, name))
+
+    failed = False
+    eager = [name for name in LAZY_MODULES if name in modules]
+    if eager:
+        print("imported eagerly: %s" % ", ".join(eager))
+        failed = True
+    if median > options.budget:
+        print("over budget")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
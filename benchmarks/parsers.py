@@ -0,0 +1,75 @@
+"""Parse and extraction time of the parser backends, and their output.
+
+    python benchmarks/parsers.py [--runs N] [path ...]
+
+For every installed backend (see readability.htmls.PARSERS), parses and
+extracts every page of the corpus (files, directories or globs; the test
+samples by default) and reports the total build_doc() time, the total
+summary() time, and how similar the summaries are to the ones of the
+default lxml backend (see profiles.py).
+"""
+import os
+import sys
+import time
+from optparse import OptionParser
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from profiles import similarity  # noqa: E402
+from readability import Document  # noqa: E402
+from readability.batch import iter_paths  # noqa: E402
+from readability.htmls import DEFAULT_PARSER  # noqa: E402
+from readability.htmls import PARSERS  # noqa: E402
+from readability.htmls import build_doc  # noqa: E402
+from readability.htmls import get_parser  # noqa: E402
+
+
+def best_of(runs, func, *args):
+    best = None
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = OptionParser(usage="%prog [options] [path ...]")
+    parser.add_option("-n", "--runs", type="int", default=3, help="best of N runs")
+    options, args = parser.parse_args()
+
+    pages = []
+    for path in iter_paths(args or [os.path.join(ROOT, "tests", "samples")]):
+        with open(path, "rb") as f:
+            pages.append(f.read())
+    if not pages:
+        parser.error("no pages found")
+
+    baseline = [Document(page).summary() for page in pages]
+    print("%d pages" % len(pages))
+    print("%-14s %10s %12s %8s %9s" % ("backend", "parse ms", "summary ms", "sim", "identical"))
+    for name in [DEFAULT_PARSER] + sorted(set(PARSERS) - {DEFAULT_PARSER}):
+        try:
+            get_parser(name)
+        except ImportError as e:
+            print("%-14s not available (%s)" % (name, str(e).splitlines()[0][:60]))
+            continue
+        parse_time = summary_time = 0.0
+        scores = []
+        for page, expected in zip(pages, baseline):
+            elapsed, _ = best_of(options.runs, build_doc, page, None, None, name)
+            parse_time += elapsed
+            elapsed, summary = best_of(
+                options.runs, lambda: Document(page, parser=name).summary()
+            )
+            summary_time += elapsed
+            scores.append(similarity(expected, summary))
+        print("%-14s %10.1f %12.1f %8.3f %5d/%d" % (
+            name, parse_time * 1000, summary_time * 1000, sum(scores) / len(scores),
+            scores.count(1.0), len(scores)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Speed and output similarity of an extraction profile against "full".
+
+    python benchmarks/profiles.py [--profile fast] [--runs N] [--generated N] [path ...]
+
+Extracts every page of the corpus (files, directories or globs, the test
+samples by default, plus the --generated pages of benchmarks/golden.py)
+with both profiles and reports, per page and overall,
+the time of summary(), the speedup, and how similar the text of the
+summary is to the full one (difflib ratio over words, 1.0 is identical).
+Exits with status 1 when the mean similarity is below --min-similarity.
+"""
+import difflib
+import os
+import sys
+import time
+from optparse import OptionParser
+
+from lxml.html import document_fromstring
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from golden import GENERATED  # noqa: E402
+from golden import corpus  # noqa: E402
+from readability import Document  # noqa: E402
+
+
+def timed_summary(html, profile, runs):
+    best = None
+    for _ in range(runs):
+        started = time.perf_counter()
+        summary = Document(html, profile=profile).summary()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, summary
+
+
+def words(summary):
+    return document_fromstring(summary).text_content().split()
+
+
+def similarity(a, b):
+    if a == b:
+        return 1.0
+    return difflib.SequenceMatcher(None, words(a), words(b), autojunk=False).ratio()
+
+
+def main():
+    parser = OptionParser(usage="%prog [options] [path ...]")
+    parser.add_option("-p", "--profile", default="fast", help="profile to compare to full")
+    parser.add_option("-n", "--runs", type="int", default=3, help="best of N runs")
+    parser.add_option("-g", "--generated", type="int", default=GENERATED, help="number of generated pages")
+    parser.add_option("-m", "--min-similarity", type="float", default=0.0)
+    options, args = parser.parse_args()
+
+    pages = corpus(args, options.generated)
+    full_total = other_total = 0.0
+    scores = []
+    print("%-40s %9s %9s %8s %6s" % ("page", "full ms", options.profile + " ms", "speedup", "sim"))
+    for name, html in pages:
+        full_time, full = timed_summary(html, "full", options.runs)
+        other_time, other = timed_summary(html, options.profile, options.runs)
+        score = similarity(full, other)
+        full_total += full_time
+        other_total += other_time
+        scores.append(score)
+        print("%-40s %9.2f %9.2f %7.2fx %6.3f" % (
+            name[-40:], full_time * 1000, other_time * 1000,
+            full_time / other_time, score))
+
+    if not scores:
+        parser.error("no pages found")
+    mean = sum(scores) / len(scores)
+    print("%d pages: %.1fms -> %.1fms, %.2fx faster; similarity mean %.3f, min %.3f, "
+          "%d identical" % (
+              len(scores), full_total * 1000, other_total * 1000, full_total / other_total,
+              mean, min(scores), scores.count(1.0)))
+    sys.exit(1 if mean < options.min_similarity else 0)
+
+
+if __name__ == "__main__":
+    main()
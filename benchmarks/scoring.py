@@ -0,0 +1,88 @@
+"""Time of the scoring pass with scoring="python" and scoring="numpy".
+
+    python benchmarks/scoring.py [--runs N] [--generated N] [--long N] [path ...]
+
+Scores every page of the corpus (files, directories or globs, the test
+samples by default, plus the --generated pages of benchmarks/golden.py and
+--long pages made of many more of their blocks) with both backends, from
+the same cleaned tree, and reports the best-of-N time of score_paragraphs()
+per page and overall. The numpy backend walks the whole tree once where the
+Python one reads the text of every candidate subtree again, so it pays off
+on long pages and not on short ones. Exits with status 1 if any scores differ.
+"""
+import os
+import random
+import sys
+import time
+from optparse import OptionParser
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from golden import GENERATED  # noqa: E402
+from golden import SEED  # noqa: E402
+from golden import block  # noqa: E402
+from golden import boilerplate  # noqa: E402
+from golden import corpus  # noqa: E402
+from readability import Document  # noqa: E402
+
+LONG = 4
+
+
+def generate_long(i, sections=40, seed=SEED):
+    """Returns the HTML of long page `i`: sections of blocks, in sections."""
+    rng = random.Random("long-%d-%d" % (seed, i))
+    body = [boilerplate(rng)]
+    for _ in range(sections):
+        content = "".join(block(rng) for _ in range(rng.randint(5, 15)))
+        body.append("<div class='section'><div class='text'>%s</div></div>" % content)
+        if rng.random() < 0.3:
+            body.append(boilerplate(rng))
+    return "<html><body><div class='article'>%s</div></body></html>" % "\n".join(body)
+
+
+def timed_scores(html, scoring, runs):
+    best = None
+    for _ in range(runs):
+        doc = Document(html, scoring=scoring)
+        tree = doc._html(True).getroottree()
+        started = time.perf_counter()
+        candidates = doc.score_paragraphs()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, [(tree.getpath(elem), c["content_score"]) for elem, c in candidates.items()]
+
+
+def main():
+    parser = OptionParser(usage="%prog [options] [path ...]")
+    parser.add_option("-n", "--runs", type="int", default=5, help="best of N runs")
+    parser.add_option("-g", "--generated", type="int", default=GENERATED, help="number of generated pages")
+    parser.add_option("-l", "--long", type="int", default=LONG, help="number of long generated pages")
+    options, args = parser.parse_args()
+
+    pages = corpus(args, options.generated)
+    pages.extend(("long/%03d" % i, generate_long(i)) for i in range(options.long))
+    if not pages:
+        parser.error("no pages found")
+    totals = {"python": 0.0, "numpy": 0.0}
+    differ = 0
+    print("%-40s %9s %9s %8s" % ("page", "python ms", "numpy ms", "speedup"))
+    for name, html in pages:
+        python_time, python_scores = timed_scores(html, "python", options.runs)
+        numpy_time, numpy_scores = timed_scores(html, "numpy", options.runs)
+        totals["python"] += python_time
+        totals["numpy"] += numpy_time
+        same = python_scores == numpy_scores
+        differ += not same
+        print("%-40s %9.2f %9.2f %7.2fx%s" % (
+            name[-40:], python_time * 1000, numpy_time * 1000, python_time / numpy_time,
+            "" if same else "  scores differ"))
+
+    print("%d pages: %.1fms -> %.1fms, %.2fx faster; %d with different scores" % (
+        len(pages), totals["python"] * 1000, totals["numpy"] * 1000,
+        totals["python"] / totals["numpy"], differ))
+    sys.exit(1 if differ else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Time of readability.sweep() against one Document per configuration.
+
+    python benchmarks/sweep.py [--runs N] [path ...]
+
+Extracts every page of the corpus (files, directories or globs; the test
+samples by default) with a grid of min_text_length, retry_length and
+negative_keywords values, once with a Document and summary() per
+configuration and once with sweep(), checks that the summaries are the
+same and reports both times.
+"""
+import os
+import sys
+import time
+from optparse import OptionParser
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from readability import Document  # noqa: E402
+from readability.batch import iter_paths  # noqa: E402
+from readability.sweep import sweep  # noqa: E402
+
+
+CONFIGS = [
+    {"min_text_length": length, "retry_length": retry, "negative_keywords": negative}
+    for length in (15, 25, 50)
+    for retry in (100, 250)
+    for negative in (None, "sidebar,related,teaser")
+]
+
+
+def best_of(runs, func):
+    best = None
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = OptionParser(usage="%prog [options] [path ...]")
+    parser.add_option("-n", "--runs", type="int", default=3, help="best of N runs")
+    options, args = parser.parse_args()
+
+    print("%d configurations" % len(CONFIGS))
+    print("%-50s %10s %10s %8s %6s" % ("page", "docs ms", "sweep ms", "speedup", "same"))
+    totals = [0.0, 0.0]
+    for path in iter_paths(args or [os.path.join(ROOT, "tests", "samples")]):
+        with open(path, "rb") as f:
+            html = f.read()
+        separate, expected = best_of(
+            options.runs, lambda: [Document(html, **config).summary() for config in CONFIGS]
+        )
+        swept, results = best_of(options.runs, lambda: sweep(html, CONFIGS))
+        totals[0] += separate
+        totals[1] += swept
+        print("%-50s %10.1f %10.1f %7.2fx %6s" % (
+            os.path.basename(path)[-50:], separate * 1000, swept * 1000, separate / swept,
+            "yes" if expected == [result.summary for result in results] else "NO"))
+    print("%-50s %10.1f %10.1f %7.2fx" % ("total", totals[0] * 1000, totals[1] * 1000, totals[0] / totals[1]))
+
+
+if __name__ == "__main__":
+    main()
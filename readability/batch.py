@@ -0,0 +1,156 @@
+"""Extract many documents in one process (or a pool of them).
+
+Inputs are files, directories, glob patterns, newline-delimited path lists
+or JSONL records with ``html``/``url`` fields. Every document produces one
+JSON line on the output, written in input order as soon as it is ready.
+"""
+import glob
+import json
+import logging
+import os
+import stat
+import time
+from collections import deque
+from functools import partial
+
+from .readability import Document
+from .result import Result
+
+
+log = logging.getLogger("readability.batch")
+
+# lines written between flushes to a file
+FLUSH_EVERY = 100
+
+
+def iter_paths(patterns, stdin=None):
+    """Expands files, directories and glob patterns into file paths.
+
+    A pattern of ``-`` reads newline-delimited paths from `stdin`.
+    """
+    for pattern in patterns:
+        if pattern == "-":
+            for line in stdin:
+                line = line.strip()
+                if line:
+                    yield line
+        elif os.path.isdir(pattern):
+            for dirpath, dirnames, filenames in os.walk(pattern):
+                dirnames.sort()
+                for filename in sorted(filenames):
+                    yield os.path.join(dirpath, filename)
+        elif glob.has_magic(pattern):
+            yield from sorted(glob.iglob(pattern, recursive=True))
+        else:
+            yield pattern
+
+
+def iter_path_tasks(paths):
+    for path in paths:
+        yield {"source": path, "path": path}
+
+
+def iter_jsonl_tasks(lines):
+    """Turns JSONL records into tasks.
+
+    Each record has an ``html`` field (or a ``path`` to read it from), and
+    optionally ``url``, ``id`` and ``charset``. Broken lines become error
+    results instead of stopping the whole batch.
+    """
+    for lineno, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield {"source": "line %d" % lineno, "error": "bad record: %s" % e}
+            continue
+        task = {
+            "source": record.get("id", record.get("url") or "line %d" % lineno),
+            "url": record.get("url"),
+            "charset": record.get("charset"),
+        }
+        if "html" in record:
+            task["html"] = record["html"]
+        elif "path" in record:
+            task["path"] = record["path"]
+        else:
+            task["error"] = "record has neither html nor path"
+        yield task
+
+
+def extract(task, options=None):
+    """Runs one task and returns its Result."""
+    options = options or {}
+    if "error" in task:
+        return Result(source=task["source"], url=task.get("url"), error=task["error"])
+    started = time.perf_counter()
+    try:
+        if "path" in task:
+            # bytes, so that the declared/detected charset is honoured
+            with open(task["path"], "rb") as f:
+                html = f.read()
+        else:
+            html = task["html"]
+        doc = Document(
+            html, url=task.get("url"), encoding_hint=task.get("charset"), **options
+        )
+        result = doc.result()
+    except Exception as e:
+        log.debug("extraction of %s failed", task["source"], exc_info=True)
+        result = Result(url=task.get("url"), error="{}: {}".format(type(e).__name__, e), timings={})
+    result.source = task["source"]
+    result.timings["total"] = time.perf_counter() - started
+    return result
+
+
+def run(tasks, jobs=1, options=None):
+    """Yields results for `tasks` in order.
+
+    With ``jobs > 1`` the work is spread over a process pool. At most
+    ``2 * jobs`` tasks are in flight, so memory stays bounded however long
+    the input is.
+    """
+    func = partial(extract, options=options)
+    if jobs <= 1:
+        for task in tasks:
+            yield func(task)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    window = deque()
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        for task in tasks:
+            window.append(pool.submit(func, task))
+            if len(window) >= 2 * jobs:
+                yield window.popleft().result()
+        while window:
+            yield window.popleft().result()
+
+
+def _interactive(out):
+    """Whether someone reads `out` as it is written: a terminal or a pipe."""
+    try:
+        if out.isatty():
+            return True
+        return stat.S_ISFIFO(os.fstat(out.fileno()).st_mode)
+    except (AttributeError, OSError, ValueError):
+        return False
+
+
+def write_jsonl(results, out, flush_every=FLUSH_EVERY):
+    """Writes `results` as JSON lines, flushing every `flush_every` lines,
+    or after every line to a terminal or a pipe. Returns the line count."""
+    if _interactive(out):
+        flush_every = 1
+    count = 0
+    for result in results:
+        out.write(json.dumps(dict(result), ensure_ascii=False))
+        out.write("\n")
+        count += 1
+        if count % flush_every == 0:
+            out.flush()
+    out.flush()
+    return count
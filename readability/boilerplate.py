@@ -0,0 +1,150 @@
+"""Blocks which repeat over the pages of a site, used with
+Document(boilerplate=BoilerplateStore(...)).
+
+Navigation, footers and "related articles" boxes come back on every page of
+a site, and every time they get scored, measured and finally dropped in
+sanitize(). The store remembers, per host, the fingerprints (tags and text,
+see incremental.SubtreeStats) of the blocks of the pages it has seen, and
+once a block was seen on `min_pages` different pages it is dropped right
+after parsing, before the scoring starts.
+
+Pages only count once: a URL, or content already seen under another URL,
+is not learned from again, so reloading a page never makes its own article
+look like boilerplate. And no more than MAX_SHARE of the text of a page is
+ever dropped, for sites which serve about the same page under any URL.
+
+The store keeps at most `max_hosts` hosts and `max_blocks` blocks per host,
+and save() writes it to a JSON file which the next BoilerplateStore(path)
+loads.
+"""
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+from .incremental import SubtreeStats
+
+
+log = logging.getLogger("readability.boilerplate")
+
+VERSION = 1
+BLOCKS = frozenset(
+    ["div", "ul", "ol", "dl", "nav", "header", "footer", "aside", "section", "table", "form", "p"]
+)
+MAX_SHARE = 0.8
+MAX_PAGES = 256
+
+
+class HostBlocks:
+    """Block fingerprint -> number of pages, and the pages learned from."""
+
+    def __init__(self, blocks=(), pages=()):
+        self.blocks = OrderedDict(blocks)
+        self.pages = OrderedDict((page, True) for page in pages)
+
+    def seen(self, keys):
+        seen = any(key in self.pages for key in keys)
+        for key in keys:
+            self.pages[key] = True
+            self.pages.move_to_end(key)
+        while len(self.pages) > MAX_PAGES:
+            self.pages.popitem(last=False)
+        return seen
+
+    def learn(self, prints, max_blocks):
+        for fingerprint in prints:
+            self.blocks[fingerprint] = self.blocks.get(fingerprint, 0) + 1
+            self.blocks.move_to_end(fingerprint)
+        if len(self.blocks) > max_blocks:
+            # keep the more frequent half, the most recent first among equals
+            recent = list(self.blocks.items())[::-1]
+            keep = sorted(recent, key=lambda item: -item[1])[: max_blocks // 2]
+            keep = set(fingerprint for fingerprint, _ in keep)
+            for fingerprint in [f for f in self.blocks if f not in keep]:
+                del self.blocks[fingerprint]
+
+
+class BoilerplateStore:
+    """Per-host fingerprints of recurring blocks, see the module docstring."""
+
+    def __init__(self, path=None, min_pages=3, max_hosts=1000, max_blocks=2000):
+        self.path = path
+        self.min_pages = min_pages
+        self.max_hosts = max_hosts
+        self.max_blocks = max_blocks
+        self.hosts = OrderedDict()
+        self.lock = threading.Lock()
+        if path and os.path.exists(path):
+            self.load(path)
+
+    def load(self, path):
+        with open(path) as f:
+            data = json.load(f)
+        if data.get("version") != VERSION:
+            log.info("ignoring boilerplate store %s of another version", path)
+            return
+        for host, entry in data["hosts"]:
+            self.hosts[host] = HostBlocks(entry["blocks"], entry["pages"])
+
+    def save(self, path=None):
+        path = path or self.path
+        with self.lock:
+            data = {
+                "version": VERSION,
+                "hosts": [
+                    (host, {"blocks": list(entry.blocks.items()), "pages": list(entry.pages)})
+                    for host, entry in self.hosts.items()
+                ],
+            }
+        tmp = "%s.%d" % (path, os.getpid())
+        with open(tmp, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+
+    def _host(self, host):
+        entry = self.hosts.get(host)
+        if entry is None:
+            entry = self.hosts[host] = HostBlocks()
+            if len(self.hosts) > self.max_hosts:
+                self.hosts.popitem(last=False)
+        self.hosts.move_to_end(host)
+        return entry
+
+    def prune(self, doc, host, url=None):
+        """Learns the blocks of the parsed `doc` of `host`, then drops the
+        ones seen on enough pages. Returns the number of dropped blocks."""
+        body = doc.find("body")
+        if not host or body is None:
+            return 0
+        stats = SubtreeStats()
+        blocks = [
+            elem
+            for elem in body.iterdescendants()
+            if isinstance(elem.tag, str) and elem.tag in BLOCKS
+        ]
+        prints = [stats.fingerprint(elem).hex() for elem in blocks]
+        page_keys = [stats.fingerprint(body).hex()] + ([url] if url else [])
+        with self.lock:
+            entry = self._host(host)
+            if not entry.seen(page_keys):
+                entry.learn(set(prints), self.max_blocks)
+            counts = [entry.blocks.get(fingerprint, 0) for fingerprint in prints]
+
+        budget = None
+        dropped = set()
+        for elem, count in zip(blocks, counts):
+            if count < self.min_pages or any(a in dropped for a in elem.iterancestors()):
+                continue
+            if budget is None:
+                budget = len(body.text_content()) * MAX_SHARE
+            length = len(elem.text_content())
+            if length > budget:
+                continue
+            budget -= length
+            dropped.add(elem)
+        for elem in dropped:
+            elem.drop_tree()
+        if dropped:
+            log.debug("dropped %d boilerplate blocks of %s", len(dropped), host)
+        return len(dropped)
@@ -0,0 +1,179 @@
+"""How likely a page is an article, from a few cheap features.
+
+Index pages, search results, login walls and product listings go through
+the whole of summary(), often twice, only to give junk. With
+Document(..., article_threshold=0.5), summary() first scores the page and
+raises NotAnArticle when the score is below the threshold.
+
+The features are counted in one pass over the tree as parsed, before the
+cleaning which drops scripts (and JSON-LD with them):
+
+    paragraphs       number of <p>
+    long_paragraphs  <p> of at least LONG_PARAGRAPH characters
+    long_runs        runs of text of at least LONG_PARAGRAPH characters
+                     outside of links, wherever they are (<div>, <br>, ...)
+    paragraph_text   characters in <p>
+    run_text         characters in the long runs of text
+    text_length      characters in <body>
+    link_density     share of the text of <body> in links
+    article_tag      whether there is an <article>
+    og_type          the og:type <meta>, lowercased
+    schema_types     schema.org types, from itemtype and JSON-LD "@type"
+    password         whether there is a password field
+
+and weighed by article_score() into a confidence between 0 and 1.
+benchmarks/classify.py measures what a threshold saves and loses.
+"""
+import json
+import math
+import re
+
+
+LONG_PARAGRAPH = 80
+THRESHOLD = 0.5
+ARTICLE_TYPES = frozenset(
+    [
+        "article",
+        "newsarticle",
+        "blogposting",
+        "reportagenewsarticle",
+        "analysisnewsarticle",
+        "opinionnewsarticle",
+        "report",
+        "scholarlyarticle",
+        "techarticle",
+        "liveblogposting",
+        "recipe",
+    ]
+)
+# og:type "website" and schema.org WebSite are in neither: article pages
+# have them too
+OTHER_TYPES = frozenset(
+    [
+        "itemlist",
+        "searchresultspage",
+        "collectionpage",
+        "product",
+        "offer",
+        "profilepage",
+        "video.other",
+        "profile",
+        "product.item",
+        "product.group",
+    ]
+)
+NOT_TEXT = frozenset(["a", "script", "style", "noscript", "title", "head", "option"])
+RE_JSON_LD_TYPE = re.compile(r'"@type"\s*:\s*(\[[^\]]*\]|"[^"]*")')
+
+
+def _schema_type(value):
+    # "http://schema.org/NewsArticle" -> "newsarticle"
+    return value.strip().rstrip("/").rsplit("/", 1)[-1].lower()
+
+
+def article_features(doc):
+    """Returns the features of the (uncleaned) tree `doc`."""
+    try:
+        doc = doc.getroot()
+    except AttributeError:
+        pass
+    features = {
+        "paragraphs": 0,
+        "long_paragraphs": 0,
+        "long_runs": 0,
+        "paragraph_text": 0,
+        "run_text": 0,
+        "text_length": 0,
+        "link_density": 0.0,
+        "article_tag": False,
+        "og_type": None,
+        "schema_types": [],
+        "password": False,
+    }
+    types = []
+    link_length = 0
+    body = None
+    for elem in doc.iter():
+        tag = elem.tag
+        if not isinstance(tag, str):
+            continue
+        if tag not in NOT_TEXT and elem.text:
+            length = len(elem.text.strip())
+            if length >= LONG_PARAGRAPH:
+                features["long_runs"] += 1
+                features["run_text"] += length
+        if elem.tail:
+            length = len(elem.tail.strip())
+            parent = elem.getparent()
+            if length >= LONG_PARAGRAPH and parent is not None and parent.tag not in NOT_TEXT:
+                features["long_runs"] += 1
+                features["run_text"] += length
+        if tag == "p":
+            length = len(elem.text_content().strip())
+            features["paragraphs"] += 1
+            features["paragraph_text"] += length
+            if length >= LONG_PARAGRAPH:
+                features["long_paragraphs"] += 1
+        elif tag == "a":
+            link_length += len(elem.text_content())
+        elif tag == "article":
+            features["article_tag"] = True
+        elif tag == "body":
+            body = elem
+        elif tag == "meta":
+            if elem.get("property", elem.get("name", "")).lower() == "og:type":
+                features["og_type"] = (elem.get("content") or "").strip().lower() or None
+        elif tag == "input":
+            if (elem.get("type") or "").lower() == "password":
+                features["password"] = True
+        elif tag == "script" and "ld+json" in (elem.get("type") or "") and elem.text:
+            for match in RE_JSON_LD_TYPE.finditer(elem.text):
+                try:
+                    value = json.loads(match.group(1))
+                except ValueError:
+                    continue
+                types.extend(value if isinstance(value, list) else [value])
+        itemtype = elem.get("itemtype")
+        if itemtype:
+            types.extend(itemtype.split())
+    if body is not None:
+        features["text_length"] = len(body.text_content())
+        features["link_density"] = min(1.0, link_length / max(features["text_length"], 1))
+    features["schema_types"] = sorted(set(_schema_type(t) for t in types if isinstance(t, str)))
+    return features
+
+
+def article_score(features):
+    """Returns the confidence, between 0 and 1, that a page with these
+    features is an article."""
+    blocks = max(features["long_paragraphs"], features["long_runs"])
+    text = max(features["paragraph_text"], features["run_text"])
+    score = -3.0
+    score += 0.5 * min(blocks, 6)
+    score += 1.5 * min(text / 2000.0, 1.5)
+    score -= 5.0 * features["link_density"]
+    score += 1.0 if features["article_tag"] else 0.0
+    og_type = features["og_type"]
+    if og_type in ARTICLE_TYPES:
+        score += 2.0
+    elif og_type in OTHER_TYPES:
+        score -= 1.5
+    types = set(features["schema_types"])
+    if types & ARTICLE_TYPES:
+        score += 2.0
+    elif types & OTHER_TYPES:
+        score -= 1.5
+    if features["password"]:
+        score -= 2.0
+    return 1.0 / (1.0 + math.exp(-score))
+
+
+def classify(input, encoding_hint=None, parser=None):
+    """Returns the article_score() and the features of a page (as taken by
+    Document), parsing it."""
+    from .htmls import build_doc
+
+    if isinstance(input, (str, bytes)):
+        input, _ = build_doc(input, encoding_hint, parser=parser)
+    features = article_features(input)
+    return article_score(features), features
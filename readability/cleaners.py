@@ -1,30 +1,41 @@
 # strip out a set of nuisance html attributes that can mess up rendering in RSS feeds
 import re
-try:
-    from lxml.html.clean import Cleaner
-except ImportError:
-    from lxml_html_clean import Cleaner
+from urllib.parse import unquote_plus
+
+from lxml import etree
+from lxml.html import defs
 
 bad_attrs = ["width", "height", "style", "[-a-z]*color", "background[-a-z]*", "on*"]
-single_quoted = "'[^']+'"
-double_quoted = '"[^"]+"'
-non_space = "[^ \"'>]+"
-htmlstrip = re.compile(
-    "<"  # open
-    "([^>]+) "  # prefix
-    "(?:%s) *" % ("|".join(bad_attrs),)
-    + "= *(?:%s|%s|%s)"  # undesirable attributes
-    % (non_space, single_quoted, double_quoted)
-    + "([^>]*)"  # value  # postfix
-    ">",  # end
-    re.I,
+bad_attr = re.compile("(?:%s)$" % "|".join(bad_attrs), re.I)
+# Tags are matched one at a time and never across a "<", and the attributes
+# of a tag in a single pass, so that the time is linear in the input even
+# for unclosed tags or tags with thousands of attributes.
+tag_attributes = re.compile(r"<([^\s<>]+)(\s[^<>]*)>")
+attribute = re.compile(
+    r"""(\s+)([^\s"'<>/=]+)(?:(\s*=\s*)("[^"]*"|'[^']*'|[^\s"'<>]*))?"""
 )
 
 
+def _strip_attribute(match):
+    space, name, equals, value = match.groups()
+    if (
+        equals
+        and space[-1] == " "
+        and equals.strip(" ") == "="
+        and value not in ("", '""', "''")
+        and bad_attr.match(name)
+    ):
+        return ""
+    return match.group()
+
+
+def _strip_attributes(match):
+    return "<%s%s>" % (match.group(1), attribute.sub(_strip_attribute, match.group(2)))
+
+
 def clean_attributes(html):
-    while htmlstrip.search(html):
-        html = htmlstrip.sub("<\\1\\2>", html)
-    return html
+    """Removes the bad_attrs (with a non-empty value) from all tags."""
+    return tag_attributes.sub(_strip_attributes, html)
 
 
 def normalize_spaces(s):
@@ -35,21 +46,144 @@ def normalize_spaces(s):
     return " ".join(s.split())
 
 
-html_cleaner = Cleaner(
-    scripts=True,
-    javascript=True,
-    comments=True,
-    style=True,
-    links=True,
-    meta=False,
-    add_nofollow=False,
-    page_structure=False,
-    processing_instructions=True,
-    embedded=False,
-    frames=False,
-    forms=False,
-    annoying_tags=False,
-    remove_tags=None,
-    remove_unknown_tags=False,
-    safe_attrs_only=False,
-)
+_html_cleaner = None
+
+
+def get_html_cleaner():
+    """Returns the Cleaner configured like clean_tree(), built on first use
+    (importing lxml_html_clean takes a while)."""
+    global _html_cleaner
+    if _html_cleaner is None:
+        try:
+            from lxml.html.clean import Cleaner
+        except ImportError:
+            from lxml_html_clean import Cleaner
+
+        _html_cleaner = Cleaner(
+            scripts=True,
+            javascript=True,
+            comments=True,
+            style=True,
+            links=True,
+            meta=False,
+            add_nofollow=False,
+            page_structure=False,
+            processing_instructions=True,
+            embedded=False,
+            frames=False,
+            forms=False,
+            annoying_tags=False,
+            remove_tags=None,
+            remove_unknown_tags=False,
+            safe_attrs_only=False,
+        )
+    return _html_cleaner
+
+
+def __getattr__(name):
+    # `html_cleaner` used to be built at import time
+    if name == "html_cleaner":
+        return get_html_cleaner()
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+
+# What html_cleaner removes, see clean_tree() below.
+KILL_TAGS = {"script", "style", "link", etree.Comment, etree.ProcessingInstruction}
+LINK_ATTRS = frozenset(defs.link_attrs)
+# Links in these attributes are found by lxml's iterlinks() with special rules
+SPECIAL_LINK_ATTRS = {
+    "object": ("codebase", "classid", "data", "archive"),
+    "meta": ("content",),
+    "param": ("value",),
+}
+
+
+# The javascript: link check of lxml's Cleaner. Spaces and control
+# characters are ignored ("java script:" works in some browsers), and
+# data: URLs are fine for images other than SVG.
+RE_LINK_NOISE = re.compile(r"[\s\x00-\x08\x0B\x0C\x0E-\x19]+")
+RE_SCRIPT_SCHEME = re.compile(r"(javascript|jscript|livescript|vbscript|data|about|mocha):", re.I)
+RE_DATA_IMAGE = re.compile(r"data:image/(.+?);base64,", re.I)
+RE_SCRIPT_IMAGE = re.compile(r"xml|svg", re.I)
+
+
+def _remove_javascript_link(link):
+    # only links with a (maybe %-escaped) scheme can be javascript: ones
+    if ":" not in link and "%" not in link:
+        return link
+    url = RE_LINK_NOISE.sub("", unquote_plus(link))
+    images = RE_DATA_IMAGE.findall(url)
+    if any(RE_SCRIPT_IMAGE.search(image) for image in images):
+        return ""
+    if len(RE_SCRIPT_SCHEME.findall(url)) > len(images):
+        return ""
+    return link
+
+
+def _rewrite_special_links(el, names):
+    # the loop of HtmlMixin.rewrite_links(), for the links of `el` only
+    for link_el, attrib, link, pos in el.iterlinks():
+        if link_el is not el or attrib not in names:
+            continue
+        new_link = _remove_javascript_link(link.strip())
+        if new_link == link:
+            continue
+        cur = el.get(attrib)
+        if not pos and len(cur) == len(link):
+            new = new_link
+        else:
+            new = cur[:pos] + new_link + cur[pos + len(link):]
+        el.set(attrib, new)
+
+
+def clean_tree(doc):
+    """Cleans `doc` in place, like ``html_cleaner(doc)`` does.
+
+    lxml's Cleaner walks the whole tree once per kind of cleanup (event
+    handlers, javascript: links, style attributes, killed tags). Here all of
+    them are done in a single traversal, and comments and processing
+    instructions are usually gone already, because build_doc() does not
+    create them in the first place.
+    """
+    try:
+        doc = doc.getroot()
+    except AttributeError:
+        pass  # Element instance
+    kill = []
+    for el in doc.iter():
+        tag = el.tag
+        if tag in KILL_TAGS:
+            kill.append(el)
+            continue
+        if not isinstance(tag, str):
+            continue  # entities
+        if tag == "image":
+            el.tag = tag = "img"
+        attrib = el.attrib
+        if not attrib:
+            continue
+        check_links = tag != "object"
+        for name in attrib.keys():
+            if name.startswith("on") or name == "style":
+                del attrib[name]
+            elif check_links and name in LINK_ATTRS:
+                link = attrib[name]
+                new_link = _remove_javascript_link(link.strip())
+                if new_link != link:
+                    attrib[name] = new_link
+        if tag in SPECIAL_LINK_ATTRS and (
+            tag == "object"
+            or attrib.get("http-equiv", "").lower() == "refresh"
+            or (attrib.get("valuetype") or "").lower() == "ref"
+        ):
+            _rewrite_special_links(el, SPECIAL_LINK_ATTRS[tag])
+
+    if kill and kill[0] is doc:
+        # the root can't be dropped, so it is emptied instead
+        el = kill.pop(0)
+        if el.tag != "html":
+            el.tag = "div"
+        el.clear()
+    for el in kill:
+        el.drop_tree()
+    return doc
@@ -1,13 +1,15 @@
 import re
-try:
-    import cchardet as chardet
-except ImportError:
-    import chardet
+from collections import OrderedDict
 
 
-RE_CHARSET = re.compile(r'<meta.*?charset=["\']*(.+?)["\'>]', flags=re.I)
-RE_PRAGMA = re.compile(r'<meta.*?content=["\']*;?charset=(.+?)["\'>]', flags=re.I)
-RE_XML = re.compile(r'^<\?xml.*?encoding=["\']*(.+?)["\'>]')
+# None of these may run past the end of a tag: with ".*?" every <meta> was
+# searched up to the end of its line, and spam pages have megabyte lines.
+RE_CHARSET = re.compile(br'<meta[^<>]*?charset=["\']*([^"\'<>]+)["\'>]', flags=re.I)
+RE_PRAGMA = re.compile(br'<meta[^<>]*?content=["\']*;?charset=([^"\'<>]+)["\'>]', flags=re.I)
+RE_XML = re.compile(br'^<\?xml[^<>]*?encoding=["\']*([^"\'<>]+)["\'>]')
+# Tags and the whitespace around them. Matches only start where a
+# whitespace run or a tag starts, which keeps long runs from backtracking.
+RE_TAGS = re.compile(br'(?<!\s)\s*(?:</?[^<>]*>\s*)+')
 
 CHARSETS = {
     "big5": "big5hkscs",
@@ -19,6 +21,111 @@ CHARSETS = {
     "windows-1251": "cp1251",
 }
 
+# Pages without a usable declared charset are detected from at most
+# SAMPLE_WINDOWS windows of SAMPLE_SIZE bytes, spread over the page.
+SAMPLE_SIZE = 16 * 1024
+SAMPLE_WINDOWS = 4
+# Detection stops after the first window when the detector is this sure
+# (of something else than ascii)
+EARLY_STOP_CONFIDENCE = 0.95
+# and the encoding cached for the host of a page is used unless the first
+# window makes the detector this sure of another one
+CACHED_CONFIDENCE = 0.8
+
+
+def _load_cchardet():
+    import cchardet
+
+    return cchardet.detect
+
+
+def _load_chardet():
+    import chardet
+
+    return chardet.detect
+
+
+def _load_charset_normalizer():
+    import charset_normalizer
+
+    return charset_normalizer.detect
+
+
+# name -> function returning a chardet-like detect(bytes) function, which
+# returns {"encoding": ..., "confidence": ...}. Loaders raise ImportError
+# when their library is not installed.
+DETECTORS = {
+    "cchardet": _load_cchardet,
+    "chardet": _load_chardet,
+    "charset_normalizer": _load_charset_normalizer,
+}
+# tried in this order when no detector is asked for
+DETECTOR_ORDER = ["cchardet", "chardet", "charset_normalizer"]
+
+_loaded_detectors = {}
+
+
+def register_detector(name, loader, first=False):
+    """Adds a detector backend, preferred to the others if `first` is set."""
+    DETECTORS[name] = loader
+    _loaded_detectors.pop(name, None)
+    if name in DETECTOR_ORDER:
+        DETECTOR_ORDER.remove(name)
+    if first:
+        DETECTOR_ORDER.insert(0, name)
+    else:
+        DETECTOR_ORDER.append(name)
+
+
+def get_detector(name=None):
+    """Returns the detect function of backend `name`, or of the first
+    installed one. Raises ImportError when there is none."""
+    if name and name not in DETECTORS:
+        raise ValueError("unknown charset detector: %r" % (name,))
+    names = [name] if name else DETECTOR_ORDER
+    for name in names:
+        if name not in _loaded_detectors:
+            try:
+                _loaded_detectors[name] = DETECTORS[name]()
+            except ImportError:
+                _loaded_detectors[name] = None
+        if _loaded_detectors[name] is not None:
+            return _loaded_detectors[name]
+    raise ImportError("no charset detector available (tried %s)" % ", ".join(names))
+
+
+def detect(text, detector=None):
+    return get_detector(detector)(text)
+
+
+class EncodingCache:
+    """Encodings detected for the most recently seen `size` hosts, for
+    get_encoding(cache=...) and Document(encoding_cache=...).
+
+    Pages of a site usually share their encoding, so a page of an already
+    seen host which decodes with its encoding is only checked against the
+    first window of text instead of all of them.
+    """
+
+    def __init__(self, size=1024):
+        self.size = size
+        self.encodings = OrderedDict()
+
+    def get(self, host):
+        encoding = self.encodings.get(host)
+        if encoding is not None:
+            self.encodings.move_to_end(host)
+        return encoding
+
+    def put(self, host, encoding):
+        self.encodings[host] = encoding
+        self.encodings.move_to_end(host)
+        if len(self.encodings) > self.size:
+            self.encodings.popitem(last=False)
+
+    def clear(self):
+        self.encodings.clear()
+
 
 def fix_charset(encoding):
     """Overrides encoding when charset declaration
@@ -28,37 +135,118 @@ def fix_charset(encoding):
     return CHARSETS.get(encoding, encoding)
 
 
-def get_encoding(page):
+def iter_samples(page, size=SAMPLE_SIZE, windows=SAMPLE_WINDOWS):
+    """Yields the text (tags stripped) of windows spread over `page`.
+
+    Windows are cut at tag boundaries, which also keeps multi-byte
+    characters whole. Pages shorter than all windows are yielded whole.
+    """
+    if len(page) <= size * windows:
+        yield RE_TAGS.sub(b" ", page)
+        return
+    step = (len(page) - size) // (windows - 1)
+    for i in range(windows):
+        start = i * step
+        end = start + size
+        if i:
+            start = page.find(b">", start, end) + 1 or start
+        if i < windows - 1:
+            cut = page.rfind(b"<", start, end)
+            if cut > start:
+                end = cut
+        yield RE_TAGS.sub(b" ", page[start:end])
+
+
+def _confident(res, confidence):
+    return bool(
+        res["encoding"]
+        and res["encoding"].lower() != "ascii"
+        and (res["confidence"] or 0) >= confidence
+    )
+
+
+def detect_encoding(page, detector=None, first_only=False):
+    """Detects the encoding of `page` from samples of its text.
+
+    Returns None when there is too little text to guess from, or with
+    `first_only`, when the detector is less than CACHED_CONFIDENCE sure of
+    the first window.
+    """
+    detect = get_detector(detector)
+    samples = list(iter_samples(page))
+    text = b""
+    res = None
+    for i, sample in enumerate(samples, 1):
+        text = (text + b" " + sample).strip()
+        # the first window alone may do, otherwise all of them are used
+        if len(text) < 10 or 1 < i < len(samples):
+            continue
+        res = detect(text)
+        if first_only:
+            return fix_charset(res["encoding"]) if _confident(res, CACHED_CONFIDENCE) else None
+        if _confident(res, EARLY_STOP_CONFIDENCE):
+            break
+    if res is None:
+        return None
+    # print '->', res["encoding"], "%.2f" % res['confidence']
+    return fix_charset(res["encoding"] or "utf-8")
+
+
+def _decodes(page, encoding):
+    try:
+        page.decode(encoding)
+        return True
+    except (UnicodeDecodeError, LookupError):
+        return False
+
+
+def get_encoding(page, hint=None, host=None, detector=None, cache=None):
+    """Guesses the encoding of the `page` bytes.
+
+    `hint` is a charset declared outside of the page, for example in the
+    HTTP Content-Type header. Like in browsers, it wins over the declarations
+    found in the page itself, as long as the page decodes with it.
+
+    When nothing usable is declared, the encoding is detected with the
+    `detector` backend (see DETECTORS). With an EncodingCache as `cache`,
+    it is remembered for `host`, and used for the next pages of the host
+    unless the first window of their text makes the detector sure of
+    another one.
+    """
     # Regex for XML and HTML Meta charset declaration
     declared_encodings = (
         RE_CHARSET.findall(page) + RE_PRAGMA.findall(page) + RE_XML.findall(page)
     )
+    if hint:
+        declared_encodings.insert(0, hint.encode("ascii", "replace"))
 
     # Try any declared encodings
     for declared_encoding in declared_encodings:
-        try:
-            # Python3 only
-            # declared_encoding will actually be bytes but .decode() only
-            # accepts `str` type. Decode blindly with ascii because no one should
-            # ever use non-ascii characters in the name of an encoding.
-            declared_encoding = declared_encoding.decode("ascii", "replace")
-
-            encoding = fix_charset(declared_encoding)
-            # Now let's decode the page
-            page.decode(encoding)
+        # declared_encoding will actually be bytes but .decode() only
+        # accepts `str` type. Decode blindly with ascii because no one should
+        # ever use non-ascii characters in the name of an encoding.
+        encoding = fix_charset(declared_encoding.decode("ascii", "replace"))
+        # Now let's decode the page
+        if _decodes(page, encoding):
             # It worked!
             return encoding
-        except UnicodeDecodeError:
-            pass
-
-    # Fallback to chardet if declared encodings fail
-    # Remove all HTML tags, and leave only text for chardet
-    text = re.sub(r'(\s*</?[^>]*>)+\s*', ' ', page).strip()
-    enc = 'utf-8'
-    if len(text) < 10:
-        return enc  # can't guess
-    res = chardet.detect(text)
-    enc = res["encoding"] or "utf-8"
-    # print '->', enc, "%.2f" % res['confidence']
-    enc = fix_charset(enc)
-    return enc
+
+    cached = cache.get(host) if host and cache is not None else None
+    if cached and _decodes(page, cached):
+        # single-byte encodings decode anything, so don't let them win
+        # over utf-8 on a page which really is utf-8, nor over what the
+        # detector is sure of
+        if cached == "utf-8" or page.isascii() or not _decodes(page, "utf-8"):
+            encoding = detect_encoding(page, detector, first_only=True)
+            if encoding is None or encoding == cached:
+                return cached
+            cache.put(host, encoding)
+            return encoding
+
+    # Fallback to detection if declared encodings fail
+    encoding = detect_encoding(page, detector)
+    if encoding is None:
+        return "utf-8"  # can't guess
+    if host and cache is not None:
+        cache.put(host, encoding)
+    return encoding
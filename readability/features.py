@@ -0,0 +1,125 @@
+"""Per-candidate features of the scoring pass, as columns.
+
+With Document(..., features=True), score_paragraphs() keeps what it
+measured about each candidate, and Document.features() returns it as a
+FeatureTable: one row per candidate, in scoring order, with the columns
+
+    doc            index of the document in a batch (0 for a single one)
+    tag, depth     tag name, number of ancestors
+    text_length    length of the normalized text (raw text with profile="fast")
+    commas         number of commas in the text
+    link_density   share of the text in links
+    class_weight   class_weight() of the candidate
+    content_score  the final score, as used to pick the best candidate
+    parent         row of the parent candidate, or -1
+    path           xpath of the candidate (in the original document with
+                   xpath="map", or None for the elements created during the
+                   extraction; in the scored tree otherwise)
+
+Numeric columns are array.array, strings lists; to_numpy() and to_arrow()
+convert when numpy or pyarrow are installed.
+"""
+from array import array
+
+
+COLUMNS = (
+    ("doc", "q"),
+    ("tag", None),
+    ("depth", "q"),
+    ("text_length", "q"),
+    ("commas", "q"),
+    ("link_density", "d"),
+    ("class_weight", "q"),
+    ("content_score", "d"),
+    ("parent", "q"),
+    ("path", None),
+)
+
+
+class FeatureTable:
+    """Columns of candidate features, see the module docstring."""
+
+    def __init__(self):
+        self.columns = {name: array(code) if code else [] for name, code in COLUMNS}
+
+    def __len__(self):
+        return len(self.columns["tag"])
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def keys(self):
+        return [name for name, _ in COLUMNS]
+
+    def rows(self):
+        """Yields the rows as dicts, mostly for debugging."""
+        names = self.keys()
+        for values in zip(*(self.columns[name] for name in names)):
+            yield dict(zip(names, values))
+
+    def extend(self, other, doc=None):
+        """Appends the rows of `other`, as document `doc` if given."""
+        offset = len(self)
+        for name, _ in COLUMNS:
+            if name == "parent":
+                self.columns[name].extend(i + offset if i >= 0 else i for i in other[name])
+            elif name == "doc" and doc is not None:
+                self.columns[name].extend([doc] * len(other))
+            else:
+                self.columns[name].extend(other[name])
+
+    def to_numpy(self):
+        """Returns a dict of numpy arrays (str columns as unicode arrays)."""
+        import numpy as np
+
+        return {name: np.array(self.columns[name]) for name, _ in COLUMNS}
+
+    def to_arrow(self):
+        """Returns a pyarrow Table."""
+        import pyarrow as pa
+
+        return pa.table({name: pa.array(self.columns[name]) for name, _ in COLUMNS})
+
+
+def record(doc, ordered, candidates, measured):
+    """Builds the FeatureTable of `ordered` candidates from the
+    (link density, text length, commas) measured for them."""
+    table = FeatureTable()
+    columns = table.columns
+    rows = {elem: i for i, elem in enumerate(ordered)}
+    tree = ordered[0].getroottree() if ordered else None
+    for elem in ordered:
+        link_density, length, commas = measured[elem]
+        columns["doc"].append(0)
+        columns["tag"].append(elem.tag)
+        columns["depth"].append(sum(1 for _ in elem.iterancestors()))
+        columns["text_length"].append(length)
+        columns["commas"].append(commas)
+        columns["link_density"].append(link_density)
+        columns["class_weight"].append(doc.class_weight(elem))
+        columns["content_score"].append(candidates[elem]["content_score"])
+        columns["parent"].append(rows.get(elem.getparent(), -1))
+        # one column, one kind of paths
+        if doc._node_paths is not None:
+            columns["path"].append(doc._node_paths.path(elem))
+        else:
+            columns["path"].append(tree.getpath(elem))
+    return table
+
+
+def extract_features(inputs, summary=False, **options):
+    """Returns the features of many documents in one FeatureTable.
+
+    `inputs` are what Document takes; `options` are passed to each Document.
+    Only the scoring pass runs, unless `summary` is set, in which case the
+    features are those of the pass which produced the summary.
+    """
+    from .readability import Document
+
+    table = FeatureTable()
+    for i, input in enumerate(inputs):
+        doc = Document(input, features=True, **options)
+        if summary:
+            doc.summary()
+        table.extend(doc.features(), i)
+    return table
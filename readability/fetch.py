@@ -0,0 +1,256 @@
+"""Fetching pages for URL-mode extraction.
+
+Fetcher keeps HTTP connections alive between requests to a host, asks for
+and decodes gzip/deflate, and passes the charset of the Content-Type header
+on as the encoding hint. With a cache directory, responses are stored with
+their ETag/Last-Modified and revalidated with conditional requests; when a
+page did not change (304), extract_url() also reuses the stored Result
+instead of extracting again.
+"""
+import hashlib
+import http.client
+import json
+import logging
+import os
+import threading
+import zlib
+from urllib.parse import urljoin
+from urllib.parse import urlsplit
+
+from .readability import Document
+from .result import Result
+
+
+log = logging.getLogger("readability.fetch")
+
+TIMEOUT = 30.0
+MAX_IDLE = 4
+MAX_REDIRECTS = 5
+USER_AGENT = "Mozilla/5.0"
+REDIRECTS = (301, 302, 303, 307, 308)
+
+
+class FetchError(IOError):
+    pass
+
+
+class Response:
+    """A fetched page. `body` is decoded from its Content-Encoding, and
+    `not_modified` is set when it came from the cache after a 304."""
+
+    __slots__ = ("url", "status", "body", "charset", "etag", "last_modified", "not_modified")
+
+    def __init__(
+        self, url, status, body, charset=None, etag=None, last_modified=None, not_modified=False
+    ):
+        self.url = url
+        self.status = status
+        self.body = body
+        self.charset = charset
+        self.etag = etag
+        self.last_modified = last_modified
+        self.not_modified = not_modified
+
+    def __repr__(self):
+        return "<Response %s %s>" % (self.status, self.url)
+
+
+def decode_body(body, encoding):
+    encoding = (encoding or "identity").strip().lower()
+    if encoding in ("gzip", "x-gzip"):
+        return zlib.decompress(body, 16 + zlib.MAX_WBITS)
+    if encoding == "deflate":
+        # servers send both zlib-wrapped and raw deflate streams
+        try:
+            return zlib.decompress(body)
+        except zlib.error:
+            return zlib.decompress(body, -zlib.MAX_WBITS)
+    return body
+
+
+class ConnectionPool:
+    """Idle keep-alive connections, at most `max_idle` per host."""
+
+    def __init__(self, timeout=TIMEOUT, max_idle=MAX_IDLE):
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.idle = {}
+        self.lock = threading.Lock()
+
+    def get(self, scheme, netloc):
+        """Returns a connection and whether it was used before."""
+        with self.lock:
+            idle = self.idle.get((scheme, netloc))
+            if idle:
+                return idle.pop(), True
+        if scheme == "https":
+            return http.client.HTTPSConnection(netloc, timeout=self.timeout), False
+        return http.client.HTTPConnection(netloc, timeout=self.timeout), False
+
+    def put(self, scheme, netloc, connection):
+        with self.lock:
+            idle = self.idle.setdefault((scheme, netloc), [])
+            if len(idle) < self.max_idle:
+                idle.append(connection)
+                return
+        connection.close()
+
+    def close(self):
+        with self.lock:
+            for idle in self.idle.values():
+                for connection in idle:
+                    connection.close()
+            self.idle.clear()
+
+
+class ResponseCache:
+    """Responses and extraction results, stored as files in `directory`."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key, suffix):
+        return os.path.join(self.directory, hashlib.sha1(key.encode("utf-8")).hexdigest() + suffix)
+
+    def _write(self, path, data):
+        tmp = "%s.%d.%d" % (path, os.getpid(), threading.get_ident())
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def _read(self, path):
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def get(self, url):
+        meta = self._read(self._path(url, ".json"))
+        body = self._read(self._path(url, ".body"))
+        if meta is None or body is None:
+            return None
+        meta = json.loads(meta)
+        return Response(
+            meta["url"], 200, body, meta["charset"], meta["etag"], meta["last_modified"]
+        )
+
+    def put(self, url, response):
+        self._write(self._path(url, ".body"), response.body)
+        meta = {
+            "url": response.url,
+            "charset": response.charset,
+            "etag": response.etag,
+            "last_modified": response.last_modified,
+        }
+        self._write(self._path(url, ".json"), json.dumps(meta).encode("utf-8"))
+
+    def get_result(self, url, options_key):
+        data = self._read(self._path(url + "\0" + options_key, ".result"))
+        return None if data is None else Result.from_bytes(data)
+
+    def put_result(self, url, options_key, result):
+        self._write(self._path(url + "\0" + options_key, ".result"), result.to_bytes())
+
+
+class Fetcher:
+    """Fetches pages over pooled keep-alive connections, revalidating the
+    ones in `cache_dir` if given. Calling it is fetch(), so it can be the
+    fetcher of pagination.assemble()."""
+
+    def __init__(self, cache_dir=None, timeout=TIMEOUT, max_idle=MAX_IDLE, user_agent=USER_AGENT):
+        self.pool = ConnectionPool(timeout, max_idle)
+        self.cache = ResponseCache(cache_dir) if cache_dir else None
+        self.user_agent = user_agent
+
+    def __call__(self, url):
+        return self.fetch(url)
+
+    def close(self):
+        self.pool.close()
+
+    def _request(self, url, headers):
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https"):
+            raise FetchError("not an HTTP URL: %s" % url)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        while True:
+            connection, reused = self.pool.get(parts.scheme, parts.netloc)
+            try:
+                connection.request("GET", path, headers=headers)
+                response = connection.getresponse()
+                body = response.read()
+            except (http.client.RemoteDisconnected, ConnectionError, BrokenPipeError):
+                connection.close()
+                if reused:
+                    # the server closed the idle connection, try a new one
+                    continue
+                raise
+            except Exception:
+                connection.close()
+                raise
+            if response.will_close:
+                connection.close()
+            else:
+                self.pool.put(parts.scheme, parts.netloc, connection)
+            return response, body
+
+    def fetch(self, url):
+        cached = self.cache.get(url) if self.cache else None
+        headers = {"User-Agent": self.user_agent, "Accept-Encoding": "gzip, deflate"}
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+        location = url
+        for _ in range(MAX_REDIRECTS + 1):
+            response, body = self._request(location, headers)
+            if response.status not in REDIRECTS or not response.getheader("Location"):
+                break
+            location = urljoin(location, response.getheader("Location"))
+        else:
+            raise FetchError("too many redirects: %s" % url)
+
+        if response.status == 304 and cached is not None:
+            cached.not_modified = True
+            return cached
+        if response.status != 200:
+            raise FetchError("HTTP %d: %s" % (response.status, location))
+        result = Response(
+            location,
+            response.status,
+            decode_body(body, response.getheader("Content-Encoding")),
+            response.msg.get_content_charset(),
+            response.getheader("ETag"),
+            response.getheader("Last-Modified"),
+        )
+        if self.cache is not None and (result.etag or result.last_modified):
+            self.cache.put(url, result)
+        return result
+
+
+def extract_url(url, fetcher=None, html_partial=False, **options):
+    """Fetches and extracts `url`, returning a Result.
+
+    When the page is unchanged since the last time (a 304 from the server,
+    with a cache), the Result stored then is returned as is.
+    """
+    fetcher = fetcher or Fetcher()
+    response = fetcher.fetch(url)
+    cache = fetcher.cache
+    options_key = repr(sorted(options.items())) + repr(html_partial)
+    if response.not_modified and cache is not None:
+        result = cache.get_result(url, options_key)
+        if result is not None:
+            log.debug("%s not modified, reusing its extraction", url)
+            return result
+    doc = Document(response.body, url=response.url, encoding_hint=response.charset, **options)
+    result = doc.result(html_partial)
+    result.source = url
+    if cache is not None:
+        cache.put_result(url, options_key, result)
+    return result
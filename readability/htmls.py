@@ -1,26 +1,319 @@
+from array import array
+from itertools import islice
+from lxml import etree
 from lxml.html import tostring
+from urllib.parse import urljoin
 import lxml.html
 import re
 
+from .cleaners import attribute
 from .cleaners import normalize_spaces, clean_attributes
 from .encoding import get_encoding
 
-utf8_parser = lxml.html.HTMLParser(encoding="utf-8")
+# Comments and processing instructions are removed by the cleaner anyway,
+# so they are not even built.
+PARSER_OPTIONS = {"encoding": "utf-8", "remove_comments": True, "remove_pis": True}
+utf8_parser = lxml.html.HTMLParser(**PARSER_OPTIONS)
 
 
-def build_doc(page):
-    if isinstance(page, str):
-        encoding = None
-        decoded_page = page
-    else:
-        encoding = get_encoding(page) or "utf-8"
-        decoded_page = page.decode(encoding, "replace")
+# libxml2 compares every attribute of a tag with all the ones before it, so
+# a tag with a huge attribute list takes quadratic time to parse. Only tags
+# long enough to have that many attributes are looked at.
+MAX_ATTRIBUTES = 1000
+RE_LONG_TAG = re.compile(r"<[a-zA-Z][^\s<>/]*(\s[^<>]{%d,})" % (2 * MAX_ATTRIBUTES))
+
+
+def _limit_attributes(match):
+    attributes = match.group(1)
+    found = attribute.finditer(attributes)
+    for last in islice(found, MAX_ATTRIBUTES - 1, MAX_ATTRIBUTES):
+        if next(found, None) is not None:
+            cut = last.end() - len(attributes)
+            return match.group()[:cut]
+    return match.group()
+
+
+def limit_attributes(page):
+    """Keeps only the first MAX_ATTRIBUTES attributes of every tag."""
+    return RE_LONG_TAG.sub(_limit_attributes, page)
 
+
+def decode_page(page, hint=None, host=None, cache=None):
+    encoding = None
+    if not isinstance(page, str):
+        encoding = get_encoding(page, hint, host, cache=cache) or "utf-8"
+        page = page.decode(encoding, "replace")
+    return limit_attributes(page), encoding
+
+
+def _parse_lxml(page):
     # XXX: we have to do .decode and .encode even for utf-8 pages to remove bad characters
-    doc = lxml.html.document_fromstring(
-        decoded_page.encode("utf-8", "replace"), parser=utf8_parser
-    )
-    return doc, encoding
+    return lxml.html.document_fromstring(page.encode("utf-8", "replace"), parser=utf8_parser)
+
+
+def _local_name(tag):
+    return tag.rsplit("}", 1)[-1]
+
+
+def to_html_tree(root):
+    """Copies an lxml.etree tree (like html5lib builds) into lxml.html
+    elements, without namespaces, comments and processing instructions."""
+    new_root = utf8_parser.makeelement(_local_name(root.tag), dict(root.attrib))
+    new_root.text = root.text
+    stack = [(root, new_root)]
+    while stack:
+        source, target = stack.pop()
+        for child in source:
+            if not isinstance(child.tag, str):
+                if child.tail:
+                    if len(target):
+                        target[-1].tail = (target[-1].tail or "") + child.tail
+                    else:
+                        target.text = (target.text or "") + child.tail
+                continue
+            copy = etree.SubElement(target, _local_name(child.tag), dict(child.attrib))
+            copy.text = child.text
+            copy.tail = child.tail
+            stack.append((child, copy))
+    return new_root
+
+
+def _load_lxml():
+    return _parse_lxml
+
+
+def _load_html5_parser():
+    try:
+        import html5_parser
+    except RuntimeError as e:
+        # built against another libxml2 than lxml
+        raise ImportError(str(e))
+
+    def parse(page):
+        return html5_parser.parse(page, treebuilder="lxml_html", sanitize_names=True)
+
+    return parse
+
+
+def _load_html5lib():
+    import html5lib
+
+    def parse(page):
+        tree = html5lib.parse(page, treebuilder="lxml", namespaceHTMLElements=False)
+        return to_html_tree(tree.getroot())
+
+    return parse
+
+
+# name -> function returning a parse(str) function, which returns the
+# lxml.html root element. Loaders raise ImportError when their library is
+# not installed. lxml's libxml2 parser is the default; the others parse
+# like HTML5 browsers do, which nests some modern markup differently.
+PARSERS = {
+    "lxml": _load_lxml,
+    "html5-parser": _load_html5_parser,
+    "html5lib": _load_html5lib,
+}
+DEFAULT_PARSER = "lxml"
+
+_loaded_parsers = {}
+
+
+def register_parser(name, loader):
+    """Adds a parser backend, to be asked for by `name`."""
+    PARSERS[name] = loader
+    _loaded_parsers.pop(name, None)
+
+
+def get_parser(name=None):
+    """Returns the parse function of backend `name` (default lxml).
+    Raises ImportError when its library is not installed."""
+    name = name or DEFAULT_PARSER
+    if name not in PARSERS:
+        raise ValueError("unknown parser backend: %r" % (name,))
+    if name not in _loaded_parsers:
+        _loaded_parsers[name] = PARSERS[name]()
+    return _loaded_parsers[name]
+
+
+def build_doc(page, hint=None, host=None, parser=None, cache=None):
+    decoded_page, encoding = decode_page(page, hint, host, cache)
+    return get_parser(parser)(decoded_page), encoding
+
+
+class NodePaths:
+    """Remembers the positions of the elements of a tree, to give their
+    original paths later on, even after they were moved elsewhere.
+
+    Only ordinals, parents and sibling indexes are recorded up front; the
+    (much longer) path strings are built on demand for the elements asked for.
+    """
+
+    def __init__(self, root):
+        self.ordinals = {}
+        self.parents = array("i")
+        self.indexes = array("i")
+        self.tags = []
+        self.counts = {}
+        for el in root.iter():
+            tag = el.tag
+            if not isinstance(tag, str):
+                continue
+            parent = el.getparent()
+            parent = -1 if parent is None else self.ordinals[parent]
+            key = (parent, tag)
+            count = self.counts.get(key, 0) + 1
+            self.counts[key] = count
+            self.ordinals[el] = len(self.tags)
+            self.parents.append(parent)
+            self.indexes.append(count)
+            self.tags.append(tag)
+
+    def path(self, elem):
+        """Returns the original path of `elem`, as getpath() would have, or
+        None for elements which were not in the tree."""
+        ordinal = self.ordinals.get(elem)
+        if ordinal is None:
+            return None
+        steps = []
+        while ordinal >= 0:
+            tag = self.tags[ordinal]
+            parent = self.parents[ordinal]
+            if self.counts[parent, tag] > 1:
+                tag = "%s[%d]" % (tag, self.indexes[ordinal])
+            steps.append(tag)
+            ordinal = parent
+        return "/" + "/".join(reversed(steps))
+
+
+class TreeEdits:
+    """Makes the changes of an extraction pass to a tree and, when recording,
+    remembers how to revert them: undo() puts back the very same elements,
+    so the lenient pass of summary() needs no copy of the tree made up front.
+
+    Changes made to the tree other than through it are not reverted.
+    """
+
+    def __init__(self, record=True):
+        self.record = record
+        self.log = []
+
+    def drop_tree(self, elem):
+        """Removes `elem` like lxml's drop_tree(), merging its tail into
+        the text before it."""
+        parent = elem.getparent()
+        if self.record and parent is not None:
+            index = parent.index(elem)
+            if index:
+                before = parent[index - 1]
+                self.log.append((_set_tail, before, before.tail))
+            else:
+                self.log.append((_set_text, parent, parent.text))
+            self.log.append((_reinsert, parent, index, elem))
+        elem.drop_tree()
+
+    def append(self, parent, elem):
+        """Moves `elem` (with its tail) to the end of `parent`."""
+        if self.record:
+            old = elem.getparent()
+            self.log.append((_reinsert, old, None if old is None else old.index(elem), elem))
+        parent.append(elem)
+
+    def insert(self, parent, index, elem):
+        """Inserts `elem`, a new element, into `parent` at `index`."""
+        if self.record:
+            self.log.append((_reinsert, None, None, elem))
+        parent.insert(index, elem)
+
+    def set_tag(self, elem, tag):
+        if self.record:
+            self.log.append((_set_tag, elem, elem.tag))
+        elem.tag = tag
+
+    def set_text(self, elem, text):
+        if self.record:
+            self.log.append((_set_text, elem, elem.text))
+        elem.text = text
+
+    def set_tail(self, elem, tail):
+        if self.record:
+            self.log.append((_set_tail, elem, elem.tail))
+        elem.tail = tail
+
+    def rewrite_links(self, node, link_repl_func):
+        """Calls node.rewrite_links(link_repl_func, resolve_base_href=False)."""
+        if self.record:
+            for el, attrib, link, pos in node.iterlinks():
+                if attrib is None:
+                    self.log.append((_set_text, el, el.text))
+                else:
+                    self.log.append((_set_attribute, el, attrib, el.get(attrib)))
+        node.rewrite_links(link_repl_func, resolve_base_href=False)
+
+    def undo(self):
+        """Reverts the recorded changes, latest first."""
+        while self.log:
+            change = self.log.pop()
+            change[0](*change[1:])
+
+
+def _reinsert(parent, index, elem):
+    if parent is None:
+        # it was not in the tree before
+        current = elem.getparent()
+        if current is not None:
+            current.remove(elem)
+    else:
+        parent.insert(index, elem)
+
+
+def _set_tag(elem, tag):
+    elem.tag = tag
+
+
+def _set_text(elem, text):
+    elem.text = text
+
+
+def _set_tail(elem, tail):
+    elem.tail = tail
+
+
+def _set_attribute(elem, name, value):
+    if value is None:
+        elem.attrib.pop(name, None)
+    else:
+        elem.set(name, value)
+
+
+def link_resolver(base_url, handle_failures=None):
+    """Returns a function for rewrite_links() which makes links absolute.
+
+    It behaves like the one make_links_absolute() of lxml uses, but resolves
+    every distinct link only once.
+    """
+    if handle_failures not in ("ignore", "discard", None):
+        raise ValueError("unexpected value for handle_failures: %r" % handle_failures)
+    resolved = {}
+
+    def link_repl(href):
+        try:
+            return resolved[href]
+        except KeyError:
+            pass
+        try:
+            link = urljoin(base_url, href)
+        except ValueError:
+            if handle_failures == "ignore":
+                link = href
+            elif handle_failures == "discard":
+                link = None
+            else:
+                raise
+        resolved[href] = link
+        return link
+
+    return link_repl
 
 
 def js_re(src, pattern, flags, repl):
@@ -66,6 +359,82 @@ def get_author(doc):
     return author.get('content')
 
 
+RE_TITLE_TAG = re.compile(r"<title", re.I)
+RE_AUTHOR_META = re.compile(r"""(?i:<meta[^<>]*\bname\s*=\s*["']?)author\b""")
+
+
+class HeadParser:
+    """Parses a page incrementally, stopping as soon as its <head> is done.
+
+    Title and author only live in <head> on almost every page, so they are
+    answered without building (and cleaning) the rest of the tree. When they
+    are not in <head>, or when `document` is asked for, parsing resumes
+    where it stopped instead of starting over.
+    """
+
+    chunk_size = 16384
+
+    def __init__(self, page, hint=None, host=None, cache=None):
+        self.page, self.encoding = decode_page(page, hint, host, cache)
+        self.parser = etree.HTMLPullParser(events=("start", "end"), **PARSER_OPTIONS)
+        self.parser.set_element_class_lookup(lxml.html.HtmlElementClassLookup())
+        self.pos = 0
+        self.root = None
+        self.doc = None
+        self._parse_head()
+
+    def _feed(self):
+        if self.pos >= len(self.page):
+            return False
+        chunk = self.page[self.pos:self.pos + self.chunk_size]
+        self.pos += len(chunk)
+        # XXX: encode like build_doc does, to replace the same bad characters
+        self.parser.feed(chunk.encode("utf-8", "replace"))
+        return True
+
+    def _parse_head(self):
+        while self._feed():
+            for event, elem in self.parser.read_events():
+                if self.root is None:
+                    self.root = elem
+                if (event == "end" and elem.tag == "head") or (
+                    event == "start" and elem.tag == "body"
+                ):
+                    return
+        self.document()
+
+    def document(self):
+        """Returns the whole document, parsing the rest of the page."""
+        if self.doc is None:
+            while self._feed():
+                pass
+            try:
+                self.doc = self.parser.close()
+            except etree.XMLSyntaxError:
+                self.doc = None
+            if self.doc is None:
+                # same as document_fromstring() in build_doc
+                raise etree.ParserError("Document is empty")
+            self.root = self.doc
+        return self.doc
+
+    def find(self, path, pattern):
+        """Finds the first `path` element, parsing further only when `pattern`
+        says that the unparsed part of the page may contain one."""
+        elem = self.root.find(path)
+        if elem is None and self.doc is None and pattern.search(self.page):
+            elem = self.document().find(path)
+        return elem
+
+    def title(self):
+        self.find(".//title", RE_TITLE_TAG)
+        return get_title(self.root)
+
+    def author(self):
+        self.find(".//meta[@name='author']", RE_AUTHOR_META)
+        return get_author(self.root)
+
+
 def add_match(collection, text, orig):
     text = norm_title(text)
     if len(text.split()) >= 2 and len(text) >= 15:
@@ -87,12 +456,22 @@ TITLE_CSS_HEURISTICS = [
 ]
 
 
+# Where the <h1>-<h3> and the TITLE_CSS_HEURISTICS elements may be in the
+# raw page (and more, like "page-title" classes); without any, the title is
+# shortened from the <title> alone
+RE_TITLE_CANDIDATES = re.compile(
+    r"<h[1-3][\s>/]|\b(?:id|class)\s*=\s*[\"']?[^\"'<>]*"
+    r"\b(?:title|head|heading|pageTitle|news_title|contentheading|small_header_red)\b",
+    re.I,
+)
+
+
 def shorten_title(doc):
     title = doc.find(".//title")
     if title is None or title.text is None or len(title.text) == 0:
         return ""
 
-    title = orig = norm_title(title.text)
+    orig = norm_title(title.text)
 
     candidates = set()
 
@@ -110,6 +489,13 @@ def shorten_title(doc):
             if e.text_content():
                 add_match(candidates, e.text_content(), orig)
 
+    return shorten_title_text(orig, candidates)
+
+
+def shorten_title_text(orig, candidates=()):
+    """Shortens the normalized title `orig` to the longest of `candidates`
+    (headings which are part of it), or to the part around its separators."""
+    title = orig
     cjk = re.compile('[\u4e00-\u9fff]+')
 
     if candidates:
@@ -143,10 +529,11 @@ def shorten_title(doc):
     return title
 
 
-# is it necessary? Cleaner from LXML is initialized correctly in cleaners.py
-def get_body(doc):
-    for elem in doc.xpath(".//script | .//link | .//style"):
-        elem.drop_tree()
+def get_body(doc, cleaned=False):
+    # documents from clean_tree() have no script, link or style left
+    if not cleaned:
+        for elem in doc.xpath(".//script | .//link | .//style"):
+            elem.drop_tree()
     # tostring() always return utf-8 encoded string
     # FIXME: isn't better to use tounicode?
     raw_html = tostring(doc.body or doc)
@@ -0,0 +1,105 @@
+"""Subtree statistics carried over between extractions of the same page,
+used with Document(incremental=...).
+
+Pages which are fetched again and again (front pages, live blogs) mostly
+change in a few places. Every subtree gets a fingerprint of its tags and
+text, built from the fingerprints of its children, and the text length,
+comma count and link text length of a subtree are looked up by that
+fingerprint before they are computed. The statistics depend on nothing but
+what the fingerprint covers, so the result is the same as from scratch.
+
+The state is a plain dict of strings, numbers and lists (JSON works)::
+
+    {"version": 1, "subtrees": {fingerprint: [length, commas, link_length]}}
+
+It holds the subtrees looked at in the last extraction only, so it stays
+about as large as the page.
+"""
+from hashlib import blake2b
+
+from .readability import normalize_text
+
+
+VERSION = 1
+DIGEST_SIZE = 16
+
+
+class SubtreeStats:
+    """Text statistics of the subtrees of one document.
+
+    Fingerprints are computed lazily and kept until the subtree changes:
+    whoever changes the tree has to call forget() on the changed element
+    (for a removed element, on its parent).
+    """
+
+    def __init__(self, state=None):
+        self.previous = {}
+        if state and state.get("version") == VERSION:
+            self.previous = state["subtrees"]
+        self.subtrees = {}
+        self.prints = {}
+        self.reused = 0
+        self.computed = 0
+
+    def reset(self):
+        """Forgets all fingerprints, e.g. when the tree is replaced."""
+        self.prints = {}
+
+    def forget(self, elem):
+        # a node without fingerprint has none above it either
+        while elem is not None and self.prints.pop(elem, None) is not None:
+            elem = elem.getparent()
+
+    def fingerprint(self, elem):
+        prints = self.prints
+        if elem in prints:
+            return prints[elem]
+        stack = [(elem, False)]
+        while stack:
+            node, children_done = stack.pop()
+            if children_done:
+                prints[node] = self._digest(node)
+            elif node not in prints:
+                stack.append((node, True))
+                stack.extend((child, False) for child in node)
+        return prints[elem]
+
+    def _digest(self, node):
+        digest = blake2b(digest_size=DIGEST_SIZE)
+        # comments and processing instructions have functions as tags
+        digest.update((node.tag if isinstance(node.tag, str) else "#").encode("utf-8"))
+        digest.update(b"\0" + (node.text or "").encode("utf-8"))
+        for child in node:
+            digest.update(b"\1" + self.prints[child])
+            digest.update(b"\0" + (child.tail or "").encode("utf-8"))
+        return digest.digest()
+
+    def _entry(self, elem):
+        key = self.fingerprint(elem).hex()
+        entry = self.subtrees.get(key)
+        if entry is None:
+            entry = self.previous.get(key)
+            if entry is None:
+                length, commas, _ = normalize_text(elem.text_content() or "")
+                entry = [length, commas, None]
+                self.computed += 1
+            else:
+                entry = list(entry)
+                self.reused += 1
+            self.subtrees[key] = entry
+        return entry
+
+    def text(self, elem):
+        """Returns the length and the comma count of the normalized text."""
+        entry = self._entry(elem)
+        return entry[0], entry[1]
+
+    def link_length(self, elem):
+        """Returns the text length of the links below `elem`."""
+        entry = self._entry(elem)
+        if entry[2] is None:
+            entry[2] = sum(self.text(a)[0] for a in elem.findall(".//a"))
+        return entry[2]
+
+    def state(self):
+        return {"version": VERSION, "subtrees": dict(self.subtrees)}
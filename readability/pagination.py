@@ -0,0 +1,301 @@
+"""Assemble articles which are split over several pages.
+
+The links to the other pages are looked for around the best candidate of
+the first page while its summary is extracted (see PagedDocument), the
+pages are fetched and extracted concurrently, and their summaries are
+merged in page order. Blocks which already appeared on an earlier page
+(a repeated teaser, "Page 2 of 5", the author box...) are left out.
+
+Fetchers are callables taking a URL and returning the page as bytes or
+str, or as a fetch.Response (whose final URL and charset are then used),
+and raising when it can't be had; see fetch_url(), MappingFetcher and
+fetch.Fetcher.
+"""
+import logging
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from urllib.parse import urldefrag
+from urllib.parse import urljoin
+from urllib.parse import urlsplit
+
+from lxml.etree import tounicode
+from lxml.html import document_fromstring
+from lxml.html import fragment_fromstring
+
+from .readability import Document
+from .readability import normalize_text
+
+
+log = logging.getLogger("readability.pagination")
+
+MAX_PAGES = 10
+TIMEOUT = 30.0
+WORKERS = 4
+
+NEXT_RE = re.compile(r"next|weiter|continue|>([^|]|$)|»", re.I)
+PREV_RE = re.compile(r"prev|earl|old|new|first|last|<|«", re.I)
+EXTRANEOUS_RE = re.compile(
+    r"print|archive|comment|discuss|e[-]?mail|share|reply|\ball\b|login|sign|single", re.I
+)
+PAGER_RE = re.compile(r"pag(e|ing|inat)|pager", re.I)
+# links with more text than this are not pagers
+MAX_LINK_TEXT = 25
+MAX_PAGE_NUMBER = 100
+
+BLOCKS = ("p", "pre", "blockquote", "li", "h1", "h2", "h3", "h4", "h5", "h6", "table", "figure", "dl")
+RE_BLOCK_NOISE = re.compile(r"[\W_]+")
+# digits are ignored in blocks shorter than this ("Page 2 of 5")
+SHORT_BLOCK = 40
+
+
+def fetch_file(url):
+    """Reads file: URLs (and plain paths)."""
+    with open(urlsplit(url).path if url.startswith("file:") else url, "rb") as f:
+        return f.read()
+
+
+def fetch_http(url, timeout=TIMEOUT):
+    import urllib.request
+
+    request = urllib.request.Request(url, None, {"User-Agent": "Mozilla/5.0"})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return response.read()
+
+
+def fetch_url(url):
+    """The default fetcher: local files for file: URLs, HTTP otherwise."""
+    if urlsplit(url).scheme in ("", "file"):
+        return fetch_file(url)
+    return fetch_http(url)
+
+
+class MappingFetcher:
+    """Serves pages from a dict of URL -> html, e.g. in tests."""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.fetched = []
+
+    def __call__(self, url):
+        self.fetched.append(url)
+        return self.pages[url]
+
+
+def _article_prefix(url):
+    """The part of the URL all pages of the article are expected to share."""
+    path = urlsplit(url).path
+    stem = path.rsplit(".", 1)[0] if "." in path.rsplit("/", 1)[-1] else path
+    return stem.rstrip("0123456789-_/")
+
+
+class PagedDocument(Document):
+    """A Document which finds the links to the later pages of its article
+    while summary() parses and scores it, as `pages` ({url: page number}),
+    `number` being the number of its own page.
+
+    The links are looked for in the parent of the best candidate (or the
+    body, when there is none). Pagers are unlikely candidates, so the links
+    are taken before those are dropped, with their ancestors at the time.
+    """
+
+    def __init__(self, input, number=1, **options):
+        super().__init__(input, **options)
+        self.number = number
+        self.pages = {}
+        self._links = None
+
+    def unlikely_candidates(self):
+        self._links = _links(self.html)
+        return super().unlikely_candidates()
+
+    def select_best_candidate(self, candidates):
+        best = super().select_best_candidate(candidates)
+        # the lenient pass drops nothing, its links are all in the tree
+        links = self._links if self._links is not None else _links(self.html)
+        self._links = None
+        if best is None:
+            region = self.html.find("body")
+            if region is None:
+                region = self.html
+        else:
+            region = best["elem"].getparent()
+            if region is None:
+                region = best["elem"]
+        links = [
+            (link, ancestors)
+            for link, ancestors in links
+            if any(ancestor is region for ancestor in ancestors)
+        ]
+        self.pages = next_pages(self, links, self.number)
+        return best
+
+
+def _links(html):
+    return [(link, list(link.iterancestors())) for link in html.iter("a")]
+
+
+def next_pages(doc, links, number=1):
+    """Returns {url: page number} of the later pages among `links`, the
+    (link, ancestors) of the article region of `doc`, which is page
+    `number` of its article."""
+    url = doc.url
+    base = urlsplit(url)
+    prefix = _article_prefix(url)
+    pages = {}
+    for link, ancestors in links:
+        href = link.get("href")
+        if not href:
+            continue
+        target = urldefrag(urljoin(doc.base_href or url, href.strip()))[0]
+        parts = urlsplit(target)
+        if (
+            target == urldefrag(url)[0]
+            or parts.scheme != base.scheme
+            or parts.netloc != base.netloc
+            or not parts.path.startswith(prefix)
+        ):
+            continue
+        text = normalize_text(link.text_content() or "", with_text=True)[2]
+        if len(text) > MAX_LINK_TEXT:
+            continue
+        names = " ".join(
+            "%s %s" % (elem.get("class", ""), elem.get("id", ""))
+            for elem in [link] + ancestors[:3]
+        )
+        score = 0
+        if "next" in (link.get("rel") or "").lower().split():
+            score += 100
+        if NEXT_RE.search(text):
+            score += 50
+        if PREV_RE.search(text):
+            score -= 200
+        if EXTRANEOUS_RE.search(text + " " + names):
+            score -= 50
+        if PAGER_RE.search(names):
+            score += 25
+        page = None
+        if text.isdigit() and 0 < int(text) < MAX_PAGE_NUMBER:
+            page = int(text)
+            if page <= number:
+                continue
+            if page in (int(n) for n in re.findall(r"\d+", target)):
+                score += 25
+        if score >= 50 or (page is not None and score >= 25):
+            page = page or number + 1
+            if pages.get(target, page) >= page:
+                pages[target] = page
+    return pages
+
+
+def block_key(elem):
+    """Text of `elem` with case, punctuation and spacing removed (and
+    digits, if it is short)."""
+    key = RE_BLOCK_NOISE.sub(" ", elem.text_content().lower()).strip()
+    if len(key) < SHORT_BLOCK:
+        key = re.sub(r"\s*\d+\s*", " ", key).strip()
+    return key
+
+
+def merge(summaries, html_partial=False):
+    """Merges partial summaries (in page order) into one, leaving out the
+    blocks whose text (see block_key) appeared on an earlier page."""
+    if html_partial:
+        output = fragment_fromstring("<div/>")
+        container = output
+    else:
+        output = document_fromstring("<div/>")
+        container = output.find("body").find("div")
+    seen = set()
+    for summary in summaries:
+        page = fragment_fromstring(summary)
+        keys = set()
+        for block in list(page.iter(*BLOCKS)):
+            key = block_key(block)
+            if not key:
+                continue
+            if key in seen:
+                block.drop_tree()
+            else:
+                keys.add(key)
+        seen |= keys
+        container.append(page)
+    return tounicode(output, method="html")
+
+
+def assemble(
+    url,
+    fetch=fetch_url,
+    html=None,
+    max_pages=MAX_PAGES,
+    timeout=TIMEOUT,
+    workers=WORKERS,
+    html_partial=False,
+    **options
+):
+    """Extracts the article at `url` and the pages it continues on.
+
+    `html` is the first page if it was already fetched. The other pages are
+    fetched with `fetch`, `workers` at a time, and extracted with the same
+    Document `options`. At most `max_pages` pages are used, and pages which
+    are not done after `timeout` seconds are left out, like the pages which
+    fail; a first page which fails raises, and one which is not done in
+    time raises TimeoutError. Returns the merged summary and the URLs of the
+    pages in it.
+    """
+    deadline = time.monotonic() + timeout
+
+    def load(page_url, number, html=None):
+        page_options = options
+        if html is None:
+            html = fetch(page_url)
+            if hasattr(html, "body"):
+                # links are relative to where the redirects ended
+                page_url = html.url
+                if html.charset:
+                    page_options = dict(options, encoding_hint=html.charset)
+                html = html.body
+        doc = PagedDocument(html, number, url=page_url, **page_options)
+        summary = doc.summary(html_partial=True)
+        return doc.pages, summary
+
+    numbers = {url: 1}
+    summaries = {}
+    pending = {}
+    pool = ThreadPoolExecutor(max_workers=workers)
+    try:
+        pending[pool.submit(load, url, 1, html)] = url
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                log.warning("giving up on %d pages of %s after %ss", len(pending), url, timeout)
+                break
+            done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                page_url = pending.pop(future)
+                try:
+                    links, summary = future.result()
+                except Exception:
+                    if page_url == url:
+                        raise
+                    log.warning("page %s of %s failed", page_url, url, exc_info=True)
+                    continue
+                summaries[page_url] = summary
+                for link, number in sorted(links.items(), key=lambda item: item[1]):
+                    if link not in numbers and len(numbers) < max_pages:
+                        numbers[link] = number
+                        pending[pool.submit(load, link, number)] = link
+    finally:
+        # the pages not started yet are dropped (cancel_futures needs 3.9)
+        for future in pending:
+            future.cancel()
+        pool.shutdown(wait=False)
+    if url not in summaries:
+        # like a failed first page
+        raise TimeoutError("no summary of %s after %ss" % (url, timeout))
+
+    order = {page_url: i for i, page_url in enumerate(numbers)}
+    urls = sorted(summaries, key=lambda page_url: (numbers[page_url], order[page_url]))
+    return merge([summaries[page_url] for page_url in urls], html_partial), urls
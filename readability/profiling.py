@@ -0,0 +1,168 @@
+"""Where the time of an extraction goes, by readability function.
+
+    with profiling() as profile:
+        for html in pages:
+            Document(html).summary()
+    print(profile.report())
+    profile.write_stacks("extraction.folded")
+
+or `python -m readability.readability --profile PREFIX ...`, which writes
+PREFIX.txt and PREFIX.folded.
+
+Unlike cProfile, only the functions of readability itself are counted
+(class_weight, get_link_density, text_length, clean, tags, describe, ...):
+the time spent in lxml, regular expressions and builtins is that of the
+readability function which called them. lxml's drop_tree is the exception,
+counted on its own and per phase of the extraction it is called from, as
+in "drop_tree (in sanitize)".
+
+report() lists the functions by self time, with their call counts and
+total time; write_stacks() writes the stacks of readability functions in
+the collapsed format of flamegraph.pl, speedscope and the like, one
+"summary;sanitize;drop_tree 1234" line (microseconds) per stack.
+
+Only the thread which entered profiling() is profiled.
+"""
+import dis
+import inspect
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+
+PACKAGE = os.path.dirname(os.path.abspath(__file__))
+# lxml functions counted on their own
+EXTERNAL = frozenset(["drop_tree"])
+# the Document methods external functions are attributed to
+PHASES = (
+    "summary",
+    "clean_tree",
+    "remove_unlikely_candidates",
+    "transform_misused_divs_into_paragraphs",
+    "score_paragraphs",
+    "get_article",
+    "sanitize",
+    "features",
+)
+# a generator frame which returns at one of these was only suspended
+YIELD_FROM = dis.opmap.get("YIELD_FROM")
+YIELDS = frozenset(op for op in (dis.opmap["YIELD_VALUE"], YIELD_FROM) if op is not None)
+
+
+class Profile:
+    """Call counts and times of readability functions, see the module docstring."""
+
+    def __init__(self):
+        # name -> [calls, self seconds, total seconds]
+        self.functions = {}
+        # tuple of names -> self seconds
+        self.stacks = {}
+        self._names = {}
+        self._stack = []
+        self._active = {}
+        # generator frames entered and not finished yet
+        self._generators = set()
+
+    def _name(self, code):
+        try:
+            return self._names[code]
+        except KeyError:
+            pass
+        filename = os.path.abspath(code.co_filename)
+        name = None
+        if filename.startswith(PACKAGE + os.sep) and filename != os.path.abspath(__file__):
+            name = getattr(code, "co_qualname", code.co_name)
+            if name.startswith("Document."):
+                name = name[len("Document."):]
+        elif code.co_name in EXTERNAL and os.sep + "lxml" + os.sep in filename:
+            name = code.co_name
+        self._names[code] = name
+        return name
+
+    def _event(self, frame, event, arg):
+        if event == "call":
+            name = self._name(frame.f_code)
+            if name is None:
+                return
+            if name in EXTERNAL:
+                phase = next((entry[1] for entry in reversed(self._stack) if entry[1] in PHASES), None)
+                if phase:
+                    name = "%s (in %s)" % (name, phase)
+            stats = self.functions.get(name)
+            if stats is None:
+                stats = self.functions[name] = [0, 0.0, 0.0]
+            if not frame.f_code.co_flags & inspect.CO_GENERATOR:
+                stats[0] += 1
+            elif frame not in self._generators:
+                # resuming a generator is not another call of it
+                self._generators.add(frame)
+                stats[0] += 1
+            self._stack.append([frame, name, time.perf_counter(), 0.0])
+            self._active[name] = self._active.get(name, 0) + 1
+        elif event == "return":
+            if not self._stack or self._stack[-1][0] is not frame:
+                return
+            if frame in self._generators and not _suspended(frame):
+                self._generators.discard(frame)
+            _, name, started, children = self._stack.pop()
+            elapsed = time.perf_counter() - started
+            stats = self.functions[name]
+            stats[1] += elapsed - children
+            self._active[name] -= 1
+            if not self._active[name]:
+                # recursive calls count once in the total
+                stats[2] += elapsed
+            key = tuple(entry[1] for entry in self._stack) + (name,)
+            self.stacks[key] = self.stacks.get(key, 0.0) + elapsed - children
+            if self._stack:
+                self._stack[-1][3] += elapsed
+
+    def report(self, limit=None):
+        """Returns the functions by self time, as text."""
+        total = sum(stats[1] for stats in self.functions.values()) or 1.0
+        rows = sorted(self.functions.items(), key=lambda item: -item[1][1])[:limit]
+        lines = ["%-52s %9s %10s %10s %7s" % ("function", "calls", "self ms", "total ms", "self %")]
+        for name, (calls, own, cumulative) in rows:
+            lines.append("%-52s %9d %10.2f %10.2f %6.1f%%" % (
+                name, calls, own * 1000, cumulative * 1000, own * 100 / total))
+        lines.append("%-52s %9s %10.2f" % ("total", "", total * 1000))
+        return "\n".join(lines) + "\n"
+
+    def write_report(self, path, limit=None):
+        with open(path, "w") as f:
+            f.write(self.report(limit))
+
+    def write_stacks(self, path):
+        """Writes the collapsed stacks, in microseconds."""
+        with open(path, "w") as f:
+            for stack, seconds in sorted(self.stacks.items()):
+                microseconds = int(round(seconds * 1e6))
+                if microseconds:
+                    f.write("%s %d\n" % (";".join(stack), microseconds))
+
+
+def _suspended(frame):
+    code = frame.f_code.co_code
+    lasti = frame.f_lasti
+    if code[lasti] in YIELDS:
+        return True
+    # before 3.11, a pending "yield from" points before its YIELD_FROM
+    return YIELD_FROM is not None and code[lasti + 2:lasti + 3] == bytes([YIELD_FROM])
+
+
+@contextmanager
+def profiling(profile=None):
+    """Profiles the readability calls of the block, adding to `profile` if
+    given; yields the Profile."""
+    profile = profile or Profile()
+    previous = sys.getprofile()
+    sys.setprofile(profile._event)
+    try:
+        yield profile
+    finally:
+        sys.setprofile(previous)
+        # frames still open when the block left
+        profile._stack = []
+        profile._active = {}
+        profile._generators = set()
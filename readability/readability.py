@@ -1,26 +1,35 @@
 #!/usr/bin/env python
+import copy
 import logging
 import re
 import sys
-import urllib.request
-import urllib.parse
-import urllib.error
+import time
+from urllib.parse import urlsplit
 
-from lxml.etree import tostring
 from lxml.etree import tounicode
 from lxml.etree import _ElementTree
 from lxml.html import document_fromstring
 from lxml.html import fragment_fromstring
 from lxml.html import HtmlElement
+from lxml.html import xhtml_to_html
 
 from .cleaners import clean_attributes
-from .cleaners import html_cleaner
+from .cleaners import clean_tree
+from .htmls import HeadParser
+from .htmls import RE_TITLE_CANDIDATES
+from .htmls import RE_TITLE_TAG
 from .htmls import build_doc
 from .htmls import get_body
 from .htmls import get_title
 from .htmls import get_author
+from .htmls import link_resolver
+from .htmls import NodePaths
+from .htmls import TreeEdits
+from .htmls import norm_title
 from .htmls import shorten_title
+from .htmls import shorten_title_text
 from .debug import describe, text_content
+from .result import Result
 
 
 log = logging.getLogger("readability.readability")
@@ -52,10 +61,37 @@ REGEXES = {
 }
 
 
+# Extraction profiles: which of the costlier heuristics summary() runs.
+#   drop_unlikely: first remove the elements whose class or id looks like
+#     boilerplate (a regex search on every element); without it, their
+#     negative class weight is left to keep them out of the summary
+#   retry: start over without removing unlikely candidates when the first
+#     pass finds nothing or too little (undoing the changes of the first)
+#   sibling_scan: keep empty blocks whose neighbours have a lot of text
+#   clean_link_text: measure link density on normalized rather than raw text
+PROFILES = {
+    "full": {"drop_unlikely": True, "retry": True, "sibling_scan": True, "clean_link_text": True},
+    "fast": {"drop_unlikely": False, "retry": False, "sibling_scan": False, "clean_link_text": False},
+}
+
+
+# the elements counted in the blocks sanitize() considers dropping
+MEDIA_KINDS = ("p", "img", "li", "a", "embed", "input")
+
+
 class Unparseable(ValueError):
     pass
 
 
+class NotAnArticle(Unparseable):
+    """summary() found the article_score() of the page below the threshold."""
+
+    def __init__(self, score, threshold):
+        super().__init__("article score %.3f is below %.3f" % (score, threshold))
+        self.score = score
+        self.threshold = threshold
+
+
 def to_int(x):
     if not x:
         return None
@@ -67,16 +103,46 @@ def to_int(x):
     return int(x)
 
 
+# whitespace runs which normalization may change: single spaces are left as is
+RE_WHITESPACE_RUN = re.compile(r"\s{2,}|[^\S ]")
+RE_TABS = re.compile(r"\t|[ \t]{2,}")
+
+
+def normalize_space(run):
+    if len(run) >= 255:
+        return " "
+    if "\n" in run:
+        return "\n"
+    if not run.strip(" "):
+        return " "
+    return RE_TABS.sub(" ", run)
+
+
+def normalize_text(text, with_text=False):
+    """Normalizes the whitespace of `text` in a single scan.
+
+    Returns ``(length, commas, normalized)``: the length and the number of
+    commas of the normalized text, and the text itself if `with_text` is
+    set (None otherwise). Every whitespace run becomes a newline if it has
+    one, a space otherwise (tabs directly in front of text each become a
+    space), and the ends are stripped.
+    """
+    text = text.strip()
+    length = len(text)
+    for run in RE_WHITESPACE_RUN.findall(text):
+        length -= len(run) - len(normalize_space(run))
+    normalized = None
+    if with_text:
+        normalized = RE_WHITESPACE_RUN.sub(lambda m: normalize_space(m.group()), text)
+    return length, text.count(","), normalized
+
+
 def clean(text):
-    # Many spaces make the following regexes run forever
-    text = re.sub(r"\s{255,}", " " * 255, text)
-    text = re.sub(r"\s*\n\s*", "\n", text)
-    text = re.sub(r"\t|[ \t]{2,}", " ", text)
-    return text.strip()
+    return normalize_text(text, with_text=True)[2]
 
 
 def text_length(i):
-    return len(clean(i.text_content() or ""))
+    return normalize_text(i.text_content() or "")[0]
 
 
 def compile_pattern(elements):
@@ -108,6 +174,16 @@ class Document:
         retry_length=250,
         xpath=False,
         handle_failures="discard",
+        encoding_hint=None,
+        head_only=False,
+        scoring="python",
+        incremental=False,
+        profile="full",
+        features=False,
+        boilerplate=None,
+        parser=None,
+        article_threshold=None,
+        encoding_cache=None,
     ):
         """Generate the document
 
@@ -118,9 +194,38 @@ class Document:
         :param retry_length: Tunable. Set to a lower value for better detection of very small texts.
         :param xpath: If set to True, adds x="..." attribute to each HTML node,
         containing xpath path pointing to original document path (allows to
-        reconstruct selected summary in original document).
+        reconstruct selected summary in original document). If set to "map",
+        the original positions are kept aside instead, see xpaths().
         :param handle_failures: Parameter passed to `lxml` for handling failure during exception.
         Support options = ["discard", "ignore", None]
+        :param encoding_hint: charset declared outside of the html, e.g. in the HTTP
+        Content-Type header. Used before the charsets declared in the page itself.
+        :param head_only: Answer title(), author() and short_title() from an incremental
+        parse which stops after <head>. The rest of the page is only parsed when
+        the answer is not in <head> (or, for short_title(), to look at headings).
+        :param scoring: "python", or "numpy" to compute the scores with vectorized
+        array operations (requires numpy). Both give the same results; numpy
+        is faster on long pages and slower on short ones, see
+        benchmarks/scoring.py.
+        :param incremental: True, or the state() of an earlier extraction of the
+        same page, to reuse the text statistics of the subtrees which did not
+        change since then. The summary is the same either way.
+        :param profile: "full", or "fast" to skip the costlier heuristics (see
+        PROFILES) at some loss of quality; benchmarks/profiles.py measures both.
+        :param features: record the features of the candidates while scoring,
+        see features().
+        :param boilerplate: a boilerplate.BoilerplateStore shared by the pages
+        of the sites being extracted. summary() drops the blocks which it has
+        seen on enough other pages of the host of `url` before scoring.
+        :param parser: the HTML parser backend, see htmls.PARSERS: "lxml" (the
+        default), or "html5-parser" or "html5lib" when installed. head_only
+        parsing always uses lxml.
+        :param article_threshold: a confidence between 0 and 1 (see
+        classify.THRESHOLD); summary() raises NotAnArticle for pages with a
+        lower article_score(), before doing any of the extraction.
+        :param encoding_cache: an encoding.EncodingCache shared by the pages
+        being extracted, to detect the encoding of the pages of a host already
+        seen from less of their text (see encoding.get_encoding()).
 
         Examples:
             positive_keywords=["news-item", "block"]
@@ -136,9 +241,15 @@ class Document:
         .short_title() -- cleaned up title
         .content() -- full content
         .summary() -- cleaned up content
+        .xpaths() -- original paths of the summary nodes (with xpath="map")
+        .result() -- all of the above in a compact, picklable Result
+        .state() -- subtree statistics for the next incremental extraction
+        .features() -- per-candidate features of the scoring pass, as columns
+        .article_score() -- confidence that the page is an article
         """
         self.input = input
         self.html = None
+        self.base_href = None
         self.encoding = None
         self.positive_keywords = compile_pattern(positive_keywords)
         self.negative_keywords = compile_pattern(negative_keywords)
@@ -147,62 +258,185 @@ class Document:
         self.retry_length = retry_length
         self.xpath = xpath
         self.handle_failures = handle_failures
+        self.encoding_hint = encoding_hint
+        self.encoding_cache = encoding_cache
+        self.head_only = head_only
+        self._head_parser = None
+        self._node_paths = None
+        self._parsed = False
+        self._edits = TreeEdits(record=False)
+        self.degraded = False
+        if scoring not in ("python", "numpy"):
+            raise ValueError("unknown scoring backend: %r" % (scoring,))
+        self.scoring = scoring
+        if profile not in PROFILES:
+            raise ValueError("unknown extraction profile: %r" % (profile,))
+        self.profile = PROFILES[profile]
+        self.record_features = features
+        self.boilerplate = boilerplate
+        self.parser = parser
+        self.article_threshold = article_threshold
+        self._article_features = None
+        self._features = None
+        self._stats = None
+        if incremental is not False and incremental is not None:
+            from .incremental import SubtreeStats
+
+            self._stats = SubtreeStats(None if incremental is True else incremental)
 
     def _html(self, force=False):
         if force or self.html is None:
             self.html = self._parse(self.input)
-            if self.xpath:
+            if self.xpath == "map":
+                self._node_paths = NodePaths(self.html)
+            elif self.xpath:
                 root = self.html.getroottree()
                 for i in self.html.getiterator():
                     # print root.getpath(i)
                     i.attrib["x"] = root.getpath(i)
         return self.html
 
+    def _host(self):
+        # for the encoding cache and the boilerplate store
+        try:
+            return urlsplit(self.url).hostname if self.url else None
+        except ValueError:
+            return None
+
+    def _restore(self, pristine):
+        """Reverts the changes of the ruthless pass, `pristine` being the
+        root of the tree before it."""
+        self._edits.undo()
+        self.html = pristine
+
     def _parse(self, input):
         if isinstance(input, (_ElementTree, HtmlElement)):
-            doc = input
+            # cleaning works in place, leave the caller's tree alone
+            doc = copy.deepcopy(input)
+            xhtml_to_html(doc)
             self.encoding = 'utf-8'
         else:
-            doc, self.encoding = build_doc(input)
-        doc = html_cleaner.clean_html(doc)
-        base_href = self.url
-        if base_href:
-            # trying to guard against bad links like <a href="http://[http://...">
-            try:
-                # such support is added in lxml 3.3.0
-                doc.make_links_absolute(
-                    base_href,
-                    resolve_base_href=True,
-                    handle_failures=self.handle_failures,
-                )
-            except TypeError:  # make_links_absolute() got an unexpected keyword argument 'handle_failures'
-                # then we have lxml < 3.3.0
-                # please upgrade to lxml >= 3.3.0 if you're failing here!
-                doc.make_links_absolute(
-                    base_href,
-                    resolve_base_href=True,
-                    handle_failures=self.handle_failures,
-                )
-        else:
-            doc.resolve_base_href(handle_failures=self.handle_failures)
+            doc, self.encoding = build_doc(
+                input, self.encoding_hint, self._host(), self.parser, self.encoding_cache
+            )
+        if self.article_threshold is not None:
+            from .classify import article_features
+
+            # before the cleaning, which drops JSON-LD
+            self._article_features = article_features(doc)
+        doc = clean_tree(doc)
+        # Links are made absolute only where they end up in the output (see
+        # make_links_absolute), but <base href> has to be taken out now.
+        self.base_href = None
+        for base in doc.xpath("//base[@href]"):
+            self.base_href = base.get("href")
+            base.drop_tree()
         return doc
 
+    def make_links_absolute(self, node):
+        """Resolves the links in `node` against <base href>, then against `url`."""
+        for base_url in (self.base_href, self.url):
+            if base_url:
+                # trying to guard against bad links like <a href="http://[http://...">
+                self._edits.rewrite_links(
+                    node, link_resolver(base_url, self.handle_failures)
+                )
+
+    def _head(self):
+        """Returns the HeadParser of the input, or None in the full-parse mode."""
+        if not self.head_only or isinstance(self.input, (_ElementTree, HtmlElement)):
+            return None
+        if self._head_parser is None:
+            self._head_parser = HeadParser(
+                self.input, self.encoding_hint, self._host(), self.encoding_cache
+            )
+            self.encoding = self._head_parser.encoding
+        return self._head_parser
+
     def content(self):
         """Returns document body"""
-        return get_body(self._html(True))
+        doc = self._html(True)
+        self.make_links_absolute(doc)
+        return get_body(doc, cleaned=True)
 
     def title(self):
         """Returns document title"""
+        head = self._head()
+        if head is not None:
+            return head.title()
         return get_title(self._html(True))
 
     def author(self):
         """Returns document author"""
+        head = self._head()
+        if head is not None:
+            return head.author()
         return get_author(self._html(True))
 
     def short_title(self):
         """Returns cleaned up document title"""
+        head = self._head()
+        if head is not None:
+            title = head.find(".//title", RE_TITLE_TAG)
+            if title is None or not title.text:
+                return ""
+            if not RE_TITLE_CANDIDATES.search(head.page):
+                # no heading to shorten it to, the <title> is enough
+                return shorten_title_text(norm_title(title.text))
+            return shorten_title(clean_tree(head.document()))
         return shorten_title(self._html(True))
 
+    def result(self, html_partial=False, keep_all_images=False):
+        """Returns title, short title, author and summary as a Result.
+
+        Unlike the Document itself, which holds the input and the trees, the
+        Result is cheap to pickle, e.g. to send it back from a worker process.
+        `degraded` is set when no article was found and the summary is the
+        whole body.
+        """
+        timings = {}
+        t = time.perf_counter()
+        tree = self._html(True)
+        timings["parse"] = time.perf_counter() - t
+
+        # the metadata is read before summary() changes the tree it scores
+        t = time.perf_counter()
+        title = get_title(tree)
+        short_title = shorten_title(tree)
+        author = get_author(tree)
+        timings["metadata"] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        self._parsed = True
+        summary = self.summary(html_partial, keep_all_images)
+        timings["summary"] = time.perf_counter() - t
+        return Result(
+            url=self.url,
+            title=title,
+            short_title=short_title,
+            author=author,
+            summary=summary,
+            encoding=self.encoding,
+            degraded=self.degraded,
+            timings=timings,
+        )
+
+    def article_score(self):
+        """Returns the confidence, between 0 and 1, that the page is an
+        article (see readability.classify)."""
+        from .classify import article_features
+        from .classify import article_score
+
+        if self._article_features is None:
+            if isinstance(self.input, (_ElementTree, HtmlElement)):
+                doc = self.input
+            else:
+                doc, self.encoding = build_doc(
+                    self.input, self.encoding_hint, self._host(), self.parser, self.encoding_cache
+                )
+            self._article_features = article_features(doc)
+        return article_score(self._article_features)
+
     def get_clean_html(self):
         """
         An internal method, which can be overridden in subclasses, for example,
@@ -221,16 +455,42 @@ class Document:
         Warning: It mutates internal DOM representation of the HTML document,
         so it is better to call other API methods before this one.
         """
+        self.degraded = False
         try:
-            ruthless = True
+            ruthless = self.profile["drop_unlikely"]
+            pristine = None
             while True:
-                self._html(True)
-                for i in self.tags(self.html, "script", "style"):
-                    i.drop_tree()
+                if pristine is None:
+                    # result() parses before reading the metadata
+                    self._html(not self._parsed)
+                    self._parsed = False
+                    if self.article_threshold is not None:
+                        score = self.article_score()
+                        if score < self.article_threshold:
+                            raise NotAnArticle(score, self.article_threshold)
+                    if self.boilerplate is not None:
+                        self.boilerplate.prune(self.html, self._host(), self.url)
+                else:
+                    # the lenient pass starts over from the tree as parsed
+                    self._restore(pristine)
+                if self._stats is not None:
+                    self._stats.reset()
                 for i in self.tags(self.html, "body"):
                     i.set("id", "readabilityBody")
+                self._edits = TreeEdits(record=False)
                 if ruthless:
-                    self.remove_unlikely_candidates()
+                    unlikely = self.unlikely_candidates()
+                    if unlikely and self.profile["retry"]:
+                        # recorded, to be undone for the lenient pass
+                        pristine = self.html
+                        self._edits = TreeEdits()
+                    for elem in unlikely:
+                        log.debug("Removing unlikely candidate - %s" % describe(elem))
+                        self._edits.drop_tree(elem)
+                    if not unlikely or not self.profile["retry"]:
+                        # the lenient pass would see the very same tree, or
+                        # the profile does without it
+                        ruthless = False
                 self.transform_misused_divs_into_paragraphs()
                 candidates = self.score_paragraphs()
 
@@ -255,9 +515,11 @@ class Document:
                                 "Ruthless and lenient parsing did not work. "
                                 "Returning raw html"
                         )
+                        self.degraded = True
                         article = self.html.find("body")
                         if article is None:
                             article = self.html
+                self.make_links_absolute(article)
                 cleaned_article = self.sanitize(article, candidates, keep_all_images)
 
                 article_length = len(cleaned_article or "")
@@ -269,10 +531,53 @@ class Document:
                     continue
                 else:
                     return cleaned_article
+        except NotAnArticle:
+            raise
         except Exception as e:
             log.exception("error getting summary: ")
             raise Unparseable(str(e)).with_traceback(sys.exc_info()[2])
 
+    def state(self):
+        """Returns the subtree statistics of the last summary(), to be passed
+        as Document(..., incremental=state) for the next version of the page.
+
+        Requires incremental extraction. The state is JSON-serializable.
+        """
+        if self._stats is None:
+            raise ValueError("state() requires Document(..., incremental=True)")
+        return self._stats.state()
+
+    def _text_stats(self, elem):
+        """Returns the length and the comma count of the normalized text."""
+        if self._stats is not None:
+            return self._stats.text(elem)
+        return normalize_text(elem.text_content() or "")[:2]
+
+    def _changed(self, elem):
+        if self._stats is not None:
+            self._stats.forget(elem)
+
+    def _drop(self, elem):
+        self._changed(elem.getparent())
+        self._edits.drop_tree(elem)
+
+    def xpaths(self):
+        """Maps the paths of the nodes of the last summary() (or of the whole
+        document before it) to their paths in the original document.
+
+        Requires xpath="map". Nodes created during extraction are left out.
+        """
+        if self.xpath != "map":
+            raise ValueError('xpaths() requires Document(..., xpath="map")')
+        html = self._html()
+        tree = html.getroottree()
+        paths = {}
+        for elem in html.iter():
+            original = self._node_paths.path(elem)
+            if original is not None:
+                paths[tree.getpath(elem)] = original
+        return paths
+
     def get_article(self, candidates, best_candidate, html_partial=False):
         # Now that we have the top candidate, look through its siblings for
         # content that might also be related.
@@ -314,12 +619,13 @@ class Document:
                     append = True
 
             if append:
+                self._changed(sibling.getparent())
                 # We don't want to append directly to output, but the div
                 # in html->body->div
                 if html_partial:
-                    output.append(sibling)
+                    self._edits.append(output, sibling)
                 else:
-                    output.getchildren()[0].getchildren()[0].append(sibling)
+                    self._edits.append(output.getchildren()[0].getchildren()[0], sibling)
         # if output is not None:
         #    output.append(best_elem)
         return output
@@ -339,15 +645,31 @@ class Document:
         return best_candidate
 
     def get_link_density(self, elem):
-        link_length = 0
-        for i in elem.findall(".//a"):
-            link_length += text_length(i)
+        return self._link_density(elem)[0]
+
+    def _link_density(self, elem):
+        """Returns the link density, text length and comma count of `elem`
+        (of its raw text with the fast profile)."""
+        if not self.profile["clean_link_text"]:
+            text = elem.text_content()
+            link_length = sum(len(link) for link in elem.xpath(".//a//text()"))
+            return float(link_length) / max(len(text), 1), len(text), text.count(",")
+        if self._stats is not None:
+            link_length = self._stats.link_length(elem)
+        else:
+            link_length = 0
+            for i in elem.findall(".//a"):
+                link_length += text_length(i)
         # if len(elem.findall(".//div") or elem.findall(".//p")):
         #    link_length = link_length
-        total_length = text_length(elem)
-        return float(link_length) / max(total_length, 1)
+        total_length, commas = self._text_stats(elem)
+        return float(link_length) / max(total_length, 1), total_length, commas
 
     def score_paragraphs(self):
+        if self.scoring == "numpy":
+            from .vectorized import score_paragraphs
+
+            return score_paragraphs(self)
         MIN_LEN = self.min_text_length
         candidates = {}
         ordered = []
@@ -357,8 +679,7 @@ class Document:
                 continue
             grand_parent_node = parent_node.getparent()
 
-            inner_text = clean(elem.text_content() or "")
-            inner_text_len = len(inner_text)
+            inner_text_len, commas = self._text_stats(elem)
 
             # If this paragraph is less than 25 characters
             # don't even count it.
@@ -374,7 +695,7 @@ class Document:
                 ordered.append(grand_parent_node)
 
             content_score = 1
-            content_score += len(inner_text.split(","))
+            content_score += commas + 1
             content_score += min((inner_text_len / 100), 3)
             # if elem not in candidates:
             #    candidates[elem] = self.score_node(elem)
@@ -387,9 +708,11 @@ class Document:
         # Scale the final candidates score based on link density. Good content
         # should have a relatively small link density (5% or less) and be
         # mostly unaffected by this operation.
+        measured = {}
         for elem in ordered:
             candidate = candidates[elem]
-            ld = self.get_link_density(elem)
+            measured[elem] = self._link_density(elem)
+            ld = measured[elem][0]
             score = candidate["content_score"]
             log.debug(
                 "Branch %6.3f %s link density %.3f -> %6.3f"
@@ -397,8 +720,30 @@ class Document:
             )
             candidate["content_score"] *= 1 - ld
 
+        if self.record_features:
+            self._record_features(ordered, candidates, measured)
         return candidates
 
+    def _record_features(self, ordered, candidates, measured):
+        from .features import record
+
+        self._features = record(self, ordered, candidates, measured)
+
+    def features(self):
+        """Returns the features of the candidates of the last scoring pass
+        as a FeatureTable (see readability.features), scoring the document
+        first if summary() did not. Requires features=True.
+        """
+        if not self.record_features:
+            raise ValueError("features() requires Document(..., features=True)")
+        if self._features is None:
+            self._html(True)
+            if self.profile["drop_unlikely"]:
+                self.remove_unlikely_candidates()
+            self.transform_misused_divs_into_paragraphs()
+            self.score_paragraphs()
+        return self._features
+
     def class_weight(self, e):
         weight = 0
         for feature in [e.get("class", None), e.get("id", None)]:
@@ -447,7 +792,9 @@ class Document:
             content_score -= 5
         return {"content_score": content_score, "elem": elem}
 
-    def remove_unlikely_candidates(self):
+    def unlikely_candidates(self):
+        """Returns the elements which remove_unlikely_candidates() drops."""
+        unlikely = []
         for elem in self.html.findall(".//*"):
             s = "{} {}".format(elem.get("class", ""), elem.get("id", ""))
             if len(s) < 2:
@@ -457,43 +804,55 @@ class Document:
                 and (not REGEXES["okMaybeItsACandidateRe"].search(s))
                 and elem.tag not in ["html", "body"]
             ):
-                log.debug("Removing unlikely candidate - %s" % describe(elem))
-                elem.drop_tree()
+                unlikely.append(elem)
+        return unlikely
+
+    def remove_unlikely_candidates(self):
+        for elem in self.unlikely_candidates():
+            log.debug("Removing unlikely candidate - %s" % describe(elem))
+            elem.drop_tree()
 
     def transform_misused_divs_into_paragraphs(self):
+        # Elements with block elements below them, in one bottom-up pass
+        # (descendants come before their ancestors in reverse document
+        # order) rather than serializing the children of every <div>,
+        # which is quadratic in the nesting depth.
+        has_blocks = set()
+        for elem in reversed(list(self.html.iter())):
+            if elem in has_blocks or (
+                isinstance(elem.tag, str)
+                and REGEXES["divToPElementsRe"].match("<" + elem.tag)
+            ):
+                parent = elem.getparent()
+                if parent is not None:
+                    has_blocks.add(parent)
+
         for elem in self.tags(self.html, "div"):
             # transform <div>s that do not contain other block elements into
             # <p>s
-            # FIXME: The current implementation ignores all descendants that
-            # are not direct children of elem
-            # This results in incorrect results in case there is an <img>
-            # buried within an <a> for example
-            if not REGEXES["divToPElementsRe"].search(
-                str(b"".join(tostring(s, encoding='utf-8') for s in elem))
-                # str(b"".join(map(tostring_, list(elem))))
-            ):
+            if elem not in has_blocks:
                 # log.debug("Altering %s to p" % (describe(elem)))
-                elem.tag = "p"
+                self._edits.set_tag(elem, "p")
                 # print "Fixed element "+describe(elem)
 
         for elem in self.tags(self.html, "div"):
             if elem.text and elem.text.strip():
                 p = fragment_fromstring("<p/>")
                 p.text = elem.text
-                elem.text = None
-                elem.insert(0, p)
+                self._edits.set_text(elem, None)
+                self._edits.insert(elem, 0, p)
                 # print "Appended "+tounicode(p)+" to "+describe(elem)
 
             for pos, child in reversed(list(enumerate(elem))):
                 if child.tail and child.tail.strip():
                     p = fragment_fromstring("<p/>")
                     p.text = child.tail
-                    child.tail = None
-                    elem.insert(pos + 1, p)
+                    self._edits.set_tail(child, None)
+                    self._edits.insert(elem, pos + 1, p)
                     # print "Inserted "+tounicode(p)+" to "+describe(elem)
                 if child.tag == "br":
                     # print 'Dropped <br> at '+describe(elem)
-                    child.drop_tree()
+                    self._edits.drop_tree(child)
 
     def tags(self, node, *tag_names):
         for tag_name in tag_names:
@@ -505,18 +864,25 @@ class Document:
 
     def sanitize(self, node, candidates, keep_all_images=False):
         MIN_LEN = self.min_text_length
-        for header in self.tags(node, "h1", "h2", "h3", "h4", "h5", "h6"):
-            if self.class_weight(header) < 0 or self.get_link_density(header) > 0.33:
-                header.drop_tree()
+        headers_dropped = False
+        if self.scoring == "numpy":
+            from .vectorized import drop_headers
+
+            headers_dropped = drop_headers(self, node)
+        if not headers_dropped:
+            for header in self.tags(node, "h1", "h2", "h3", "h4", "h5", "h6"):
+                if self.class_weight(header) < 0 or self.get_link_density(header) > 0.33:
+                    self._drop(header)
 
         for elem in self.tags(node, "form", "textarea"):
-            elem.drop_tree()
+            self._drop(elem)
 
         for elem in self.tags(node, "iframe"):
             if "src" in elem.attrib and REGEXES["videoRe"].search(elem.attrib["src"]):
-                elem.text = "VIDEO"  # ADD content to iframe text node to force <iframe></iframe> proper output
+                self._edits.set_text(elem, "VIDEO")  # ADD content to iframe text node to force <iframe></iframe> proper output
+                self._changed(elem)
             else:
-                elem.drop_tree()
+                self._drop(elem)
 
         allowed = {}
         # Conditionally clean <table>s, <ul>s, and <div>s
@@ -538,16 +904,17 @@ class Document:
                     "Removed %s with score %6.3f and weight %-3s"
                     % (describe(el), content_score, weight,)
                 )
-                el.drop_tree()
-            elif el.text_content().count(",") < 10:
-                counts = {}
-                for kind in ["p", "img", "li", "a", "embed", "input"]:
-                    counts[kind] = len(el.findall(".//%s" % kind))
+                self._drop(el)
+            elif self._text_stats(el)[1] < 10:
+                # all the kinds in one walk of the block
+                counts = dict.fromkeys(MEDIA_KINDS, 0)
+                for descendant in el.iterdescendants(*MEDIA_KINDS):
+                    if descendant.tag != "input" or descendant.get("type") != "hidden":
+                        counts[descendant.tag] += 1
                 counts["li"] -= 100
-                counts["input"] -= len(el.findall('.//input[@type="hidden"]'))
 
                 # Count the text length excluding any surrounding whitespace
-                content_length = text_length(el)
+                content_length = self._text_stats(el)[0]
                 link_density = self.get_link_density(el)
                 parent_node = el.getparent()
                 if parent_node is not None:
@@ -628,32 +995,33 @@ class Document:
                     #                        for desnode in self.tags(el, "table", "ul", "div"):
                     #                            allowed[desnode] = True
 
-                    # find x non empty preceding and succeeding siblings
-                    i, j = 0, 0
-                    x = 1
-                    siblings = []
-                    for sib in el.itersiblings():
-                        # log.debug(sib.text_content())
-                        sib_content_length = text_length(sib)
-                        if sib_content_length:
-                            i = +1
-                            siblings.append(sib_content_length)
-                            if i == x:
-                                break
-                    for sib in el.itersiblings(preceding=True):
-                        # log.debug(sib.text_content())
-                        sib_content_length = text_length(sib)
-                        if sib_content_length:
-                            j = +1
-                            siblings.append(sib_content_length)
-                            if j == x:
-                                break
-                    # log.debug(str_(siblings))
-                    if siblings and sum(siblings) > 1000:
-                        to_remove = False
-                        log.debug("Allowing %s" % describe(el))
-                        for desnode in self.tags(el, "table", "ul", "div", "section"):
-                            allowed[desnode] = True
+                    if self.profile["sibling_scan"]:
+                        # find x non empty preceding and succeeding siblings
+                        i, j = 0, 0
+                        x = 1
+                        siblings = []
+                        for sib in el.itersiblings():
+                            # log.debug(sib.text_content())
+                            sib_content_length = self._text_stats(sib)[0]
+                            if sib_content_length:
+                                i = +1
+                                siblings.append(sib_content_length)
+                                if i == x:
+                                    break
+                        for sib in el.itersiblings(preceding=True):
+                            # log.debug(sib.text_content())
+                            sib_content_length = self._text_stats(sib)[0]
+                            if sib_content_length:
+                                j = +1
+                                siblings.append(sib_content_length)
+                                if j == x:
+                                    break
+                        # log.debug(str_(siblings))
+                        if siblings and sum(siblings) > 1000:
+                            to_remove = False
+                            log.debug("Allowing %s" % describe(el))
+                            for desnode in self.tags(el, "table", "ul", "div", "section"):
+                                allowed[desnode] = True
 
                 if to_remove:
                     log.debug(
@@ -662,7 +1030,7 @@ class Document:
                     )
                     # print tounicode(el)
                     # log.debug("pname %s pweight %.3f" %(pname, pweight))
-                    el.drop_tree()
+                    self._drop(el)
                 else:
                     log.debug(
                         "Not removing %s of length %s: %s"
@@ -678,7 +1046,7 @@ def main():
 
     from optparse import OptionParser
 
-    parser = OptionParser(usage="%prog: [options] [file]")
+    parser = OptionParser(usage="%prog: [options] [file ...]")
     parser.add_option("-v", "--verbose", action="count", default=0)
     parser.add_option(
         "-b", "--browser", default=None, action="store_true", help="open in browser"
@@ -704,6 +1072,49 @@ def main():
         help="negative keywords (comma-separated)",
         action="store",
     )
+    parser.add_option(
+        "--batch",
+        default=False,
+        action="store_true",
+        help="extract every file, directory or glob given (- reads paths from stdin), writing JSONL",
+    )
+    parser.add_option(
+        "--jsonl",
+        default=False,
+        action="store_true",
+        help="read JSONL records with html/url fields from stdin, writing JSONL",
+    )
+    parser.add_option(
+        "-j", "--jobs", default=1, type="int", help="number of worker processes in batch mode"
+    )
+    parser.add_option(
+        "--parser",
+        default=None,
+        help="HTML parser backend: lxml (default), html5-parser or html5lib",
+    )
+    parser.add_option(
+        "--cache",
+        default=None,
+        help="directory to cache fetched pages and their extractions in (with -u)",
+    )
+    parser.add_option(
+        "--pages",
+        default=1,
+        type="int",
+        help="follow the article over up to this many pages (with -u)",
+    )
+    parser.add_option(
+        "--article-threshold",
+        default=None,
+        type="float",
+        help="in batch mode, skip pages less likely an article than this (0 to 1)",
+    )
+    parser.add_option(
+        "--profile",
+        default=None,
+        metavar="PREFIX",
+        help="profile the extraction by readability function into PREFIX.txt and PREFIX.folded",
+    )
     (options, args) = parser.parse_args()
 
     if options.verbose:
@@ -713,34 +1124,95 @@ def main():
             format="%(asctime)s: %(levelname)s: %(message)s (at %(filename)s: %(lineno)d)",
         )
 
+    if not options.profile:
+        return run_cli(parser, options, args)
+
+    from .profiling import profiling
+
+    if options.jobs > 1:
+        log.warning("profiling runs the batch in this process, ignoring --jobs")
+        options.jobs = 1
+    with profiling() as profile:
+        run_cli(parser, options, args)
+    profile.write_report(options.profile + ".txt")
+    profile.write_stacks(options.profile + ".folded")
+
+
+def run_cli(parser, options, args):
+    if options.batch or options.jsonl:
+        from .batch import iter_jsonl_tasks
+        from .batch import iter_path_tasks
+        from .batch import iter_paths
+        from .batch import run
+        from .batch import write_jsonl
+
+        if options.jsonl:
+            tasks = iter_jsonl_tasks(sys.stdin)
+        else:
+            tasks = iter_path_tasks(iter_paths(args or ["-"], sys.stdin))
+        doc_options = {
+            "positive_keywords": options.positive_keywords,
+            "negative_keywords": options.negative_keywords,
+            "parser": options.parser,
+            "article_threshold": options.article_threshold,
+        }
+        write_jsonl(run(tasks, jobs=options.jobs, options=doc_options), sys.stdout)
+        return
+
     if not (len(args) == 1 or options.url):
         parser.print_help()
         sys.exit(1)
 
-    file = None
-    if options.url:
-        headers = {"User-Agent": "Mozilla/5.0"}
-        request = urllib.request.Request(options.url, None, headers)
-        file = urllib.request.urlopen(request)
-    else:
-        file = open(args[0])
-    try:
-        doc = Document(
-            file.read(),
-            url=options.url,
+    if options.url and options.pages > 1:
+        from .fetch import Fetcher
+        from .pagination import assemble
+
+        summary, urls = assemble(
+            options.url,
+            fetch=Fetcher(options.cache),
+            max_pages=options.pages,
             positive_keywords=options.positive_keywords,
             negative_keywords=options.negative_keywords,
+            parser=options.parser,
         )
+        log.info("assembled %s", " ".join(urls))
         if options.browser:
             from .browser import open_in_browser
 
-            result = "<h2>" + doc.short_title() + "</h2><br/>" + doc.summary()
-            open_in_browser(result)
+            open_in_browser(summary)
         else:
-            result = "Title:" + doc.short_title() + "\n" + doc.summary()
-            print(result)
-    finally:
-        file.close()
+            print(summary)
+        return
+
+    if options.url:
+        from .fetch import Fetcher
+        from .fetch import extract_url
+
+        fetched = extract_url(
+            options.url,
+            Fetcher(options.cache),
+            positive_keywords=options.positive_keywords,
+            negative_keywords=options.negative_keywords,
+            parser=options.parser,
+        )
+        short_title, summary = fetched.short_title or "", fetched.summary
+    else:
+        with open(args[0], "rb") as file:
+            doc = Document(
+                file.read(),
+                positive_keywords=options.positive_keywords,
+                negative_keywords=options.negative_keywords,
+                parser=options.parser,
+            )
+            short_title, summary = doc.short_title(), doc.summary()
+    if options.browser:
+        from .browser import open_in_browser
+
+        result = "<h2>" + short_title + "</h2><br/>" + summary
+        open_in_browser(result)
+    else:
+        result = "Title:" + short_title + "\n" + summary
+        print(result)
 
 
 if __name__ == "__main__":
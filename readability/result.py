@@ -0,0 +1,174 @@
+"""Extraction results which are cheap to move between processes.
+
+A Result holds the extracted fields only, never the input or the lxml
+tree, and pickles as a single length-prefixed byte string::
+
+    b"RDR1" | per text field: uint32 length (0xffffffff for None), UTF-8 |
+    degraded: uint8 (2 for None) | uint16 timing count, per timing:
+    uint16 name length, name, float64 seconds
+
+The summary is kept as UTF-8 bytes; ``summary_bytes`` hands them out
+without copying, also straight out of the buffer given to ``from_bytes``.
+"""
+import struct
+
+
+MAGIC = b"RDR1"
+NONE = 0xFFFFFFFF
+TEXT_FIELDS = ("source", "url", "title", "short_title", "author", "summary", "encoding", "error")
+FIELDS = TEXT_FIELDS[:-1] + ("degraded", "error", "timings")
+
+_length = struct.Struct("<I")
+_count = struct.Struct("<H")
+_flag = struct.Struct("<B")
+_seconds = struct.Struct("<d")
+
+
+class Result:
+    """What was extracted from one document.
+
+    Fields which are None count as absent, so a Result can also be read
+    like the dicts which batch.extract() used to return: ``result["title"]``,
+    ``"error" in result``, ``dict(result)``.
+    """
+
+    __slots__ = (
+        "source",
+        "url",
+        "title",
+        "short_title",
+        "author",
+        "_summary",
+        "encoding",
+        "degraded",
+        "error",
+        "timings",
+    )
+
+    def __init__(
+        self,
+        source=None,
+        url=None,
+        title=None,
+        short_title=None,
+        author=None,
+        summary=None,
+        encoding=None,
+        degraded=None,
+        error=None,
+        timings=None,
+    ):
+        self.source = source
+        self.url = url
+        self.title = title
+        self.short_title = short_title
+        self.author = author
+        self.summary = summary
+        self.encoding = encoding
+        self.degraded = degraded
+        self.error = error
+        self.timings = timings
+
+    @property
+    def summary(self):
+        if self._summary is None:
+            return None
+        return str(self._summary, "utf-8")
+
+    @summary.setter
+    def summary(self, value):
+        self._summary = value.encode("utf-8") if isinstance(value, str) else value
+
+    @property
+    def summary_bytes(self):
+        """The UTF-8 encoded summary as a memoryview (not a copy)."""
+        if self._summary is None:
+            return None
+        return memoryview(self._summary)
+
+    def to_bytes(self):
+        parts = [MAGIC]
+        for name in TEXT_FIELDS:
+            value = self._summary if name == "summary" else getattr(self, name)
+            if value is None:
+                parts.append(_length.pack(NONE))
+                continue
+            if isinstance(value, str):
+                value = value.encode("utf-8")
+            parts.append(_length.pack(len(value)))
+            parts.append(value)
+        parts.append(_flag.pack(2 if self.degraded is None else int(self.degraded)))
+        timings = self.timings or {}
+        parts.append(_count.pack(len(timings)))
+        for name, seconds in timings.items():
+            name = name.encode("utf-8")
+            parts.append(_count.pack(len(name)))
+            parts.append(name)
+            parts.append(_seconds.pack(seconds))
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Reads what to_bytes() wrote. The summary stays a view of `data`."""
+        data = memoryview(data)
+        if data[:4] != MAGIC:
+            raise ValueError("not a serialized Result")
+        pos = 4
+        values = {}
+        for name in TEXT_FIELDS:
+            (length,) = _length.unpack_from(data, pos)
+            pos += _length.size
+            if length == NONE:
+                values[name] = None
+                continue
+            value = data[pos:pos + length]
+            pos += length
+            values[name] = value if name == "summary" else str(value, "utf-8")
+        (degraded,) = _flag.unpack_from(data, pos)
+        pos += _flag.size
+        (count,) = _count.unpack_from(data, pos)
+        pos += _count.size
+        timings = {}
+        for _ in range(count):
+            (length,) = _count.unpack_from(data, pos)
+            pos += _count.size
+            name = str(data[pos:pos + length], "utf-8")
+            pos += length
+            (timings[name],) = _seconds.unpack_from(data, pos)
+            pos += _seconds.size
+        return cls(
+            degraded=None if degraded == 2 else bool(degraded),
+            timings=timings if count else None,
+            **values
+        )
+
+    def __reduce__(self):
+        return (self.from_bytes, (self.to_bytes(),))
+
+    def to_dict(self):
+        return {name: self[name] for name in self.keys()}
+
+    def keys(self):
+        return [name for name in FIELDS if getattr(self, name) is not None]
+
+    def __getitem__(self, name):
+        if name not in FIELDS:
+            raise KeyError(name)
+        value = getattr(self, name)
+        if value is None:
+            raise KeyError(name)
+        return value
+
+    def __contains__(self, name):
+        return name in FIELDS and getattr(self, name) is not None
+
+    def get(self, name, default=None):
+        return self[name] if name in self else default
+
+    def __eq__(self, other):
+        if not isinstance(other, Result):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return "<Result %s%s>" % (self.source, " error" if self.error else "")
@@ -0,0 +1,339 @@
+"""A long-running extraction server, for callers which are not Python.
+
+    python -m readability.server [--port 8000 | --socket PATH] [--jobs N]
+
+Worker processes are started once, with lxml, the cleaner and the charset
+detector already loaded, and serve requests over localhost HTTP or a Unix
+socket:
+
+POST /extract with a JSON object:
+
+    html      the page (or "url" alone, to have the worker fetch it)
+    url       used to resolve links, and to fetch the page without "html"
+    charset   the charset of the page, if known
+    timeout   seconds the caller waits at most (default --timeout)
+    options   Document options for this request, see REQUEST_OPTIONS
+
+answers with the JSON of the Result (as in batch mode), 504 when the
+deadline passed, 503 when more than --max-queue extractions are waiting
+for a worker.
+
+An extraction can't be interrupted: when the deadline passes while it
+runs, the request is answered with 504 but the extraction keeps its worker
+until it is done, and meanwhile counts as running (and "abandoned").
+
+GET /metrics gives request counts, a latency histogram, and the numbers of
+requests in flight, of extractions running (abandoned ones included) and
+of extractions waiting for a worker, in the Prometheus text format;
+GET /health answers "ok".
+"""
+import json
+import logging
+import os
+import socketserver
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+
+from .batch import extract
+from .result import Result
+
+
+log = logging.getLogger("readability.server")
+
+TIMEOUT = 30.0
+MAX_QUEUE = 100
+MAX_BODY = 64 * 1024 * 1024
+# Document options a request may set
+REQUEST_OPTIONS = frozenset(
+    [
+        "positive_keywords",
+        "negative_keywords",
+        "min_text_length",
+        "retry_length",
+        "handle_failures",
+        "profile",
+        "scoring",
+        "parser",
+        "article_threshold",
+    ]
+)
+QUEUED_TOO_LONG = "deadline passed while queued"
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+
+_fetcher = None
+
+
+def warm_up():
+    """Runs once in every worker, so that requests don't pay for imports."""
+    global _fetcher
+    from .encoding import get_detector
+    from .fetch import Fetcher
+    from .readability import Document
+
+    try:
+        get_detector()
+    except ImportError:
+        pass
+    Document("<html><body><div><p>%s</p></div></body></html>" % ("Warm, up. " * 10)).summary()
+    _fetcher = Fetcher()
+
+
+def work(task, options, deadline):
+    """Extracts one task in a worker, fetching its URL if there is no html."""
+    if time.time() > deadline:
+        return Result(source=task["source"], url=task["url"], error=QUEUED_TOO_LONG)
+    if "html" not in task:
+        if _fetcher is None:
+            warm_up()
+        try:
+            response = _fetcher.fetch(task["url"])
+        except Exception as e:
+            return Result(source=task["source"], url=task["url"], error="fetch failed: %s" % e)
+        charset = task.get("charset") or response.charset
+        task = dict(task, html=response.body, url=response.url, charset=charset)
+    return extract(task, options)
+
+
+class Metrics:
+    """Counters for /metrics."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.responses = {}
+        self.buckets = [0] * len(BUCKETS)
+        self.latency_sum = 0.0
+        self.latency_count = 0
+        self.in_flight = 0
+
+    def enter(self):
+        with self.lock:
+            self.in_flight += 1
+
+    def leave(self, status, seconds):
+        with self.lock:
+            self.in_flight -= 1
+            self.responses[status] = self.responses.get(status, 0) + 1
+            self.latency_sum += seconds
+            self.latency_count += 1
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    self.buckets[i] += 1
+
+    def render(self, running=0, queued=0, abandoned=0):
+        """The metrics, with the numbers of extractions of the pool."""
+        with self.lock:
+            lines = [
+                "# TYPE readability_requests_total counter",
+            ]
+            for status, count in sorted(self.responses.items()):
+                lines.append('readability_requests_total{status="%d"} %d' % (status, count))
+            lines.append("# TYPE readability_request_seconds histogram")
+            for bound, count in zip(BUCKETS, self.buckets):
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append('readability_request_seconds_bucket{le="%s"} %d' % (le, count))
+            lines.append("readability_request_seconds_sum %f" % self.latency_sum)
+            lines.append("readability_request_seconds_count %d" % self.latency_count)
+            lines.append("# TYPE readability_requests_in_flight gauge")
+            lines.append("readability_requests_in_flight %d" % self.in_flight)
+            lines.append("# TYPE readability_running gauge")
+            lines.append("readability_running %d" % running)
+            lines.append("# TYPE readability_abandoned gauge")
+            lines.append("readability_abandoned %d" % abandoned)
+            lines.append("# TYPE readability_queue_depth gauge")
+            lines.append("readability_queue_depth %d" % queued)
+            lines.append("# TYPE readability_uptime_seconds gauge")
+            lines.append("readability_uptime_seconds %f" % (time.time() - self.started))
+        return "\n".join(lines) + "\n"
+
+
+class Extractor:
+    """The worker pool, the defaults of the requests, and the metrics."""
+
+    def __init__(self, jobs=1, options=None, timeout=TIMEOUT, max_queue=MAX_QUEUE):
+        self.pool = ProcessPoolExecutor(max_workers=jobs, initializer=warm_up)
+        self.options = options or {}
+        self.timeout = timeout
+        self.max_queue = max_queue
+        self.metrics = Metrics()
+        self.lock = threading.Lock()
+        # extractions in the pool, and those whose request timed out
+        self.futures = set()
+        self.abandoned = set()
+
+    def close(self):
+        # the queued requests are dropped (cancel_futures needs 3.9)
+        with self.lock:
+            futures = list(self.futures)
+        for future in futures:
+            future.cancel()
+        self.pool.shutdown()
+
+    def _done(self, future):
+        with self.lock:
+            self.futures.discard(future)
+            self.abandoned.discard(future)
+
+    def load(self):
+        """Returns the numbers of extractions running (handed to a worker),
+        abandoned (running after their deadline) and waiting for a worker."""
+        with self.lock:
+            futures = list(self.futures)
+            abandoned = len(self.abandoned)
+        running = sum(1 for future in futures if future.running())
+        return running, len(futures) - running, abandoned
+
+    def render_metrics(self):
+        running, queued, abandoned = self.load()
+        return self.metrics.render(running, queued, abandoned)
+
+    def request(self, request):
+        """Returns the HTTP status and the JSON answer to a request."""
+        started = time.monotonic()
+        status, answer = 500, {"error": "internal error"}
+        self.metrics.enter()
+        try:
+            status, answer = self._request(request)
+        finally:
+            self.metrics.leave(status, time.monotonic() - started)
+        return status, answer
+
+    def _request(self, request):
+        if not isinstance(request, dict) or not (request.get("html") or request.get("url")):
+            return 400, {"error": "a JSON object with html or url is required"}
+        options = request.get("options") or {}
+        unknown = set(options) - REQUEST_OPTIONS
+        if unknown:
+            return 400, {"error": "unknown options: %s" % ", ".join(sorted(unknown))}
+        # abandoned extractions still hold their workers, so the queue
+        # grows behind them as well
+        if self.load()[1] >= self.max_queue:
+            return 503, {"error": "too many queued requests"}
+        try:
+            timeout = float(request.get("timeout") or self.timeout)
+        except (TypeError, ValueError):
+            return 400, {"error": "bad timeout"}
+
+        task = {"source": request.get("id") or request.get("url") or "request", "url": request.get("url")}
+        if request.get("html"):
+            task["html"] = request["html"]
+        task["charset"] = request.get("charset")
+        future = self.pool.submit(work, task, dict(self.options, **options), time.time() + timeout)
+        with self.lock:
+            self.futures.add(future)
+        future.add_done_callback(self._done)
+        try:
+            result = future.result(timeout=timeout)
+        except TimeoutError:
+            # a running extraction can't be interrupted, a queued one is skipped
+            if not future.cancel():
+                with self.lock:
+                    if not future.done():
+                        self.abandoned.add(future)
+            return 504, {"source": task["source"], "error": "deadline of %ss passed" % timeout}
+        return 504 if result.error == QUEUED_TOO_LONG else 200, result.to_dict()
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        extractor = self.server.extractor
+        if self.path == "/metrics":
+            self.reply(200, extractor.render_metrics(), "text/plain; version=0.0.4")
+        elif self.path == "/health":
+            self.reply(200, "ok\n", "text/plain")
+        else:
+            self.reply(404, json.dumps({"error": "not found"}))
+
+    def do_POST(self):
+        if self.path != "/extract":
+            return self.reply(404, json.dumps({"error": "not found"}))
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY:
+            self.close_connection = True
+            return self.reply(413, json.dumps({"error": "request too large"}))
+        try:
+            request = json.loads(self.rfile.read(length))
+        except ValueError as e:
+            return self.reply(400, json.dumps({"error": "bad JSON: %s" % e}))
+        status, answer = self.server.extractor.request(request)
+        self.reply(status, json.dumps(answer, ensure_ascii=False))
+
+    def reply(self, status, body, content_type="application/json"):
+        body = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # client_address is empty on Unix sockets
+        log.debug(format, *args)
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def make_server(extractor, port=None, host="127.0.0.1", socket_path=None):
+    """Returns an HTTP server for `extractor` (not started yet)."""
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        server = UnixHTTPServer(socket_path, Handler)
+    else:
+        server = ThreadingHTTPServer((host, port or 0), Handler)
+        server.daemon_threads = True
+    server.extractor = extractor
+    return server
+
+
+def main():
+    from optparse import OptionParser
+
+    parser = OptionParser(usage="%prog: [options]")
+    parser.add_option("--host", default="127.0.0.1")
+    parser.add_option("--port", default=8000, type="int")
+    parser.add_option("--socket", default=None, help="listen on this Unix socket instead")
+    parser.add_option("-j", "--jobs", default=os.cpu_count() or 1, type="int")
+    parser.add_option("--timeout", default=TIMEOUT, type="float", help="default deadline, seconds")
+    parser.add_option("--max-queue", default=MAX_QUEUE, type="int", help="extractions waiting for a worker")
+    parser.add_option("-p", "--positive-keywords", default=None)
+    parser.add_option("-n", "--negative-keywords", default=None)
+    parser.add_option("--min-text-length", default=None, type="int")
+    parser.add_option("--extraction-profile", default=None, help="full or fast, see Document(profile=...)")
+    parser.add_option("-v", "--verbose", default=False, action="store_true")
+    (options, args) = parser.parse_args()
+
+    logging.basicConfig(level=logging.DEBUG if options.verbose else logging.INFO)
+    defaults = {
+        "positive_keywords": options.positive_keywords,
+        "negative_keywords": options.negative_keywords,
+        "min_text_length": options.min_text_length,
+        "profile": options.extraction_profile,
+    }
+    defaults = {name: value for name, value in defaults.items() if value is not None}
+    extractor = Extractor(options.jobs, defaults, options.timeout, options.max_queue)
+    server = make_server(extractor, options.port, options.host, options.socket)
+    log.info("serving on %s with %d workers", options.socket or "%s:%d" % server.server_address, options.jobs)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        extractor.close()
+        if options.socket and os.path.exists(options.socket):
+            os.unlink(options.socket)
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Many configurations of one page, from a single parse.
+
+    results = sweep(html, [
+        {"min_text_length": 25},
+        {"min_text_length": 50, "negative_keywords": ["teaser", "promo"]},
+    ], url=url)
+
+Tuning positive_keywords, negative_keywords, min_text_length or
+retry_length for a site takes one extraction per configuration, and each
+of them parses and cleans the page and measures the text of its subtrees
+all over again. sweep() parses and cleans once: every configuration starts
+from a copy of that tree (copying is much cheaper than parsing), the
+unlikely candidates (which no option changes) are looked for once, and
+all of them share one incremental.SubtreeStats, so a subtree with the same
+tags and text is measured once for all of them.
+
+Every result is what Document(input, **options, **config).result() gives.
+"""
+import copy
+import time
+
+from .htmls import get_author
+from .htmls import get_title
+from .htmls import shorten_title
+from .incremental import SubtreeStats
+from .readability import Document
+from .result import Result
+
+
+# Document options which may differ between the configurations
+SWEEP_OPTIONS = frozenset(
+    [
+        "positive_keywords",
+        "negative_keywords",
+        "min_text_length",
+        "retry_length",
+        "handle_failures",
+        "profile",
+        "scoring",
+    ]
+)
+# and those which shape the parse, the same for all of them
+PARSE_OPTIONS = frozenset(["url", "encoding_hint", "encoding_cache", "parser", "xpath", "incremental"])
+
+
+class _SweepDocument(Document):
+    """A Document which starts from a copy of the tree of `base`."""
+
+    def __init__(self, base, stats, unlikely, **options):
+        super().__init__(base.input, url=base.url, xpath=base.xpath, **options)
+        self._base = base
+        self._stats = stats
+        self._unlikely = unlikely
+
+    def _parse(self, input):
+        self.encoding = self._base.encoding
+        self.base_href = self._base.base_href
+        return copy.deepcopy(self._base.html)
+
+    def unlikely_candidates(self):
+        # only called on a fresh copy, where the positions are those of base
+        elems = list(self.html.iter())
+        return [elems[i] for i in self._unlikely]
+
+
+def sweep(input, configs, html_partial=False, keep_all_images=False, **options):
+    """Returns a Result for each configuration (a dict of SWEEP_OPTIONS) in
+    `configs`, extracting `input` with `options` and the configuration.
+    A configuration whose extraction fails gets a Result with the error.
+    """
+    configs = list(configs)
+    unknown = set(options) - SWEEP_OPTIONS - PARSE_OPTIONS
+    if unknown:
+        raise ValueError("options not supported by sweep(): %s" % ", ".join(sorted(unknown)))
+    for config in configs:
+        unknown = set(config) - SWEEP_OPTIONS
+        if unknown:
+            raise ValueError(
+                "options which can't differ per configuration: %s" % ", ".join(sorted(unknown))
+            )
+    # an earlier state() is welcome, but the statistics are always shared
+    incremental = options.pop("incremental", True)
+    stats = SubtreeStats(None if incremental in (True, False, None) else incremental)
+
+    base = Document(input, **options)
+    started = time.perf_counter()
+    tree = base._html(True)
+    parse_time = time.perf_counter() - started
+    title = get_title(tree)
+    short_title = shorten_title(tree)
+    author = get_author(tree)
+    positions = {elem: i for i, elem in enumerate(tree.iter())}
+    unlikely = [positions[elem] for elem in base.unlikely_candidates()]
+
+    shared = {name: value for name, value in options.items() if name in SWEEP_OPTIONS}
+    results = []
+    for config in configs:
+        started = time.perf_counter()
+        try:
+            doc = _SweepDocument(base, stats, unlikely, **dict(shared, **config))
+            summary = doc.summary(html_partial, keep_all_images)
+        except Exception as e:
+            result = Result(url=base.url, error="{}: {}".format(type(e).__name__, e), timings={})
+        else:
+            result = Result(
+                url=base.url,
+                title=title,
+                short_title=short_title,
+                author=author,
+                summary=summary,
+                encoding=base.encoding,
+                degraded=doc.degraded,
+                timings={},
+            )
+        result.timings["parse"] = parse_time
+        result.timings["summary"] = time.perf_counter() - started
+        results.append(result)
+    return results
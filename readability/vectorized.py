@@ -0,0 +1,247 @@
+"""NumPy backend for the scoring passes, used with Document(scoring="numpy").
+
+One walk of the tree joins all of its text into a single string and notes,
+for every element, where its text starts and ends in it, its parent and
+its last descendant. All the rest but the class weights of the candidates
+(regex searches, done once per tag, class and id) is array arithmetic on
+that: the normalized text lengths and comma counts of all the elements
+come from the positions of the whitespace runs and the commas in the text,
+the link text lengths from prefix sums over the elements, and the scores
+are propagated to the parents and grandparents and scaled by the link
+densities as whole arrays. The additions are applied in the same order as
+in the pure-Python code, so the scores are identical, not just close.
+"""
+import logging
+
+import numpy as np
+from lxml import etree
+
+from .debug import describe
+from .readability import normalize_space
+
+
+log = logging.getLogger("readability.vectorized")
+
+HEADERS = ("h1", "h2", "h3", "h4", "h5", "h6")
+# str.strip() and the \s of re both go by str.isspace(), by code point; the
+# last entry stands for everything above U+3000, the last whitespace
+WHITESPACE = np.array([chr(c).isspace() for c in range(0x3002)])
+
+
+def _prefix(values):
+    return np.concatenate(([0], np.cumsum(values)))
+
+
+def _count(positions, starts, ends):
+    """How many of the sorted `positions` are in [starts, ends)."""
+    return np.searchsorted(positions, ends) - np.searchsorted(positions, starts)
+
+
+class TreeArrays:
+    """Features of all the elements of the tree below `root` (itself
+    included), in document order, as arrays."""
+
+    def __init__(self, doc, root):
+        self.doc = doc
+        self.elems = elems = []
+        parents = []
+        starts = []
+        closed = []
+        pieces = []
+        offset = 0
+        stack = []
+        # clean_tree() leaves no comments or processing instructions, which
+        # iterwalk() would skip, and their tails with them
+        for event, el in etree.iterwalk(root, events=("start", "end")):
+            if event == "start":
+                parents.append(stack[-1] if stack else -1)
+                stack.append(len(elems))
+                elems.append(el)
+                starts.append(offset)
+                text = el.text
+                if text:
+                    pieces.append(text)
+                    offset += len(text)
+            else:
+                # the text of el ends before its tail, which is its parent's
+                closed.append((stack.pop(), offset, len(elems) - 1))
+                tail = el.tail
+                if tail and stack:
+                    pieces.append(tail)
+                    offset += len(tail)
+
+        self.text = text = "".join(pieces)
+        self.tags = np.array([el.tag for el in elems])
+        self.parents = np.array(parents, dtype=np.intp)
+        self.starts = starts = np.array(starts, dtype=np.intp)
+        closed = np.array(closed, dtype=np.intp)
+        self.ends = ends = np.empty_like(starts)
+        ends[closed[:, 0]] = closed[:, 1]
+        self.lasts = np.empty_like(starts)
+        self.lasts[closed[:, 0]] = closed[:, 2]
+
+        codes = np.frombuffer(text.encode("utf-32-le", "surrogatepass"), dtype=np.uint32)
+        self.commas = _count(np.flatnonzero(codes == ord(",")), starts, ends)
+        self.raw_lengths = ends - starts
+        self.lengths = self._normalized_lengths(codes)
+
+    def _normalized_lengths(self, codes):
+        """The lengths normalize_text() gives for the text of every element:
+        the ends are stripped, and every whitespace run within shrinks as
+        normalize_space() has it."""
+        starts, ends = self.starts, self.ends
+        space = WHITESPACE[np.minimum(codes, len(WHITESPACE) - 1)]
+        solid = np.flatnonzero(~space)
+        if not len(solid):
+            return np.zeros(len(starts), dtype=np.intp)
+        # the stripped text runs from its first to its last non-space
+        first = np.searchsorted(solid, starts)
+        last = np.searchsorted(solid, ends) - 1
+        empty = first > last
+        first = solid[np.minimum(first, len(solid) - 1)]
+        last = solid[np.maximum(last, 0)] + 1
+
+        # the runs within the stripped text are whole runs of the joined text
+        bounded = np.concatenate(([False], space, [False]))
+        run_starts = np.flatnonzero(bounded[1:] & ~bounded[:-1])
+        run_ends = np.flatnonzero(bounded[:-1] & ~bounded[1:])
+        run_lengths = run_ends - run_starts
+        to_one = (
+            (run_lengths >= 255)
+            | (_count(np.flatnonzero(codes == ord("\n")), run_starts, run_ends) > 0)
+            | (_count(np.flatnonzero(space & (codes != ord(" "))), run_starts, run_ends) == 0)
+        )
+        saved = np.where(to_one, run_lengths - 1, 0)
+        # tabs mixed with other whitespace
+        for k in np.flatnonzero(~to_one & (run_lengths > 1)):
+            run = self.text[run_starts[k]:run_ends[k]]
+            saved[k] = len(run) - len(normalize_space(run))
+        saved = _prefix(saved)
+        lengths = (last - first) - (
+            saved[np.searchsorted(run_starts, last)] - saved[np.searchsorted(run_starts, first)]
+        )
+        return np.where(empty, 0, lengths)
+
+    def _by_class(self, idx, func):
+        # the same for all the elements with the same tag, class and id
+        values = []
+        cache = {}
+        for i in idx:
+            elem = self.elems[i]
+            key = (elem.tag, elem.get("class"), elem.get("id"))
+            value = cache.get(key)
+            if value is None:
+                value = cache[key] = func(elem)
+            values.append(value)
+        return np.array(values, dtype=float)
+
+    def class_weights(self, idx):
+        return self._by_class(idx, self.doc.class_weight)
+
+    def node_scores(self, idx):
+        """The scores Document.score_node() starts the elements `idx` with."""
+        return self._by_class(idx, lambda elem: self.doc.score_node(elem)["content_score"])
+
+    def link_lengths(self, idx):
+        """The link text lengths Document._link_density() measures for the
+        elements `idx`, and the text lengths it divides them by."""
+        doc = self.doc
+        if doc.profile["clean_link_text"]:
+            # the normalized texts of all the <a>s below, nested ones twice
+            below = _prefix(np.where(self.tags == "a", self.lengths, 0))
+            return below[self.lasts[idx] + 1] - below[idx + 1], self.lengths[idx]
+        # the raw text inside <a>s below, every character once: the <a>s
+        # which are not inside another one do not overlap
+        is_link = self.tags == "a"
+        in_link = np.zeros(len(self.elems) + 1, dtype=np.intp)
+        np.add.at(in_link, np.flatnonzero(is_link), 1)
+        np.add.at(in_link, self.lasts[is_link] + 1, -1)
+        in_link = np.cumsum(in_link[:-1]) > 0
+        outer = is_link & ~np.concatenate(([False], in_link))[self.parents + 1]
+        below = _prefix(np.where(outer, self.raw_lengths, 0))
+        lengths = below[self.lasts[idx] + 1] - below[idx + 1]
+        # inside an <a> (or being one), the <a>s below may be nested ones
+        for k in np.flatnonzero(in_link[idx]):
+            elem = self.elems[idx[k]]
+            lengths[k] = sum(len(text) for text in elem.xpath(".//a//text()"))
+        return lengths, self.raw_lengths[idx]
+
+    def link_densities(self, idx):
+        links, totals = self.link_lengths(idx)
+        return links / np.maximum(totals, 1).astype(float), totals
+
+
+def score_paragraphs(doc):
+    """Same as Document.score_paragraphs."""
+    MIN_LEN = doc.min_text_length
+    tree = TreeArrays(doc, doc._html())
+    paragraphs = np.concatenate([np.flatnonzero(tree.tags == tag) for tag in ("p", "pre", "td")])
+    parents = tree.parents[paragraphs]
+    keep = (parents >= 0) & (tree.lengths[paragraphs] >= MIN_LEN)
+    paragraphs, parents = paragraphs[keep], parents[keep]
+
+    if not len(paragraphs):
+        if doc.record_features:
+            doc._record_features([], {}, {})
+        return {}
+
+    # parent, grandparent, parent, grandparent...: np.add.at adds one by one
+    # in this order, so the floating point sums come out as in Python
+    targets = np.column_stack((parents, tree.parents[parents])).ravel()
+    found = targets >= 0
+    nodes, first = np.unique(targets[found], return_index=True)
+    ordered = nodes[np.argsort(first)]
+    ordinals = np.empty(len(tree.elems), dtype=np.intp)
+    ordinals[ordered] = np.arange(len(ordered))
+
+    content_scores = (2 + tree.commas[paragraphs]) + np.minimum(tree.lengths[paragraphs] / 100, 3)
+    contributions = np.repeat(content_scores, 2)
+    contributions[1::2] /= 2.0
+    scores = tree.node_scores(ordered)
+    np.add.at(scores, ordinals[targets[found]], contributions[found])
+
+    densities, totals = tree.link_densities(ordered)
+    elems = [tree.elems[i] for i in ordered]
+    if log.isEnabledFor(logging.DEBUG):
+        for elem, score, ld in zip(elems, scores, densities):
+            log.debug(
+                "Branch %6.3f %s link density %.3f -> %6.3f"
+                % (score, describe(elem), ld, score * (1 - ld))
+            )
+    scores *= 1 - densities
+
+    candidates = {
+        elem: {"content_score": score, "elem": elem}
+        for elem, score in zip(elems, scores.tolist())
+    }
+    if doc.record_features:
+        measured = {
+            elem: measures
+            for elem, measures in zip(
+                elems, zip(densities.tolist(), totals.tolist(), tree.commas[ordered].tolist())
+            )
+        }
+        doc._record_features(elems, candidates, measured)
+    return candidates
+
+
+def drop_headers(doc, node):
+    """The header pass of Document.sanitize.
+
+    Dropping a header changes the link density of the headers around it,
+    so nested headers are left to the sequential code; returns False then.
+    """
+    tree = TreeArrays(doc, node)
+    # as node.findall() finds them, all the <h1>s first
+    headers = np.concatenate([np.flatnonzero(tree.tags[1:] == tag) + 1 for tag in HEADERS])
+    if not len(headers):
+        return True
+    # a header has another one below it if the next one in document order is
+    in_order = np.sort(headers)
+    if np.any(in_order[1:] <= tree.lasts[in_order[:-1]]):
+        return False
+    densities = tree.link_densities(headers)[0]
+    drop = (tree.class_weights(headers) < 0) | (densities > 0.33)
+    for i in headers[drop]:
+        doc._drop(tree.elems[i])
+    return True
@@ -0,0 +1,429 @@
+"""Streaming extraction from WARC and WARC.gz archives.
+
+Records are read one at a time, both from plain WARC files and from the
+usual gzip-per-record WARC.gz files, so memory use does not depend on the
+archive size. Only successful HTML responses are handed to the extractor,
+with the charset of the HTTP Content-Type header as encoding hint.
+
+An index of record offsets can be built once and stored next to the
+archive. Shards of the archive are then processed by independent workers
+which seek straight to their first record::
+
+    python -m readability.warc --index crawl.warc.gz
+    python -m readability.warc --shard 3/8 crawl.warc.gz > part-3.jsonl
+"""
+import json
+import logging
+import os
+import re
+import sys
+import uuid
+import zlib
+from datetime import datetime
+from datetime import timezone
+
+
+log = logging.getLogger("readability.warc")
+
+CHUNK_SIZE = 64 * 1024
+GZIP_MAGIC = b"\x1f\x8b"
+HTML_TYPES = ("text/html", "application/xhtml+xml")
+RE_CHARSET = re.compile(r"""charset=["']?([^"';\s]+)""", re.I)
+
+
+class WarcRecord:
+    """A single WARC record.
+
+    `offset` is where the record (or its gzip member) starts in the file,
+    `headers` maps lower-cased WARC header names to values.
+    """
+
+    def __init__(self, offset, headers, content):
+        self.offset = offset
+        self.headers = headers
+        self.content = content
+
+    @property
+    def type(self):
+        return self.headers.get("warc-type")
+
+    @property
+    def record_id(self):
+        return self.headers.get("warc-record-id")
+
+    @property
+    def target_uri(self):
+        return self.headers.get("warc-target-uri")
+
+
+class _GzipMember:
+    """File-like reader over one gzip member, decompressed on demand.
+
+    The decompressed data is kept in one buffer, read from `_pos` on; the
+    part already read is dropped when more is decompressed.
+    """
+
+    def __init__(self, fileobj, offset):
+        self.fileobj = fileobj
+        self.offset = self.end = offset
+        self.eof = False
+        self._z = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        self._buf = bytearray()
+        self._pos = 0
+        fileobj.seek(offset)
+
+    def _fill(self):
+        if self.eof:
+            return False
+        chunk = self.fileobj.read(CHUNK_SIZE)
+        if not chunk:
+            if self.end == self.offset:
+                self.eof = True
+                return False
+            raise ValueError("truncated gzip member at offset %d" % self.offset)
+        if self._pos:
+            del self._buf[: self._pos]
+            self._pos = 0
+        self._buf += self._z.decompress(chunk)
+        self.end += len(chunk) - len(self._z.unused_data)
+        if self._z.eof:
+            self.eof = True
+            self.fileobj.seek(self.end)
+        return True
+
+    def readline(self):
+        start = self._pos
+        while True:
+            pos = self._buf.find(b"\n", start)
+            if pos >= 0:
+                return self.read(pos + 1 - self._pos)
+            start = len(self._buf) - self._pos
+            if not self._fill():
+                return self.read(len(self._buf) - self._pos)
+            start += self._pos
+
+    def read(self, size):
+        while len(self._buf) - self._pos < size and self._fill():
+            pass
+        data = bytes(self._buf[self._pos:self._pos + size])
+        self._pos += len(data)
+        return data
+
+    def skip(self, size):
+        """Drops the next `size` bytes, returning how many there were."""
+        skipped = 0
+        while True:
+            available = min(len(self._buf) - self._pos, size - skipped)
+            self._pos += available
+            skipped += available
+            if skipped == size or not self._fill():
+                return skipped
+
+    def close(self):
+        # drain the member, so that `end` points at the next one
+        while self._fill():
+            self._pos = len(self._buf)
+
+
+def _skip(stream, size):
+    if isinstance(stream, _GzipMember):
+        return stream.skip(size)
+    start = stream.tell()
+    stream.seek(0, os.SEEK_END)
+    skipped = min(size, stream.tell() - start)
+    stream.seek(start + skipped)
+    return skipped
+
+
+def _read_record(stream, offset, http_only=False):
+    line = stream.readline()
+    while line in (b"\r\n", b"\n"):
+        line = stream.readline()
+    if not line:
+        return None
+    if not line.startswith(b"WARC/"):
+        raise ValueError("no WARC record at offset %d" % offset)
+    headers = {}
+    while True:
+        line = stream.readline()
+        if not line:
+            raise ValueError("truncated WARC header at offset %d" % offset)
+        if line in (b"\r\n", b"\n"):
+            break
+        name, _, value = line.decode("utf-8", "replace").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", 0))
+    if http_only and not _is_http_response(headers):
+        # the content is passed over without reading it into memory
+        content = None
+        read = _skip(stream, length)
+    else:
+        content = stream.read(length)
+        read = len(content)
+    if read < length:
+        raise ValueError("truncated WARC record at offset %d" % offset)
+    # record separator
+    stream.readline()
+    stream.readline()
+    return WarcRecord(offset, headers, content)
+
+
+def iter_records(fileobj, offset=0, end=None, http_only=False):
+    """Yields records starting at `offset` and before `end`, or only the
+    HTTP responses among them with `http_only`.
+
+    For WARC.gz files the offsets are the positions of gzip members.
+    """
+    fileobj.seek(offset)
+    gzipped = fileobj.read(2) == GZIP_MAGIC
+    fileobj.seek(offset)
+    while end is None or offset < end:
+        if gzipped:
+            member = _GzipMember(fileobj, offset)
+            while True:
+                record = _read_record(member, offset, http_only)
+                if record is None:
+                    break
+                if record.content is not None:
+                    yield record
+            member.close()
+            if member.end == offset:
+                return
+            offset = member.end
+        else:
+            record = _read_record(fileobj, offset, http_only)
+            if record is None:
+                return
+            if record.content is not None:
+                yield record
+            offset = fileobj.tell()
+
+
+def parse_http_response(content):
+    """Splits an HTTP response into status code, headers and body."""
+    head, sep, body = content.partition(b"\r\n\r\n")
+    if not sep:
+        head, sep, body = content.partition(b"\n\n")
+    lines = head.decode("iso-8859-1").splitlines()
+    try:
+        status = int(lines[0].split()[1])
+    except (IndexError, ValueError):
+        status = None
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        body = _dechunk(body)
+    encoding = headers.get("content-encoding", "").lower()
+    if encoding:
+        from .fetch import decode_body
+
+        try:
+            body = decode_body(body, encoding)
+        except zlib.error:
+            log.debug("could not decode %s body", encoding)
+    return status, headers, body
+
+
+def _dechunk(body):
+    chunks = []
+    pos = 0
+    while True:
+        eol = body.find(b"\r\n", pos)
+        if eol < 0:
+            break
+        try:
+            size = int(body[pos:eol].split(b";")[0], 16)
+        except ValueError:
+            # not chunked after all
+            return body
+        if size == 0:
+            break
+        chunks.append(body[eol + 2:eol + 2 + size])
+        pos = eol + 2 + size + 2
+    return b"".join(chunks)
+
+
+def get_charset(content_type):
+    match = RE_CHARSET.search(content_type or "")
+    return match.group(1) if match else None
+
+
+def _is_http_response(headers):
+    return (
+        headers.get("warc-type") == "response"
+        and headers.get("content-type", "").startswith("application/http")
+    )
+
+
+def is_http_response(record):
+    return _is_http_response(record.headers)
+
+
+def iter_tasks(records):
+    """Turns HTML responses into extraction tasks for `batch.run`."""
+    for record in records:
+        if not is_http_response(record):
+            continue
+        status, headers, body = parse_http_response(record.content)
+        content_type = headers.get("content-type", "")
+        if status is None or not 200 <= status < 300:
+            continue
+        if not content_type.lower().startswith(HTML_TYPES):
+            continue
+        yield {
+            "source": record.record_id,
+            "url": record.target_uri,
+            "html": body,
+            "charset": get_charset(content_type),
+        }
+
+
+def index_path(path):
+    return path + ".idx.json"
+
+
+def build_index(path):
+    """Scans the archive for the offsets of its response records."""
+    offsets = []
+    with open(path, "rb") as f:
+        for record in iter_records(f, http_only=True):
+            if not offsets or offsets[-1] != record.offset:
+                offsets.append(record.offset)
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime": stat.st_mtime, "offsets": offsets}
+
+
+def load_index(path, build=True):
+    """Returns the stored index of `path`, (re)building it when stale."""
+    stat = os.stat(path)
+    try:
+        with open(index_path(path)) as f:
+            index = json.load(f)
+        if index["size"] == stat.st_size and index["mtime"] == stat.st_mtime:
+            return index
+    except (OSError, ValueError, KeyError):
+        pass
+    if not build:
+        return None
+    index = build_index(path)
+    # written aside and renamed, so that a crash or another shard worker
+    # never sees half an index
+    tmp = "%s.%d" % (index_path(path), os.getpid())
+    try:
+        with open(tmp, "w") as f:
+            json.dump(index, f)
+        os.replace(tmp, index_path(path))
+    except OSError:
+        log.warning("could not store index for %s", path)
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+    return index
+
+
+def shard_range(index, shard, shards):
+    """Returns the ``(offset, end)`` byte range of one of `shards` shards."""
+    offsets = index["offsets"]
+    size = -(-len(offsets) // shards)
+    chunk = offsets[shard * size:(shard + 1) * size]
+    if not chunk:
+        return None
+    following = offsets[(shard + 1) * size:]
+    return chunk[0], following[0] if following else None
+
+
+def iter_shard(path, shard=0, shards=1, http_only=False):
+    """Yields the records of one shard of the archive at `path`, see
+    iter_records()."""
+    if shards == 1:
+        start, end = 0, None
+    else:
+        bounds = shard_range(load_index(path), shard, shards)
+        if bounds is None:
+            return
+        start, end = bounds
+    with open(path, "rb") as f:
+        yield from iter_records(f, start, end, http_only)
+
+
+def write_metadata_record(out, result, gzipped=False):
+    """Writes an extraction result as a WARC metadata record.
+
+    The record refers to the response it was extracted from, when the
+    source of the result is the ID of that record.
+    """
+    payload = json.dumps(dict(result), ensure_ascii=False).encode("utf-8")
+    headers = [
+        ("WARC-Type", "metadata"),
+        ("WARC-Record-ID", "<urn:uuid:%s>" % uuid.uuid4()),
+        ("WARC-Date", datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")),
+        ("WARC-Refers-To", result.get("source")),
+        ("WARC-Target-URI", result.get("url") or ""),
+        ("Content-Type", "application/json"),
+        ("Content-Length", str(len(payload))),
+    ]
+    record = b"WARC/1.0\r\n"
+    # results of tasks without a record ID refer to nothing
+    record += "".join("%s: %s\r\n" % h for h in headers if h[1] is not None).encode("utf-8")
+    record += b"\r\n" + payload + b"\r\n\r\n"
+    if gzipped:
+        z = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+        record = z.compress(record) + z.flush()
+    out.write(record)
+
+
+def main():
+    from optparse import OptionParser
+
+    from .batch import run
+    from .batch import write_jsonl
+
+    parser = OptionParser(usage="%prog: [options] file.warc[.gz]")
+    parser.add_option("-j", "--jobs", default=1, type="int", help="worker processes")
+    parser.add_option(
+        "--shard", default=None, help="process shard I of N only (I/N, 0-based)"
+    )
+    parser.add_option(
+        "--index", default=False, action="store_true", help="only build the offset index"
+    )
+    parser.add_option(
+        "--format", default="jsonl", choices=["jsonl", "warc"], help="jsonl or warc"
+    )
+    parser.add_option("-o", "--output", default=None, help="output file (stdout)")
+    (options, args) = parser.parse_args()
+    if len(args) != 1:
+        parser.print_help()
+        sys.exit(1)
+    path = args[0]
+
+    if options.index:
+        index = load_index(path)
+        print("%d response records indexed" % len(index["offsets"]))
+        return
+
+    shard, shards = 0, 1
+    if options.shard:
+        shard, shards = map(int, options.shard.split("/"))
+    results = run(iter_tasks(iter_shard(path, shard, shards, http_only=True)), jobs=options.jobs)
+
+    if options.format == "jsonl":
+        out = open(options.output, "w") if options.output else sys.stdout
+        try:
+            write_jsonl(results, out)
+        finally:
+            if options.output:
+                out.close()
+    else:
+        out = open(options.output, "wb") if options.output else sys.stdout.buffer
+        gzipped = bool(options.output and options.output.endswith(".gz"))
+        try:
+            for result in results:
+                write_metadata_record(out, result, gzipped)
+        finally:
+            if options.output:
+                out.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,9 @@ speed_deps = [
 
 extras = {
     'speed': speed_deps,
+    'numpy': ["numpy"],
+    'html5': ["html5-parser"],
+    'html5lib': ["html5lib"],
 }
 
 # Adapted from https://github.com/pypa/pip/blob/master/setup.py
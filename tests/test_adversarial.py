@@ -0,0 +1,110 @@
+"""Hostile inputs must take time roughly linear in their size.
+
+Each input is processed at two sizes, 8 times apart. Linear stages take
+about 8 times longer on the big one, quadratic ones 64 times; the check
+allows for 24 (and ignores anything fast enough not to matter).
+"""
+import time
+import unittest
+
+from lxml.html import tostring
+
+from readability import Document
+from readability.cleaners import clean_attributes
+from readability.cleaners import clean_tree
+from readability.encoding import get_encoding
+from readability.htmls import build_doc
+from readability.readability import normalize_text
+
+
+SIZE = 25000
+GROWTH = 8
+MAX_RATIO = 24
+MIN_SECONDS = 0.002
+
+
+def long_attribute_list(size):
+    attributes = " ".join('data-a%d="v" b%dcolor="red"' % (i, i) for i in range(size // 30))
+    return "<html><body><div><p %s>Some text, with a comma.</p></div></body></html>" % attributes
+
+
+def unclosed_tags(size):
+    return "<html><body><p>" + "<a " * (size // 3) + "</p></body></html>"
+
+
+def stray_brackets(size):
+    return "<html><body><p>" + "a <b" * (size // 4)
+
+
+def whitespace_run(size):
+    return "<html><body><div><p>word" + " " * size + "word\t \t</p></div></body></html>"
+
+
+def mixed_whitespace_run(size):
+    return "<html><body><div><p>word " + " \t\n\xa0" * (size // 4) + "word</p></div></body></html>"
+
+
+def long_line(size):
+    return "<html><head>" + "<meta name=x>" * (size // 13) + "</head><body><p>text</p></body></html>"
+
+
+def deep_nesting(size):
+    # libxml2 stops nesting at depth 255, so repeat capped chains
+    chain = "<div>" * 300 + "text, text" + "</div>" * 300
+    return "<html><body>" + chain * (size // len(chain) + 1) + "</body></html>"
+
+
+def many_paragraphs(size):
+    paragraph = "<div class='x'><p>Paragraph text, with commas, <a href='#'>link</a>.</p></div>\n"
+    return "<html><body>" + paragraph * (size // len(paragraph)) + "</body></html>"
+
+
+INPUTS = [
+    long_attribute_list,
+    unclosed_tags,
+    stray_brackets,
+    whitespace_run,
+    mixed_whitespace_run,
+    long_line,
+    deep_nesting,
+    many_paragraphs,
+]
+
+STAGES = {
+    "get_encoding": lambda html: get_encoding(html.encode("utf-8")),
+    "build_doc": build_doc,
+    "clean_tree": lambda html: clean_tree(build_doc(html)[0]),
+    "clean_attributes": lambda html: clean_attributes(tostring(build_doc(html)[0], encoding="unicode")),
+    "normalize_text": lambda html: normalize_text(html, with_text=True),
+    "summary": lambda html: Document(html).summary(),
+}
+
+
+def timed(func, arg):
+    best = None
+    for _ in range(3):
+        started = time.perf_counter()
+        func(arg)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+class TestAdversarialInputs(unittest.TestCase):
+    def test_linear_time(self):
+        for make_input in INPUTS:
+            small, big = make_input(SIZE), make_input(SIZE * GROWTH)
+            for name, stage in STAGES.items():
+                with self.subTest(input=make_input.__name__, stage=name):
+                    small_time = max(timed(stage, small), MIN_SECONDS)
+                    big_time = timed(stage, big)
+                    self.assertLess(
+                        big_time / small_time,
+                        MAX_RATIO,
+                        "%.4fs -> %.4fs" % (small_time, big_time),
+                    )
+
+    def test_long_attribute_lists_are_cut(self):
+        doc, _ = build_doc(long_attribute_list(200000))
+        self.assertEqual(1000, len(doc.find(".//p").attrib))
+        self.assertEqual("Some text, with a comma.", doc.find(".//p").text)
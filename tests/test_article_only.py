@@ -168,6 +168,14 @@ class TestArticleOnly(unittest.TestCase):
 
         assert "<img" in doc.summary(keep_all_images=True)
 
+    def test_keep_images_present_fast_profile(self):
+        sample = load_sample("summary-keep-all-images.sample.html")
+
+        summary = Document(sample, profile="fast").summary(keep_all_images=True)
+        full = Document(sample).summary(keep_all_images=True)
+
+        assert summary.count("<img") == full.count("<img") == 1
+
     def test_keep_images_absent(self):
         sample = load_sample("summary-keep-all-images.sample.html")
 
@@ -231,3 +239,145 @@ class TestArticleOnly(unittest.TestCase):
         # With the fix, it should correctly return the last part.
         short_title = doc.short_title()
         self.assertEqual(short_title, "これは長いです")
+
+    def test_head_only_metadata(self):
+        """The head-only mode answers like a full parse."""
+        for filename in os.listdir(SAMPLES):
+            sample = load_sample(filename)
+            full = Document(sample)
+            fast = Document(sample, head_only=True)
+            self.assertEqual(full.title(), fast.title())
+            self.assertEqual(full.author(), fast.author())
+            self.assertEqual(full.short_title(), fast.short_title())
+
+    def test_head_only_stops_after_head(self):
+        body = "<p>%s</p>" % ("Lots of body text. " * 10000)
+        sample = (
+            "<html><head><title>Title</title><meta name='author' content='Me'></head>"
+            "<body>" + body + "<title>Not the title</title></body></html>"
+        )
+        doc = Document(sample, head_only=True)
+        self.assertEqual("Title", doc.title())
+        self.assertEqual("Me", doc.author())
+        self.assertIsNone(doc._head_parser.doc)
+
+        # no heading which could shorten the title: the body is not parsed
+        sample = sample.replace("<title>Title<", "<title>Some long page title here | Site<")
+        doc = Document(sample, head_only=True)
+        self.assertEqual(Document(sample).short_title(), doc.short_title())
+        self.assertIsNone(doc._head_parser.doc)
+        # with one, it is
+        sample = sample.replace("<body>", "<body><h1>Some long page title here</h1>")
+        doc = Document(sample, head_only=True)
+        self.assertEqual("Some long page title here", doc.short_title())
+        self.assertIsNotNone(doc._head_parser.doc)
+
+        doc = Document("<html><body>" + body + "<title>Late title</title></body></html>", head_only=True)
+        self.assertEqual("Late title", doc.title())
+        self.assertEqual("[no-author]", doc.author())
+
+    def test_links_absolute_in_summary(self):
+        sample = (
+            '<html><head><base href="/base/"></head><body>'
+            '<div class="nav"><a href="nav.html">Navigation</a></div>'
+            '<div class="article"><p>Some article text, long enough to be kept, with '
+            '<a href="page.html">a link</a> and <a href="http://[broken">a broken link</a>.</p>'
+            '<p>Another paragraph of article text, which also needs enough length.</p></div>'
+            "</body></html>"
+        )
+        doc = Document(sample, url="http://example.com/a/b.html")
+        summary = doc.summary()
+        self.assertIn('href="http://example.com/base/page.html"', summary)
+        self.assertNotIn("http://[broken", summary)
+        self.assertNotIn("<base", summary)
+        content = Document(sample, url="http://example.com/a/b.html").content()
+        self.assertIn('href="http://example.com/base/nav.html"', content)
+
+    def test_xpath_map(self):
+        sample = load_sample("si-game.sample.html")
+        doc = Document(sample, xpath="map")
+        summary = doc.summary(html_partial=True)
+        self.assertNotIn(' x="', summary)
+        paths = doc.xpaths()
+        self.assertTrue(paths)
+
+        stamped = Document(sample, xpath=True)
+        stamped.summary(html_partial=True)
+        tree = stamped.html.getroottree()
+        expected = {
+            tree.getpath(el): el.get("x") for el in stamped.html.iter() if el.get("x")
+        }
+        self.assertEqual(expected, paths)
+
+    def test_lenient_pass_does_not_reparse(self):
+        from unittest import mock
+        from readability import readability
+
+        sample = (
+            "<html><body><div class='remark'><p>%s</p></div>"
+            "<p>Short text, too short to be kept.</p></body></html>" % ("Remark text, more of it. " * 20)
+        )
+        with mock.patch.object(readability, "build_doc", wraps=readability.build_doc) as build_doc:
+            summary = Document(sample).summary()
+        self.assertEqual(1, build_doc.call_count)
+        self.assertIn("Remark text", summary)
+
+    def test_tree_edits_undo(self):
+        from lxml.html import document_fromstring, fragment_fromstring, tostring
+        from readability.htmls import TreeEdits
+
+        html = document_fromstring(
+            "<html><body>a<div id='x'>b<span>c</span>d<br>e</div>f"
+            "<p><a href='/l'>g</a></p>h</body></html>"
+        )
+        before = tostring(html)
+        body = html.find("body")
+        div, p = body
+        span, br = div
+        output = fragment_fromstring("<div/>")
+        edits = TreeEdits()
+        edits.drop_tree(br)
+        edits.set_tag(div, "p")
+        edits.set_text(div, None)
+        edits.insert(div, 0, fragment_fromstring("<p>b</p>"))
+        edits.set_tail(span, None)
+        edits.rewrite_links(p, lambda link: None)
+        edits.append(output, p)
+        edits.drop_tree(div)
+        self.assertNotEqual(before, tostring(html))
+        edits.undo()
+        self.assertEqual(before, tostring(html))
+        self.assertIs(p, body[1])
+
+    def test_normalize_text(self):
+        from readability.readability import normalize_text
+
+        cases = [
+            ("", (0, 0, "")),
+            ("  a,  b \n\t c\t\td ", (9, 1, "a, b\nc  d")),
+            ("a" + " \t" * 200 + "b", (3, 0, "a b")),
+            ("a\xa0\xa0b \t\x0bc", (7, 0, "a\xa0\xa0b \x0bc")),
+        ]
+        for text, expected in cases:
+            self.assertEqual(expected, normalize_text(text, with_text=True))
+            self.assertEqual(expected[:2] + (None,), normalize_text(text))
+
+    def test_profiles(self):
+        from unittest import mock
+
+        sample = (
+            "<html><body><div class='remark'><p>%s</p></div>"
+            "<p>Short text, too short to be kept.</p></body></html>" % ("Remark text, more of it. " * 20)
+        )
+        # the fast profile scores the lenient way right away, without
+        # looking for unlikely candidates
+        self.assertIn("Remark text", Document(sample, profile="full").summary())
+        fast = Document(sample, profile="fast")
+        with mock.patch.object(fast, "unlikely_candidates") as unlikely_candidates:
+            self.assertIn("Remark text", fast.summary())
+        unlikely_candidates.assert_not_called()
+        self.assertRaises(ValueError, Document, sample, profile="fastest")
+
+        sample = load_sample("si-game.sample.html")
+        self.assertEqual(Document(sample).summary(), Document(sample, profile="full").summary())
+        self.assertIn("Tigers-Royals Preview", Document(sample, profile="fast").summary())
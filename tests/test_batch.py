@@ -0,0 +1,57 @@
+import io
+import json
+import os
+import unittest
+
+from readability.batch import extract
+from readability.batch import iter_jsonl_tasks
+from readability.batch import iter_path_tasks
+from readability.batch import iter_paths
+from readability.batch import run
+from readability.batch import write_jsonl
+
+
+SAMPLES = os.path.join(os.path.dirname(__file__), "samples")
+
+
+class TestBatch(unittest.TestCase):
+    def test_directory_in_order(self):
+        paths = list(iter_paths([SAMPLES]))
+        self.assertEqual(sorted(paths), paths)
+        results = list(run(iter_path_tasks(paths), jobs=2))
+        self.assertEqual(paths, [r["source"] for r in results])
+        for result in results:
+            self.assertNotIn("error", result)
+            self.assertIn("<body", result["summary"])
+
+    def test_bytes_honour_declared_charset(self):
+        html = (
+            '<html><head><meta charset="windows-1251"><title>Заголовок</title></head>'
+            "<body><p>Достаточно длинный текст статьи, чтобы его извлечь.</p></body></html>"
+        ).encode("cp1251")
+        result = extract({"source": "x", "html": html})
+        self.assertEqual("cp1251", result["encoding"])
+        self.assertEqual("Заголовок", result["title"])
+
+    def test_jsonl_records_and_errors(self):
+        lines = io.StringIO(
+            '{"id": "a", "html": "<title>A</title><p>Some text, long enough to keep around.</p>"}\n'
+            "not json\n"
+        )
+        out = io.StringIO()
+        self.assertEqual(2, write_jsonl(run(iter_jsonl_tasks(lines)), out))
+        first, second = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual("A", first["title"])
+        self.assertIn("total", first["timings"])
+        self.assertTrue(second["error"].startswith("bad record"))
+
+    def test_flushed_on_the_way(self):
+        flushed = []
+
+        class Out(io.StringIO):
+            def flush(self):
+                flushed.append(self.getvalue().count("\n"))
+
+        results = [{"source": str(i)} for i in range(5)]
+        self.assertEqual(5, write_jsonl(results, Out(), flush_every=2))
+        self.assertEqual([2, 4, 5], flushed)
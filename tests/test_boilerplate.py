@@ -0,0 +1,96 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from readability import Document
+from readability.boilerplate import BoilerplateStore
+from readability.htmls import build_doc
+
+
+NAV = "<ul class='menu-links'>%s</ul>" % "".join(
+    "<li><a href='/s%d'>Section %d</a></li>" % (i, i) for i in range(10)
+)
+RELATED = "<div class='teasers'>%s</div>" % "".join(
+    "<div><p>Teaser of story %d, with commas, and enough words to be scored as content.</p></div>" % i
+    for i in range(5)
+)
+
+
+def page(i):
+    article = "".join(
+        "<p>Article %d paragraph %d, with commas, long enough to be the content of the page.</p>"
+        % (i, k) for k in range(6)
+    )
+    return "<html><body>%s<div class='story'>%s</div>%s</body></html>" % (NAV, article, RELATED)
+
+
+class TestBoilerplate(unittest.TestCase):
+    def summary(self, store, i, url=None):
+        url = url or "http://example.com/%d" % i
+        return Document(page(i), url=url, boilerplate=store).summary()
+
+    def test_recurring_blocks_dropped(self):
+        store = BoilerplateStore(min_pages=3)
+        self.assertIn("Teaser of story", self.summary(store, 1))
+        self.assertIn("Teaser of story", self.summary(store, 2))
+        summary = self.summary(store, 3)
+        self.assertNotIn("Teaser of story", summary)
+        self.assertIn("Article 3 paragraph 5", summary)
+        # without a host nothing is learned or dropped
+        self.assertIn("Teaser of story", Document(page(4), boilerplate=store).summary())
+
+    def test_original_paths(self):
+        store = BoilerplateStore(min_pages=2)
+        for i in range(3):
+            # teasers before the story too, and an unlikely candidate to have
+            # the retry start over from a copy of the pruned tree
+            sidebar = "<div class='sidebar'>Sidebar %d</div>" % i
+            html = page(i).replace("<body>" + NAV, "<body>" + NAV + RELATED + sidebar, 1)
+            doc = Document(
+                html, url="http://example.com/%d" % i, boilerplate=store, xpath="map", retry_length=10 ** 6
+            )
+            doc.summary()
+        paths = set(doc.xpaths().values())
+        self.assertIn("/html/body/div[3]/p[6]", paths)
+
+    def test_pages_count_once(self):
+        store = BoilerplateStore(min_pages=2)
+        for _ in range(3):
+            self.assertIn("Article 1 paragraph", self.summary(store, 1))
+        # the same content under another URL does not count either
+        self.assertIn("Article 1 paragraph", self.summary(store, 1, "http://example.com/1?utm=x"))
+        self.assertIn("Teaser of story", self.summary(store, 1, "http://example.com/1?utm=x"))
+
+    def test_most_text_kept(self):
+        store = BoilerplateStore(min_pages=2)
+        same = "<html><body><div>%s</div><p>x</p></body></html>" % RELATED
+        for i in range(3):
+            doc, _ = build_doc(same.replace("<p>x", "<p>" + "x" * (i + 1)))
+            before = len(doc.text_content())
+            store.prune(doc, "example.com", "http://example.com/%d" % i)
+            self.assertGreaterEqual(len(doc.text_content()), before * 0.2)
+        self.assertLess(len(doc.text_content()), before)
+
+    def test_bounded(self):
+        store = BoilerplateStore(max_hosts=2, max_blocks=10)
+        for i in range(5):
+            Document(page(i), url="http://site%d.example.com/" % (i % 3), boilerplate=store).summary()
+        self.assertEqual(["site0.example.com", "site1.example.com"], list(store.hosts))
+        self.assertTrue(all(len(entry.blocks) <= 10 for entry in store.hosts.values()))
+
+    def test_persistence(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, "boilerplate.json")
+            store = BoilerplateStore(path, min_pages=3)
+            for i in range(2):
+                self.summary(store, i)
+            store.save()
+            loaded = BoilerplateStore(path, min_pages=3)
+            self.assertEqual(
+                dict(store.hosts["example.com"].blocks), dict(loaded.hosts["example.com"].blocks)
+            )
+            self.assertNotIn("Teaser of story", self.summary(loaded, 2))
+        finally:
+            shutil.rmtree(directory)
@@ -0,0 +1,70 @@
+import os
+import unittest
+
+from readability import Document
+from readability.batch import extract
+from readability.classify import article_score
+from readability.classify import classify
+from readability.readability import NotAnArticle
+from readability.readability import Unparseable
+
+
+SAMPLES = os.path.join(os.path.dirname(__file__), "samples")
+PARAGRAPH = "A paragraph of the article, with commas, and long enough to count as a long one. "
+ARTICLE = (
+    "<html><head><meta property='og:type' content='article'>"
+    "<script type='application/ld+json'>{\"@type\": [\"NewsArticle\"]}</script></head>"
+    "<body><article>%s</article></body></html>" % ("<p>%s</p>" % (PARAGRAPH * 2) * 8)
+)
+LISTING = (
+    "<html><head><meta property='og:type' content='product.group'></head><body>%s</body></html>"
+    % "".join("<div class='product'><a href='/p%d'>Product %d</a> $9.99</div>" % (i, i) for i in range(30))
+)
+LOGIN = (
+    "<html><body><h1>Subscribers only</h1><p>%s</p><form><input name='user'>"
+    "<input type='password' name='pw'></form></body></html>" % PARAGRAPH
+)
+
+
+class TestClassify(unittest.TestCase):
+    def test_features(self):
+        score, features = classify(ARTICLE)
+        self.assertEqual(8, features["paragraphs"])
+        self.assertEqual(8, features["long_paragraphs"])
+        self.assertTrue(features["article_tag"])
+        self.assertEqual("article", features["og_type"])
+        self.assertEqual(["newsarticle"], features["schema_types"])
+        self.assertFalse(features["password"])
+        self.assertGreater(score, 0.95)
+
+        _, features = classify(LISTING)
+        self.assertGreater(features["link_density"], 0.5)
+        self.assertTrue(classify(LOGIN)[1]["password"])
+
+    def test_text_outside_paragraphs(self):
+        html = "<html><body><div>%s</div></body></html>" % "<br><br>".join([PARAGRAPH * 3] * 6)
+        _, features = classify(html)
+        self.assertEqual(0, features["paragraphs"])
+        self.assertEqual(6, features["long_runs"])
+        self.assertGreater(article_score(features), 0.5)
+
+    def test_scores(self):
+        self.assertLess(classify(LISTING)[0], 0.1)
+        self.assertLess(classify(LOGIN)[0], 0.1)
+        for filename in ("si-game.sample.html", "utf-8-kanji.sample.html"):
+            with open(os.path.join(SAMPLES, filename), "rb") as f:
+                self.assertGreater(Document(f.read()).article_score(), 0.5, filename)
+
+    def test_summary_short_circuit(self):
+        with self.assertRaises(NotAnArticle) as raised:
+            Document(LISTING, article_threshold=0.5).summary()
+        self.assertIsInstance(raised.exception, Unparseable)
+        self.assertLess(raised.exception.score, 0.5)
+        self.assertEqual(Document(ARTICLE).summary(), Document(ARTICLE, article_threshold=0.5).summary())
+        # without a threshold nothing changes
+        self.assertTrue(Document(LISTING).summary())
+
+    def test_batch_result(self):
+        result = extract({"source": "listing", "html": LISTING}, {"article_threshold": 0.5})
+        self.assertTrue(result.error.startswith("NotAnArticle: article score"))
+        self.assertIsNone(result.summary)
@@ -0,0 +1,38 @@
+import os
+import unittest
+
+import lxml.html
+from lxml.html import tostring
+
+from readability.cleaners import clean_tree
+from readability.cleaners import html_cleaner
+from readability.htmls import build_doc
+
+
+SAMPLES = os.path.join(os.path.dirname(__file__), "samples")
+
+TRICKY = """<html><head>
+<meta http-equiv="refresh" content="0; url=javascript:alert(1)">
+<!--[if IE]><p>conditional</p><![endif]--><link rel="stylesheet" href="s.css">
+</head><body onload="go()"><image src="a.png">
+<a href=" java&#10;script:alert(1) ">js</a> <a href=" /relative ">rel</a>
+<object codebase="javascript:x" data="d.swf"><param valuetype="ref" value="javascript:1"></object>
+a<!-- comment -->b<?php echo 1 ?>c<script>var s;</script>d<style>p {}</style>e
+<p style="color: red" ONCLICK="x()" formaction="javascript:z">text</p>
+</body></html>"""
+
+
+class TestCleanTree(unittest.TestCase):
+    def assertCleansLikeCleaner(self, html):
+        plain = lxml.html.HTMLParser(encoding="utf-8")
+        expected = html_cleaner.clean_html(lxml.html.document_fromstring(html.encode("utf-8"), parser=plain))
+        doc, _ = build_doc(html)
+        self.assertEqual(tostring(expected), tostring(clean_tree(doc)))
+
+    def test_same_as_cleaner(self):
+        self.assertCleansLikeCleaner(TRICKY)
+
+    def test_samples_same_as_cleaner(self):
+        for filename in os.listdir(SAMPLES):
+            with open(os.path.join(SAMPLES, filename)) as f:
+                self.assertCleansLikeCleaner(f.read())
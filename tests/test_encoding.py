@@ -0,0 +1,80 @@
+import unittest
+
+from readability import encoding
+from readability.encoding import EncodingCache
+from readability.encoding import get_encoding
+from readability.encoding import iter_samples
+
+
+TEXT = "<p>Привет, это текст на русском языке, и его довольно много.</p>\n"
+
+
+class TestEncoding(unittest.TestCase):
+    def test_declared(self):
+        page = ('<meta charset="windows-1251">' + TEXT).encode("cp1251")
+        self.assertEqual("cp1251", get_encoding(page))
+        # a hint which does not decode the page is skipped
+        self.assertEqual("cp1251", get_encoding(page, hint="utf-8"))
+
+    def test_detected_from_samples(self):
+        page = (TEXT * 20000).encode("cp1251")
+        samples = list(iter_samples(page))
+        self.assertEqual(encoding.SAMPLE_WINDOWS, len(samples))
+        self.assertLessEqual(sum(map(len, samples)), encoding.SAMPLE_SIZE * encoding.SAMPLE_WINDOWS)
+        self.assertTrue(all(b"<" not in sample for sample in samples))
+        self.assertEqual("cp1251", get_encoding(page))
+
+    def test_host_cache(self):
+        answer = {"encoding": "koi8-r", "confidence": 0.5}
+        calls = []
+
+        def loader():
+            def detect(text):
+                calls.append(text)
+                return dict(answer)
+
+            return detect
+
+        encoding.register_detector("test", loader)
+        try:
+            cache = EncodingCache()
+            page = (TEXT * 20000).encode("koi8-r")
+            self.assertEqual("koi8-r", get_encoding(page, host="example.com", detector="test", cache=cache))
+            self.assertEqual(2, len(calls))
+            # the detector is not sure from the first window, the host's
+            # encoding is used instead of looking at the others
+            answer["encoding"] = "cp1251"
+            self.assertEqual("koi8-r", get_encoding(page, host="example.com", detector="test", cache=cache))
+            self.assertEqual(3, len(calls))
+            # without the cache, nothing is remembered
+            self.assertEqual("cp1251", get_encoding(page, host="example.com", detector="test"))
+            # a sure detection wins over the host's encoding
+            answer["confidence"] = 0.99
+            self.assertEqual("cp1251", get_encoding(page, host="example.com", detector="test", cache=cache))
+            self.assertEqual("cp1251", cache.get("example.com"))
+            # utf-8 pages of the host are not decoded with the cached encoding
+            answer.update(encoding="utf-8", confidence=0.5)
+            utf8 = (TEXT * 3).encode("utf-8")
+            self.assertEqual("utf-8", get_encoding(utf8, host="example.com", detector="test", cache=cache))
+        finally:
+            del encoding.DETECTORS["test"]
+            encoding._loaded_detectors.pop("test")
+            encoding.DETECTOR_ORDER.remove("test")
+
+    def test_host_cache_confirmed(self):
+        cache = EncodingCache()
+        cp1251 = (TEXT * 200).encode("cp1251")
+        self.assertEqual("cp1251", get_encoding(cp1251, host="example.com", cache=cache))
+        japanese = ("<p>日本語のテキストです。これはかなり長い文章になります。</p>\n" * 200).encode("shift_jis")
+        self.assertEqual("cp932", get_encoding(japanese, host="example.com", cache=cache))
+
+    def test_cache_size(self):
+        cache = EncodingCache(size=2)
+        cache.put("a", "cp1251")
+        cache.put("b", "koi8-r")
+        cache.get("a")
+        cache.put("c", "utf-8")
+        self.assertEqual(["a", "c"], list(cache.encodings))
+
+    def test_unknown_detector(self):
+        self.assertRaises(ValueError, get_encoding, b"<p>no charset here</p>", detector="nope")
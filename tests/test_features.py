@@ -0,0 +1,77 @@
+import os
+import unittest
+
+from readability import Document
+from readability.features import extract_features
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+SAMPLES = os.path.join(os.path.dirname(__file__), "samples")
+
+
+def samples():
+    for filename in sorted(os.listdir(SAMPLES)):
+        with open(os.path.join(SAMPLES, filename), "rb") as f:
+            yield f.read()
+
+
+class TestFeatures(unittest.TestCase):
+    def test_same_as_scoring(self):
+        for sample in samples():
+            doc = Document(sample, features=True)
+            doc._html(True)
+            candidates = doc.score_paragraphs()
+            table = doc.features()
+            self.assertEqual(len(candidates), len(table))
+            tree = doc.html.getroottree()
+            for row, (elem, candidate) in zip(table.rows(), candidates.items()):
+                self.assertEqual(tree.getpath(elem), row["path"])
+                self.assertEqual(candidate["content_score"], row["content_score"])
+                self.assertEqual(doc.get_link_density(elem), row["link_density"])
+                self.assertEqual(doc.class_weight(elem), row["class_weight"])
+                self.assertEqual(len(list(elem.iterancestors())), row["depth"])
+                if row["parent"] >= 0:
+                    self.assertEqual(table["path"][row["parent"]], tree.getpath(elem.getparent()))
+
+    def test_summary_unchanged(self):
+        for sample in samples():
+            doc = Document(sample, features=True)
+            self.assertEqual(Document(sample).summary(), doc.summary())
+            self.assertGreater(len(doc.features()), 0)
+
+    def test_original_paths(self):
+        sample = "<html><body><div class='ad'>x</div><div><p>%s</p></div></body></html>" % (
+            "Some text, with commas. " * 5
+        )
+        table = Document(sample, features=True, xpath="map").features()
+        self.assertEqual(["/html/body/div[2]", "/html/body"], table["path"])
+        self.assertEqual([1, -1], list(table["parent"]))
+
+    def test_batch(self):
+        inputs = list(samples())
+        table = extract_features(inputs)
+        sizes = [len(Document(sample, features=True).features()) for sample in inputs]
+        self.assertEqual(sum(sizes), len(table))
+        self.assertEqual(
+            [i for i, size in enumerate(sizes) for _ in range(size)], list(table["doc"])
+        )
+        second = sizes[0]
+        parents = [p for p in table["parent"][second:second + sizes[1]] if p >= 0]
+        self.assertTrue(all(second <= p < second + sizes[1] for p in parents))
+
+    def test_requires_flag(self):
+        self.assertRaises(ValueError, Document("<p>x</p>").features)
+
+    @unittest.skipUnless(numpy, "numpy is not installed")
+    def test_numpy(self):
+        for sample in samples():
+            python = Document(sample, features=True).features()
+            vectorized = Document(sample, features=True, scoring="numpy").features()
+            self.assertEqual(list(python.rows()), list(vectorized.rows()))
+            arrays = python.to_numpy()
+            self.assertEqual(list(python["content_score"]), arrays["content_score"].tolist())
+            self.assertEqual(python["tag"], arrays["tag"].tolist())
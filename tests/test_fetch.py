@@ -0,0 +1,134 @@
+import gzip
+import shutil
+import tempfile
+import threading
+import unittest
+import zlib
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+
+from readability.fetch import FetchError
+from readability.fetch import Fetcher
+from readability.fetch import decode_body
+from readability.fetch import extract_url
+
+
+ARTICLE = (
+    "<html><head><title>Заголовок статьи</title></head><body><div class='article'>"
+    + "<p>Текст статьи, с запятыми, достаточно длинный для извлечения.</p>" * 10
+    + "</div></body></html>"
+)
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    pages = {}
+    requests = []
+    ports = set()
+
+    def do_GET(self):
+        Handler.requests.append((self.path, dict(self.headers)))
+        Handler.ports.add(self.client_address[1])
+        if self.path == "/moved":
+            return self.reply(301, b"", [("Location", "/plain")])
+        if self.path not in self.pages:
+            return self.reply(404, b"")
+        body, content_type, etag = self.pages[self.path]
+        if etag and self.headers.get("If-None-Match") == etag:
+            return self.reply(304, b"", [("ETag", etag)])
+        headers = [("Content-Type", content_type)]
+        if etag:
+            headers.append(("ETag", etag))
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body)
+            headers.append(("Content-Encoding", "gzip"))
+        self.reply(200, body, headers)
+
+    def reply(self, status, body, headers=()):
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        if status != 304:
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestFetcher(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base = "http://127.0.0.1:%d" % cls.server.server_address[1]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        Handler.pages = {
+            # no charset in the page itself, only in the header
+            "/article": (ARTICLE.encode("cp1251"), "text/html; charset=windows-1251", '"v1"'),
+            "/plain": (b"<html><body><p>plain</p></body></html>", "text/html", None),
+        }
+        Handler.requests = []
+        Handler.ports = set()
+        self.cache_dir = tempfile.mkdtemp()
+        self.fetcher = Fetcher(self.cache_dir)
+
+    def tearDown(self):
+        self.fetcher.close()
+        shutil.rmtree(self.cache_dir)
+
+    def test_gzip_and_charset(self):
+        response = self.fetcher.fetch(self.base + "/article")
+        self.assertEqual("gzip, deflate", Handler.requests[0][1]["Accept-Encoding"])
+        self.assertEqual(ARTICLE.encode("cp1251"), response.body)
+        self.assertEqual("windows-1251", response.charset)
+        result = extract_url(self.base + "/article", self.fetcher)
+        self.assertEqual("Заголовок статьи", result.title)
+        self.assertIn("Текст статьи", result.summary)
+
+    def test_keep_alive(self):
+        for _ in range(3):
+            self.fetcher(self.base + "/plain")
+        self.assertEqual(3, len(Handler.requests))
+        self.assertEqual(1, len(Handler.ports))
+
+    def test_conditional_request(self):
+        first = extract_url(self.base + "/article", self.fetcher)
+        second = extract_url(self.base + "/article", self.fetcher)
+        self.assertEqual('"v1"', Handler.requests[1][1]["If-None-Match"])
+        self.assertEqual(first, second)
+        self.assertTrue(self.fetcher.fetch(self.base + "/article").not_modified)
+
+        # a new fetcher on the same directory revalidates too
+        fetcher = Fetcher(self.cache_dir)
+        self.assertTrue(fetcher.fetch(self.base + "/article").not_modified)
+        fetcher.close()
+
+        Handler.pages["/article"] = (ARTICLE.replace("статьи", "новости").encode("cp1251"),
+                                     "text/html; charset=windows-1251", '"v2"')
+        third = extract_url(self.base + "/article", self.fetcher)
+        self.assertEqual("Заголовок новости", third.title)
+
+    def test_redirect(self):
+        response = self.fetcher.fetch(self.base + "/moved")
+        self.assertEqual(self.base + "/plain", response.url)
+
+    def test_errors(self):
+        self.assertRaises(FetchError, self.fetcher.fetch, self.base + "/missing")
+        self.assertRaises(FetchError, self.fetcher.fetch, "ftp://example.com/")
+
+
+class TestDecodeBody(unittest.TestCase):
+    def test_deflate(self):
+        raw = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+        self.assertEqual(b"data", decode_body(zlib.compress(b"data"), "deflate"))
+        self.assertEqual(b"data", decode_body(raw.compress(b"data") + raw.flush(), "deflate"))
+        self.assertEqual(b"data", decode_body(b"data", None))
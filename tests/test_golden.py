@@ -0,0 +1,48 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+import golden  # noqa: E402
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class TestGolden(unittest.TestCase):
+    """The outputs stored by `make golden` (benchmarks/golden.py)."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.pages = golden.corpus()
+        cls.reference = {name: golden.snapshot(html) for name, html in cls.pages}
+
+    def check(self, expected, actual):
+        for name, html in self.pages:
+            with self.subTest(page=name):
+                self.assertEqual([], golden.differences(expected[name], actual[name]))
+
+    def test_reference(self):
+        stored = golden.load()
+        self.assertEqual(set(stored), set(self.reference))
+        self.check(stored, self.reference)
+
+    def test_incremental(self):
+        config = golden.CONFIGS["incremental"]
+        self.check(self.reference, {name: golden.snapshot(html, config) for name, html in self.pages})
+
+    @unittest.skipUnless(numpy, "numpy is not installed")
+    def test_numpy(self):
+        config = golden.CONFIGS["numpy"]
+        self.check(self.reference, {name: golden.snapshot(html, config) for name, html in self.pages})
+
+    def test_differences(self):
+        name = "generated/000"
+        changed = dict(self.reference[name], title="Other")
+        changed["candidates"] = [[path, score + 1e-3] for path, score in changed["candidates"]]
+        found = golden.differences(self.reference[name], changed)
+        self.assertTrue(found[0].startswith("title: "))
+        self.assertEqual(len(changed["candidates"]) + 1, len(found))
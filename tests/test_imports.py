@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+import unittest
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def modules_after(code):
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    out = subprocess.check_output(
+        [sys.executable, "-c", code + "; import sys; print(' '.join(sys.modules))"], env=env
+    )
+    return set(out.decode().split())
+
+
+class TestLazyImports(unittest.TestCase):
+    def test_import_is_light(self):
+        modules = modules_after("import readability")
+        for name in ("chardet", "cchardet", "cssselect", "lxml_html_clean", "urllib.request"):
+            self.assertNotIn(name, modules)
+
+    def test_extraction_without_cleaner(self):
+        modules = modules_after(
+            "from readability import Document; "
+            "Document('<p><a href=\"javascript:x()\">a</a> <a href=\"http://a/%20\">b</a></p>').summary()"
+        )
+        self.assertFalse({"lxml_html_clean", "lxml.html.clean"} & modules)
+
+    def test_loaded_when_needed(self):
+        modules = modules_after(
+            "from readability.encoding import get_encoding; get_encoding(b'<p>no charset declared here</p>')"
+        )
+        self.assertTrue({"chardet", "cchardet"} & modules)
+        modules = modules_after("from readability.cleaners import html_cleaner")
+        self.assertTrue({"lxml_html_clean", "lxml.html.clean"} & modules)
@@ -0,0 +1,49 @@
+import json
+import os
+import unittest
+
+from readability import Document
+
+
+SAMPLES = os.path.join(os.path.dirname(__file__), "samples")
+
+PARAGRAPH = "<p>Some paragraph text, with commas, and <a href='#'>a link</a> in it. %s</p>"
+
+
+def page(updates):
+    paragraphs = "".join(PARAGRAPH % ("word " * 30) for _ in range(10))
+    return (
+        "<html><body><div id='main'><div class='article'>%s</div>"
+        "<div class='live'><p>%s</p></div>"
+        "<form><input name='q'></form></div></body></html>"
+        % (paragraphs, "".join("Update %d, something happened. " % i for i in range(updates)))
+    )
+
+
+class TestIncremental(unittest.TestCase):
+    def test_same_as_from_scratch(self):
+        for filename in sorted(os.listdir(SAMPLES)):
+            with open(os.path.join(SAMPLES, filename), "rb") as f:
+                sample = f.read()
+            doc = Document(sample, incremental=True)
+            self.assertEqual(Document(sample).summary(), doc.summary())
+            again = Document(sample, incremental=doc.state())
+            self.assertEqual(Document(sample).summary(), again.summary())
+            self.assertEqual(0, again._stats.computed)
+
+    def test_changed_page(self):
+        doc = Document(page(3), incremental=True)
+        doc.summary()
+        state = json.loads(json.dumps(doc.state()))
+        updated = Document(page(4), incremental=state)
+        self.assertEqual(Document(page(4)).summary(), updated.summary())
+        self.assertGreater(updated._stats.reused, 0)
+        self.assertGreater(updated._stats.computed, 0)
+
+    def test_unknown_state_version(self):
+        doc = Document(page(3), incremental={"version": 0, "subtrees": {}})
+        self.assertEqual(Document(page(3)).summary(), doc.summary())
+        self.assertEqual(0, doc._stats.reused)
+
+    def test_state_requires_incremental(self):
+        self.assertRaises(ValueError, Document(page(1)).state)
@@ -0,0 +1,145 @@
+import time
+import unittest
+
+from lxml.html import fragment_fromstring
+
+from readability import Document
+from readability.fetch import Response
+from readability.pagination import MappingFetcher
+from readability.pagination import PagedDocument
+from readability.pagination import assemble
+from readability.pagination import merge
+
+
+BASE = "http://example.com/story"
+
+
+def page(number, count=3):
+    pager = " ".join(
+        "<a href='%s?page=%d'>%d</a>" % (BASE, n, n) for n in range(1, count + 1)
+    )
+    next_link = ""
+    if number < count:
+        next_link = "<a href='%s?page=%d'>Next &raquo;</a>" % (BASE, number + 1)
+    paragraphs = "".join(
+        "<p>Page %d paragraph %d has some text, with commas, to score well enough.</p>"
+        % (number, i) for i in range(5)
+    )
+    return (
+        "<html><body><div id='main'><div class='entry'>"
+        "<p>By the author, a regular writer here on %d pages of text, really.</p>%s</div>"
+        "<div class='pager'>%s %s</div>"
+        "</div><a href='http://other.example.com/x?page=2'>2</a></body></html>"
+        % (count, paragraphs, pager, next_link)
+    )
+
+
+def site(count=3):
+    pages = {BASE: page(1, count)}
+    for n in range(2, count + 1):
+        pages["%s?page=%d" % (BASE, n)] = page(n, count)
+    return pages
+
+
+class TestNextPages(unittest.TestCase):
+    def test_pager_links(self):
+        doc = PagedDocument(page(1, 4), url=BASE)
+        summary = doc.summary(html_partial=True)
+        self.assertEqual(
+            {BASE + "?page=2": 2, BASE + "?page=3": 3, BASE + "?page=4": 4}, doc.pages
+        )
+        # the same summary as without looking for the pages
+        self.assertEqual(Document(page(1, 4), url=BASE).summary(html_partial=True), summary)
+
+    def test_later_pages_only(self):
+        doc = PagedDocument(page(3, 4), 3, url=BASE + "?page=3")
+        doc.summary()
+        self.assertEqual({BASE + "?page=4": 4}, doc.pages)
+
+
+class TestAssemble(unittest.TestCase):
+    def test_pages_in_order(self):
+        summary, urls = assemble(BASE, fetch=MappingFetcher(site()), html_partial=True)
+        self.assertEqual([BASE, BASE + "?page=2", BASE + "?page=3"], urls)
+        positions = [summary.index("Page %d paragraph 0" % n) for n in (1, 2, 3)]
+        self.assertEqual(sorted(positions), positions)
+        # the byline is on every page, but kept once
+        self.assertEqual(1, summary.count("By the author"))
+
+    def test_same_options_as_single_page(self):
+        pages = site(1)
+        summary, urls = assemble(BASE, fetch=MappingFetcher(pages), html_partial=True)
+        single = Document(pages[BASE], url=BASE).summary(html_partial=True)
+        self.assertEqual([BASE], urls)
+        self.assertIn(single, summary)
+
+    def test_max_pages(self):
+        fetcher = MappingFetcher(site(6))
+        _, urls = assemble(BASE, fetch=fetcher, max_pages=3)
+        self.assertEqual(3, len(urls))
+        self.assertEqual(3, len(fetcher.fetched))
+
+    def test_first_page_given(self):
+        pages = site()
+        fetcher = MappingFetcher(pages)
+        _, urls = assemble(BASE, fetch=fetcher, html=pages[BASE])
+        self.assertEqual(3, len(urls))
+        self.assertNotIn(BASE, fetcher.fetched)
+
+    def test_failed_pages_left_out(self):
+        pages = site()
+        del pages[BASE + "?page=2"]
+        _, urls = assemble(BASE, fetch=MappingFetcher(pages))
+        self.assertEqual([BASE, BASE + "?page=3"], urls)
+        self.assertRaises(KeyError, assemble, BASE + "?page=2", fetch=MappingFetcher(pages))
+
+    def test_timeout(self):
+        pages = site()
+
+        def slow(url):
+            if url != BASE:
+                time.sleep(1)
+            return pages[url]
+
+        started = time.monotonic()
+        _, urls = assemble(BASE, fetch=slow, timeout=0.3)
+        self.assertLess(time.monotonic() - started, 0.9)
+        self.assertEqual([BASE], urls)
+
+    def test_first_page_timeout(self):
+        def slow(url):
+            time.sleep(0.5)
+            return site()[url]
+
+        self.assertRaises(TimeoutError, assemble, BASE, fetch=slow, timeout=0.1)
+
+    def test_responses(self):
+        pages = site(2)
+        moved = BASE.replace("/story", "/2020/story")
+
+        def fetch(url):
+            # every page was moved, links to the others are relative to the
+            # new place, and the text is in windows-1251
+            html = pages[url.replace(moved, BASE)].replace(BASE + "?", "?").replace("paragraph", "абзац")
+            return Response(url.replace(BASE, moved), 200, html.encode("cp1251"), "windows-1251")
+
+        summary, urls = assemble(BASE, fetch=fetch, html_partial=True)
+        self.assertEqual([BASE, moved + "?page=2"], urls)
+        self.assertIn("Page 2 абзац 0", summary)
+
+
+class TestMerge(unittest.TestCase):
+    def test_near_duplicates(self):
+        merged = fragment_fromstring(
+            merge(
+                [
+                    "<div><p>Page 1 of 2</p><p>First text.</p></div>",
+                    "<div><p>Page 2 of 2</p><p>Second text.</p><p><img src='a.png'></p></div>",
+                ],
+                html_partial=True,
+            )
+        )
+        self.assertEqual(
+            ["Page 1 of 2", "First text.", "Second text.", ""],
+            [p.text_content() for p in merged.iter("p")],
+        )
@@ -0,0 +1,76 @@
+import os
+import unittest
+
+from lxml import etree
+from lxml.html import HtmlElement
+from lxml.html import document_fromstring
+from lxml.html import tostring
+
+from readability import Document
+from readability import htmls
+from readability.htmls import build_doc
+from readability.htmls import get_parser
+from readability.htmls import register_parser
+from readability.htmls import to_html_tree
+
+try:
+    import html5lib
+except ImportError:
+    html5lib = None
+
+
+SAMPLES = os.path.join(os.path.dirname(__file__), "samples")
+
+
+def words(summary):
+    return document_fromstring(summary).text_content().split()
+
+
+class TestParsers(unittest.TestCase):
+    def tearDown(self):
+        htmls.PARSERS.pop("counting", None)
+        htmls._loaded_parsers.pop("counting", None)
+
+    def test_default(self):
+        self.assertIs(get_parser(), get_parser("lxml"))
+        self.assertRaises(ValueError, get_parser, "regex")
+
+    def test_register(self):
+        calls = []
+
+        def load():
+            def parse(page):
+                calls.append(page)
+                return get_parser("lxml")(page)
+
+            return parse
+
+        register_parser("counting", load)
+        sample = "<html><body><div><p>%s</p></div></body></html>" % ("Text, with commas. " * 10)
+        self.assertEqual(Document(sample).summary(), Document(sample, parser="counting").summary())
+        self.assertEqual([sample], calls)
+
+    def test_to_html_tree(self):
+        root = etree.fromstring(
+            '<html xmlns="http://www.w3.org/1999/xhtml"><body><p>a<!-- c -->b<b>c</b>d</p>'
+            '<svg xmlns="http://www.w3.org/2000/svg"><circle r="1"/></svg></body></html>'
+        )
+        tree = to_html_tree(root)
+        self.assertIsInstance(tree.find("body"), HtmlElement)
+        self.assertEqual(
+            b'<html><body><p>ab<b>c</b>d</p><svg><circle r="1"></circle></svg></body></html>',
+            tostring(tree),
+        )
+
+    @unittest.skipUnless(html5lib, "html5lib is not installed")
+    def test_html5lib(self):
+        doc, encoding = build_doc("<p>a<table><tr><td>x</table>".encode("utf-8"), parser="html5lib")
+        self.assertIsInstance(doc, HtmlElement)
+        self.assertEqual("utf-8", encoding)
+        for filename in sorted(os.listdir(SAMPLES)):
+            with open(os.path.join(SAMPLES, filename), "rb") as f:
+                sample = f.read()
+            # the markup may nest differently, the text is the same
+            self.assertEqual(
+                words(Document(sample).summary()), words(Document(sample, parser="html5lib").summary())
+            )
@@ -0,0 +1,102 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from readability import Document
+from readability.profiling import Profile
+from readability.profiling import profiling
+
+
+SAMPLES = os.path.join(os.path.dirname(__file__), "samples")
+
+
+def load_samples():
+    pages = []
+    for filename in sorted(os.listdir(SAMPLES)):
+        with open(os.path.join(SAMPLES, filename), "rb") as f:
+            pages.append(f.read())
+    return pages
+
+
+class TestProfiling(unittest.TestCase):
+    def test_functions(self):
+        pages = load_samples()
+        with profiling() as profile:
+            for page in pages:
+                Document(page).summary()
+        functions = profile.functions
+        for name in ("summary", "class_weight", "text_length", "tags", "describe", "sanitize"):
+            self.assertIn(name, functions)
+        self.assertEqual(len(pages), functions["summary"][0])
+        self.assertIn("drop_tree (in summary)", functions)
+        # lxml's own functions are not counted
+        self.assertNotIn("document_fromstring", functions)
+        for calls, own, total in functions.values():
+            self.assertLessEqual(own, total + 1e-9)
+        self.assertAlmostEqual(
+            sum(own for _, own, _ in functions.values()), sum(profile.stacks.values())
+        )
+        self.assertTrue(profile.report().startswith("function "))
+
+    def test_generator_calls(self):
+        calls = {"tags": 0, "reverse_tags": 0}
+        originals = {name: getattr(Document, name) for name in calls}
+
+        def counting(name):
+            def wrapper(*args, **kwargs):
+                calls[name] += 1
+                return originals[name](*args, **kwargs)
+
+            return wrapper
+
+        for name in calls:
+            setattr(Document, name, counting(name))
+        try:
+            with profiling() as profile:
+                Document(load_samples()[0]).summary()
+        finally:
+            for name, original in originals.items():
+                setattr(Document, name, original)
+        # one call per generator, however many items it yields
+        self.assertGreater(calls["tags"], 0)
+        for name, count in calls.items():
+            self.assertEqual(count, profile.functions.get(name, [0])[0], name)
+
+    def test_accumulates_and_restores(self):
+        previous = sys.getprofile()
+        profile = Profile()
+        page = load_samples()[0]
+        for _ in range(2):
+            with profiling(profile):
+                Document(page).summary()
+            self.assertIs(previous, sys.getprofile())
+        self.assertEqual(2, profile.functions["summary"][0])
+
+    def test_write_stacks(self):
+        directory = tempfile.mkdtemp()
+        try:
+            with profiling() as profile:
+                Document(load_samples()[0]).summary()
+            path = os.path.join(directory, "stacks.folded")
+            profile.write_stacks(path)
+            with open(path) as f:
+                lines = f.read().splitlines()
+            self.assertTrue(lines)
+            for line in lines:
+                stack, microseconds = line.rsplit(" ", 1)
+                self.assertTrue(stack.split(";")[0] in ("summary", "__init__", "_parse"), stack)
+                self.assertGreater(int(microseconds), 0)
+        finally:
+            shutil.rmtree(directory)
+
+    def test_names(self):
+        from readability.sweep import sweep
+
+        with profiling() as profile:
+            sweep(load_samples()[0], [{}])
+        # the class name is left out for Document only
+        self.assertIn("_parse", profile.functions)
+        self.assertIn("_SweepDocument._parse", profile.functions)
+        self.assertIn("SubtreeStats.fingerprint", profile.functions)
@@ -0,0 +1,63 @@
+import pickle
+import unittest
+from unittest import mock
+
+from readability import Document
+from readability import readability
+from readability.result import Result
+
+
+class TestResult(unittest.TestCase):
+    def sample(self):
+        return Result(
+            source="a.html",
+            title="Заголовок",
+            short_title="Заголовок",
+            author="[no-author]",
+            summary="<div><p>Текст статьи.</p></div>",
+            encoding="cp1251",
+            degraded=False,
+            timings={"parse": 0.25, "total": 1.5},
+        )
+
+    def test_roundtrip(self):
+        result = self.sample()
+        data = result.to_bytes()
+        copy = Result.from_bytes(data)
+        self.assertEqual(result, copy)
+        self.assertEqual(result.summary, copy.summary)
+        self.assertIsNone(copy.url)
+        self.assertEqual(result, pickle.loads(pickle.dumps(result)))
+        # a single bytes object, not a pickled dict of strings
+        self.assertLess(len(pickle.dumps(result)), len(data) + 100)
+
+    def test_summary_not_copied(self):
+        data = bytearray(self.sample().to_bytes())
+        view = Result.from_bytes(data).summary_bytes
+        self.assertIs(data, view.obj)
+        self.assertEqual("<div><p>Текст статьи.</p></div>".encode("utf-8"), view.tobytes())
+
+    def test_mapping_access(self):
+        result = Result(source="x", error="ValueError: boom")
+        self.assertIn("error", result)
+        self.assertNotIn("title", result)
+        self.assertRaises(KeyError, lambda: result["title"])
+        self.assertEqual({"source": "x", "error": "ValueError: boom"}, dict(result))
+
+    def test_document_result(self):
+        sample = (
+            "<html><head><title>Title - Site</title></head><body><div>"
+            "<p>%s</p></div></body></html>" % ("Article text, with commas. " * 20)
+        )
+        result = Document(sample).result()
+        self.assertEqual("Title - Site", result.title)
+        self.assertFalse(result.degraded)
+        self.assertIn("Article text", result.summary)
+        self.assertEqual({"parse", "metadata", "summary"}, set(result.timings))
+        # the page is parsed once, for the metadata and the summary
+        with mock.patch.object(readability, "build_doc", wraps=readability.build_doc) as build_doc:
+            self.assertEqual(result.summary, Document(sample).result().summary)
+        self.assertEqual(1, build_doc.call_count)
+
+        result = Document("<html><body><span>tiny</span></body></html>").result()
+        self.assertTrue(result.degraded)
@@ -0,0 +1,103 @@
+import http.client
+import json
+import os
+import socket
+import tempfile
+import threading
+import unittest
+
+from readability.server import Extractor
+from readability.server import make_server
+
+
+ARTICLE = (
+    "<html><head><title>Server article</title></head><body><div class='article'>"
+    + "<p>Text of the article, with commas, long enough to be extracted.</p>" * 10
+    + "</div><div class='sidebar'><p>Sidebar text, with commas, short.</p></div></body></html>"
+)
+
+
+class UnixConnection(http.client.HTTPConnection):
+    def __init__(self, path):
+        super().__init__("localhost")
+        self.path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.path)
+
+
+class TestServer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.extractor = Extractor(jobs=1, options={"min_text_length": 25}, max_queue=4)
+        cls.directory = tempfile.mkdtemp()
+        cls.socket_path = os.path.join(cls.directory, "readability.sock")
+        cls.servers = [make_server(cls.extractor), make_server(cls.extractor, socket_path=cls.socket_path)]
+        for server in cls.servers:
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        for server in cls.servers:
+            server.shutdown()
+            server.server_close()
+        cls.extractor.close()
+        os.unlink(cls.socket_path)
+        os.rmdir(cls.directory)
+
+    def call(self, method, path, request=None, unix=False):
+        if unix:
+            connection = UnixConnection(self.socket_path)
+        else:
+            connection = http.client.HTTPConnection(*self.servers[0].server_address)
+        body = json.dumps(request) if request is not None else None
+        connection.request(method, path, body, {"Content-Type": "application/json"})
+        response = connection.getresponse()
+        data = response.read().decode("utf-8")
+        connection.close()
+        if response.getheader("Content-Type") == "application/json":
+            data = json.loads(data)
+        return response.status, data
+
+    def test_extract(self):
+        for unix in (False, True):
+            status, answer = self.call("POST", "/extract", {"html": ARTICLE, "id": "a"}, unix)
+            self.assertEqual(200, status)
+            self.assertEqual("a", answer["source"])
+            self.assertEqual("Server article", answer["title"])
+            self.assertIn("Text of the article", answer["summary"])
+
+    def test_options(self):
+        status, answer = self.call("POST", "/extract", {"html": ARTICLE, "options": {"profile": "nope"}})
+        self.assertEqual(200, status)
+        self.assertIn("ValueError", answer["error"])
+        status, answer = self.call("POST", "/extract", {"html": ARTICLE, "options": {"debug": True}})
+        self.assertEqual(400, status)
+        self.assertIn("debug", answer["error"])
+        status, answer = self.call(
+            "POST", "/extract", {"html": ARTICLE, "options": {"negative_keywords": ["article"]}}
+        )
+        self.assertEqual(200, status)
+
+    def test_bad_requests(self):
+        self.assertEqual(400, self.call("POST", "/extract", {"charset": "utf-8"})[0])
+        self.assertEqual(400, self.call("POST", "/extract", [1])[0])
+        self.assertEqual(404, self.call("GET", "/nothing")[0])
+
+    def test_deadline(self):
+        status, answer = self.call("POST", "/extract", {"html": ARTICLE, "timeout": 1e-9})
+        self.assertEqual(504, status)
+        self.assertIn("deadline", answer["error"])
+
+    def test_metrics(self):
+        self.call("POST", "/extract", {"html": ARTICLE})
+        status, text = self.call("GET", "/metrics")
+        self.assertEqual(200, status)
+        self.assertIn('readability_requests_total{status="200"}', text)
+        self.assertIn('readability_request_seconds_bucket{le="+Inf"}', text)
+        self.assertIn("readability_queue_depth 0", text)
+        self.assertIn("readability_running 0", text)
+        self.assertIn("readability_abandoned 0", text)
+        self.assertIn("readability_requests_in_flight 0", text)
+        self.assertEqual((200, "ok\n"), self.call("GET", "/health", unix=True))
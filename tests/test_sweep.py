@@ -0,0 +1,36 @@
+import os
+import unittest
+
+from readability import Document
+from readability.sweep import sweep
+
+
+SAMPLES = os.path.join(os.path.dirname(__file__), "samples")
+CONFIGS = [
+    {},
+    {"min_text_length": 50, "retry_length": 100},
+    {"negative_keywords": ["sidebar", "related"], "positive_keywords": "story"},
+    {"min_text_length": 10, "profile": "fast"},
+]
+
+
+class TestSweep(unittest.TestCase):
+    def test_same_as_separate_documents(self):
+        for filename in sorted(os.listdir(SAMPLES)):
+            with open(os.path.join(SAMPLES, filename), "rb") as f:
+                sample = f.read()
+            results = sweep(sample, CONFIGS, url="http://example.com/a/")
+            self.assertEqual(len(CONFIGS), len(results))
+            for config, result in zip(CONFIGS, results):
+                with self.subTest(sample=filename, config=config):
+                    expected = Document(sample, url="http://example.com/a/", **config).result()
+                    for name in ("title", "short_title", "author", "summary", "encoding", "degraded"):
+                        self.assertEqual(getattr(expected, name), getattr(result, name), name)
+
+    def test_options(self):
+        html = "<html><body><div><p>%s</p></div></body></html>" % ("Text, with commas. " * 10)
+        self.assertRaises(ValueError, sweep, html, [{"url": "http://example.com/"}])
+        self.assertRaises(ValueError, sweep, html, [{}], boilerplate=None)
+        results = sweep(html, [{"profile": "nope"}, {}], html_partial=True)
+        self.assertTrue(results[0].error.startswith("ValueError"))
+        self.assertEqual(Document(html).summary(html_partial=True), results[1].summary)
@@ -0,0 +1,68 @@
+import os
+import unittest
+
+from readability import Document
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+SAMPLES = os.path.join(os.path.dirname(__file__), "samples")
+
+
+@unittest.skipUnless(numpy, "numpy is not installed")
+class TestNumpyScoring(unittest.TestCase):
+    def scores(self, doc):
+        tree = doc._html(True).getroottree()
+        return [
+            (tree.getpath(elem), candidate["content_score"])
+            for elem, candidate in doc.score_paragraphs().items()
+        ]
+
+    def test_same_as_python(self):
+        for filename in sorted(os.listdir(SAMPLES)):
+            with open(os.path.join(SAMPLES, filename), "rb") as f:
+                sample = f.read()
+            self.assertEqual(
+                self.scores(Document(sample)), self.scores(Document(sample, scoring="numpy"))
+            )
+            self.assertEqual(
+                Document(sample).summary(), Document(sample, scoring="numpy").summary()
+            )
+
+    def test_nested_headers(self):
+        sample = (
+            "<html><body><div><h2>Head <h3 class='ad'><a href='#'>linked heading</a></h3></h2>"
+            "<p>%s</p></div></body></html>" % ("Some paragraph text, with commas. " * 10)
+        )
+        self.assertEqual(Document(sample).summary(), Document(sample, scoring="numpy").summary())
+
+    def test_text_and_link_lengths(self):
+        from lxml.html import fragment_fromstring
+        from readability.readability import normalize_text
+        from readability.vectorized import TreeArrays
+
+        root = fragment_fromstring(
+            "<div> a,\t\tb <p>\xa0\xa0c <a href='#'>d\n\n e<b>f, </b>" + "\xa0 " * 150 + "</a>g</p>"
+            "<ul>\t<li> <a href='#'> h </a> \r\n</li></ul>\u3000</div>"
+        )
+        # nested links, which the parser would not build
+        link = root.find(".//a")
+        link.append(fragment_fromstring("<a href='#'>i,  j</a>"))
+        link[-1].tail = " k"
+        for profile in ("full", "fast"):
+            doc = Document("<p>x</p>", profile=profile)
+            tree = TreeArrays(doc, root)
+            densities, totals = tree.link_densities(numpy.arange(len(tree.elems)))
+            for i, elem in enumerate(tree.elems):
+                text = elem.text_content()
+                self.assertEqual(normalize_text(text)[:2], (tree.lengths[i], tree.commas[i]))
+                self.assertEqual(len(text), tree.raw_lengths[i])
+                self.assertEqual(doc._link_density(elem)[:2], (densities[i], totals[i]))
+
+
+class TestScoringOption(unittest.TestCase):
+    def test_unknown_backend(self):
+        self.assertRaises(ValueError, Document, "<p>x</p>", scoring="fortran")
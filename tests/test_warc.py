@@ -0,0 +1,139 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import zlib
+
+from readability.batch import run
+from readability.warc import iter_records
+from readability.warc import iter_shard
+from readability.warc import iter_tasks
+from readability.warc import load_index
+from readability.warc import parse_http_response
+from readability.warc import write_metadata_record
+
+
+def warc_record(warc_type, uri, block, content_type="application/http; msgtype=response"):
+    head = (
+        "WARC/1.0\r\n"
+        "WARC-Type: %s\r\n"
+        "WARC-Record-ID: <urn:uuid:%s>\r\n"
+        "WARC-Target-URI: %s\r\n"
+        "Content-Type: %s\r\n"
+        "Content-Length: %d\r\n\r\n" % (warc_type, uri.split("/")[-1], uri, content_type, len(block))
+    )
+    return head.encode("ascii") + block + b"\r\n\r\n"
+
+
+def http_response(body, content_type, status="200 OK"):
+    return (
+        "HTTP/1.1 %s\r\nContent-Type: %s\r\n\r\n" % (status, content_type)
+    ).encode("ascii") + body
+
+
+PAGE = (
+    "<html><head><title>Статья</title></head><body><div><p>Это текст статьи, "
+    "и он достаточно длинный, чтобы его извлечь из страницы.</p></div></body></html>"
+)
+
+
+def sample_records():
+    yield warc_record("warcinfo", "info", b"software: test", "application/warc-fields")
+    for i in range(6):
+        yield warc_record(
+            "response",
+            "http://example.com/%d" % i,
+            http_response(PAGE.encode("cp1251"), "text/html; charset=windows-1251"),
+        )
+    yield warc_record("response", "http://example.com/img", http_response(b"GIF89a", "image/gif"))
+    yield warc_record(
+        "response", "http://example.com/missing", http_response(b"<p>gone</p>", "text/html", "404 Not Found")
+    )
+
+
+def gzip_member(data):
+    z = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    return z.compress(data) + z.flush()
+
+
+class TestWarc(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def write(self, name, gzipped):
+        path = os.path.join(self.tmp, name)
+        with open(path, "wb") as f:
+            for record in sample_records():
+                f.write(gzip_member(record) if gzipped else record)
+        return path
+
+    def test_html_responses_only(self):
+        for gzipped in (False, True):
+            path = self.write("a.warc" + (".gz" if gzipped else ""), gzipped)
+            with open(path, "rb") as f:
+                tasks = list(iter_tasks(iter_records(f)))
+            self.assertEqual(6, len(tasks))
+            self.assertEqual("windows-1251", tasks[0]["charset"])
+            result = list(run(tasks[:1]))[0]
+            self.assertEqual("Статья", result["title"])
+            self.assertEqual("cp1251", result["encoding"])
+
+    def test_shards_cover_archive(self):
+        for gzipped in (False, True):
+            path = self.write("b.warc" + (".gz" if gzipped else ""), gzipped)
+            index = load_index(path)
+            self.assertEqual(8, len(index["offsets"]))
+            self.assertTrue(os.path.exists(path + ".idx.json"))
+            # nothing is left of the temporary file it was written to
+            leftovers = [name for name in os.listdir(self.tmp) if name.startswith(os.path.basename(path) + ".idx.json.")]
+            self.assertEqual([], leftovers)
+            uris = []
+            for shard in range(3):
+                uris.extend(r.target_uri for r in iter_shard(path, shard, 3))
+            self.assertEqual(["http://example.com/%d" % i for i in range(6)], uris[:6])
+            self.assertEqual(8, len(uris))
+
+    def test_large_records(self):
+        # spread over many compressed chunks, with lines ending on the way
+        block = b"\n".join(os.urandom(1000) for _ in range(2000))
+        page = http_response(b"<p>" + block + b"</p>", "text/html")
+        records = [
+            warc_record("resource", "http://example.com/blob", block, "application/octet-stream"),
+            warc_record("response", "http://example.com/big", page),
+        ]
+        for gzipped in (False, True):
+            data = b"".join(gzip_member(r) if gzipped else r for r in records)
+            everything = list(iter_records(io.BytesIO(data)))
+            self.assertEqual([block, page], [r.content for r in everything])
+            responses = list(iter_records(io.BytesIO(data), http_only=True))
+            self.assertEqual(["http://example.com/big"], [r.target_uri for r in responses])
+            self.assertEqual(page, responses[0].content)
+
+    def test_metadata_records_roundtrip(self):
+        out = io.BytesIO()
+        result = {"source": "<urn:uuid:1>", "url": "http://example.com/", "title": "T"}
+        write_metadata_record(out, result, gzipped=True)
+        write_metadata_record(out, result, gzipped=True)
+        records = list(iter_records(io.BytesIO(out.getvalue())))
+        self.assertEqual(2, len(records))
+        self.assertEqual("<urn:uuid:1>", records[1].headers["warc-refers-to"])
+        self.assertEqual(result, json.loads(records[1].content))
+
+    def test_metadata_record_without_source(self):
+        out = io.BytesIO()
+        write_metadata_record(out, {"url": "http://example.com/", "error": "bad record"})
+        records = list(iter_records(io.BytesIO(out.getvalue())))
+        self.assertNotIn("warc-refers-to", records[0].headers)
+        self.assertEqual("http://example.com/", records[0].target_uri)
+
+    def test_deflate_bodies(self):
+        body = b"<p>deflated</p>"
+        for wbits in (zlib.MAX_WBITS, -zlib.MAX_WBITS):
+            z = zlib.compressobj(wbits=wbits)
+            response = b"HTTP/1.1 200 OK\r\nContent-Encoding: deflate\r\n\r\n" + z.compress(body) + z.flush()
+            self.assertEqual(body, parse_http_response(response)[2])